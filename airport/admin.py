@@ -9,6 +9,8 @@ from airport.models import (
     Order,
     Ticket,
     Airplane,
+    HeldSeat,
+    SeatHold,
 )
 
 
@@ -26,6 +28,17 @@ class OrderAdmin(admin.ModelAdmin):
     inlines = (TicketInLine,)
 
 
+class HeldSeatInLine(admin.TabularInline):
+    model = HeldSeat
+    extra = 0
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    inlines = (HeldSeatInLine,)
+    list_display = ("user", "created_at", "expires_at")
+
+
 admin.site.register(Flight, FlightAdmin)
 admin.site.register(Airplane)
 admin.site.register(Crew)
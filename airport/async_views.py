@@ -0,0 +1,182 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.views import View
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+from airport.db_router import ReplicaReadMixin
+from airport.models import Flight
+from airport.pagination import FlightPagination
+from airport.permissions import IsAdminOrIfAuthenticatedReadOnly
+from airport.route_graph import afind_itineraries
+from airport.schedules import (
+    flight_order,
+    merge_flights,
+    virtual_flights,
+    virtual_window,
+)
+from airport.serializers import (
+    FlightDetailSerializer,
+    FlightFilterSerializer,
+    FlightListSerializer,
+    ItinerarySerializer,
+    RouteSearchSerializer,
+)
+
+
+class AsyncPolicyView(ReplicaReadMixin, APIView):
+    """Authentication, permission, throttling and rendering of the async views"""
+
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    renderer_classes = (JSONRenderer,)
+
+    def get_throttles(self):
+        # Read at call time so benchmark.throttling_disabled() applies here too
+        return [throttle() for throttle in APIView.throttle_classes]
+
+
+class AsyncReadView(View):
+    """
+    Read-only endpoint with an async ``read`` handler, served natively under
+    ASGI. The API's DRF policies run around it, so authentication, throttling
+    and the JSON body match the synchronous viewsets.
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    async def read(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    async def get(self, request, *args, **kwargs):
+        policy = AsyncPolicyView()
+        policy.args, policy.kwargs = args, kwargs
+        policy.headers = policy.default_response_headers
+        policy.format_kwarg = None
+        request = policy.request = policy.initialize_request(request)
+        try:
+            await sync_to_async(policy.initial)(request)
+            response = Response(await self.read(request, *args, **kwargs))
+        except Exception as exc:
+            response = policy.handle_exception(exc)
+        return policy.finalize_response(request, response).render()
+
+
+class AsyncFlightListView(AsyncReadView):
+    """
+    Flights ordered by departure, with the filters of the flight list and
+    the same virtual flights of schedules. Pages follow a keyset cursor on
+    the flight_order() key.
+    """
+
+    queryset = Flight.objects.select_related(
+        "route__source", "route__destination", "airplane"
+    )
+    pagination = FlightPagination()
+
+    @staticmethod
+    def encode_cursor(flight: Flight) -> str:
+        departure_time, virtual, key = flight_order(flight)
+        position = json.dumps([departure_time.isoformat(), virtual, key])
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        try:
+            departure_time, virtual, key = json.loads(
+                base64.urlsafe_b64decode(cursor)
+            )
+            return datetime.fromisoformat(departure_time), bool(virtual), int(key)
+        except (TypeError, ValueError):
+            raise NotFound(FlightPagination.invalid_cursor_message)
+
+    async def read(self, request):
+        params = FlightFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
+        queryset = (
+            self.queryset.matching(**filters)
+            .with_tickets_available()
+            .order_by("departure_time", "id")
+        )
+        position = None
+        cursor = request.query_params.get(self.pagination.cursor_query_param)
+        if cursor:
+            position = self.decode_cursor(cursor)
+            departure_time, virtual, pk = position
+            queryset = queryset.filter(departure_time__gte=departure_time)
+            # Stored flights sort before virtual ones departing at the same time
+            if virtual:
+                queryset = queryset.exclude(departure_time=departure_time)
+            else:
+                queryset = queryset.exclude(
+                    departure_time=departure_time, id__lte=pk
+                )
+
+        page_size = self.pagination.get_page_size(request)
+        flights = [
+            flight async for flight in queryset[: page_size + 1].aiterator()
+        ]
+        window = virtual_window(**filters)
+        if window is not None:
+            virtual = await sync_to_async(virtual_flights)(
+                *window,
+                arrival=filters.get("arrival"),
+                source=filters.get("source"),
+                destination=filters.get("destination"),
+            )
+            flights = merge_flights(
+                flights,
+                [
+                    flight
+                    for flight in virtual
+                    if position is None or flight_order(flight) > position
+                ],
+            )
+        next_url = None
+        if len(flights) > page_size:
+            flights = flights[:page_size]
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                self.pagination.cursor_query_param,
+                self.encode_cursor(flights[-1]),
+            )
+        return {
+            "next": next_url,
+            "results": FlightListSerializer(flights, many=True).data,
+        }
+
+
+class AsyncFlightDetailView(AsyncReadView):
+    queryset = Flight.objects.select_related(
+        "route__source", "route__destination", "airplane__airplane_type"
+    ).prefetch_related("crew", "tickets")
+
+    async def read(self, request, pk):
+        try:
+            flight = await self.queryset.aget(pk=pk)
+        except Flight.DoesNotExist:
+            raise Http404
+        return FlightDetailSerializer(flight).data
+
+
+class AsyncRouteSearchView(AsyncReadView):
+    async def read(self, request):
+        params = RouteSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        itineraries = await afind_itineraries(
+            params.validated_data["origin"],
+            params.validated_data["destination"],
+            params.validated_data["date"],
+            max_legs=params.validated_data["max_legs"],
+            min_connection=timedelta(
+                minutes=params.validated_data["min_connection"]
+            ),
+        )
+        return ItinerarySerializer(itineraries, many=True).data
@@ -0,0 +1,279 @@
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from airport.models import Flight
+from airport.urls import urlpatterns
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def get_server_name() -> str:
+    """A host name the API accepts, DEBUG mode always allows localhost"""
+    for host in settings.ALLOWED_HOSTS:
+        if host != "*" and not host.startswith("."):
+            return host
+    return "localhost"
+
+
+@contextmanager
+def throttling_disabled():
+    """Benchmarks send far more requests than the API throttle rates allow"""
+    throttle_classes = APIView.throttle_classes
+    APIView.throttle_classes = ()
+    try:
+        yield
+    finally:
+        APIView.throttle_classes = throttle_classes
+
+
+def route_search_query():
+    flight = (
+        Flight.objects.select_related("route__source", "route__destination")
+        .order_by("-pk")
+        .first()
+    )
+    if flight is None:
+        return None
+    return {
+        "origin": flight.route.source.airport_code,
+        "destination": flight.route.destination.airport_code,
+        "date": timezone.localtime(flight.departure_time).date().isoformat(),
+    }
+
+
+def crew_available_query():
+    start = timezone.now()
+    return {
+        "start": start.isoformat(),
+        "end": (start + timedelta(hours=12)).isoformat(),
+    }
+
+
+# Endpoints that need query parameters to do any work
+ENDPOINT_QUERIES = {
+    "route-search": route_search_query,
+    "async-route-search": route_search_query,
+    "crew-available": crew_available_query,
+}
+
+
+def iter_patterns(patterns):
+    """URL patterns of a urlconf, with those of included urlconfs"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern.url_patterns)
+        else:
+            yield pattern
+
+
+def get_view_class(callback):
+    # DRF views and viewsets keep their class in .cls, plain views in .view_class
+    return getattr(callback, "cls", None) or getattr(callback, "view_class", None)
+
+
+def serves_get(callback) -> bool:
+    actions = getattr(callback, "actions", None)
+    if actions is not None:
+        return "get" in actions
+    return hasattr(get_view_class(callback), "get")
+
+
+def get_endpoints() -> list:
+    """
+    (url name, url) of every GET endpoint in airport/urls.py, the router's
+    and the async and metrics views next to it. Format suffix variants are
+    left out, detail endpoints get the newest object of their model.
+    """
+    endpoints = []
+    latest_pks = {}
+    for pattern in iter_patterns(urlpatterns):
+        name = pattern.name
+        if name is None or not serves_get(pattern.callback):
+            continue
+        arguments = set(pattern.pattern.regex.groupindex)
+        if arguments - {"pk"}:
+            continue
+        kwargs = {}
+        if arguments:
+            model = get_view_class(pattern.callback).queryset.model
+            if model not in latest_pks:
+                latest_pks[model] = (
+                    model.objects.order_by("-pk").values_list("pk", flat=True).first()
+                )
+            if latest_pks[model] is None:
+                continue
+            kwargs["pk"] = latest_pks[model]
+        url = reverse(f"airport:{name}", kwargs=kwargs)
+        if name in ENDPOINT_QUERIES:
+            query = ENDPOINT_QUERIES[name]()
+            if query is None:
+                continue
+            url = f"{url}?{urlencode(query)}"
+        endpoints.append((name, url))
+    return endpoints
+
+
+class BenchmarkRunner:
+    """
+    Measures latency percentiles, query count and peak Python memory of
+    API endpoints through an in-process client.
+
+    Timings are taken with memory tracing off, peak memory and queries are
+    recorded in one extra traced request.
+    """
+
+    def __init__(self, user, iterations: int = 20, warmup: int = 2):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.client = APIClient(SERVER_NAME=get_server_name())
+        self.client.force_authenticate(user)
+
+    def fetch(self, url: str) -> tuple:
+        """Response and its body, streamed bodies are consumed in full"""
+        response = self.client.get(url)
+        if response.streaming:
+            return response, b"".join(response.streaming_content)
+        return response, response.content
+
+    def measure(self, name: str, url: str) -> dict:
+        for _ in range(self.warmup):
+            self.fetch(url)
+
+        timings = []
+        for _ in range(self.iterations):
+            started = time.perf_counter()
+            response, content = self.fetch(url)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                self.fetch(url)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "name": name,
+            "url": url,
+            "status": response.status_code,
+            "iterations": self.iterations,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "mean_ms": round(statistics.mean(timings), 3),
+            "queries": len(queries),
+            "peak_memory_kb": round(peak_memory / 1024, 1),
+            "response_bytes": len(content),
+        }
+
+    def run(self, endpoints: list) -> list:
+        with throttling_disabled():
+            return [self.measure(name, url) for name, url in endpoints]
+
+
+def build_report(volumes: dict, iterations: int, results: list) -> dict:
+    return {
+        "created_at": timezone.now().isoformat(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "iterations": iterations,
+        "volumes": volumes,
+        "endpoints": sorted(results, key=lambda result: result["name"]),
+    }
+
+
+def get_load_test_paths() -> list:
+    """(name, path) of the read endpoints with both a viewset and an async view"""
+    flight_id = Flight.objects.order_by("-pk").values_list("pk", flat=True).first()
+    if flight_id is None:
+        return []
+    search = f"?{urlencode(route_search_query())}"
+    return [
+        ("flight-list", reverse("airport:flight-list")),
+        ("async-flight-list", reverse("airport:async-flight-list")),
+        ("flight-detail", reverse("airport:flight-detail", args=[flight_id])),
+        (
+            "async-flight-detail",
+            reverse("airport:async-flight-detail", args=[flight_id]),
+        ),
+        ("route-search", reverse("airport:route-search") + search),
+        ("async-route-search", reverse("airport:async-route-search") + search),
+    ]
+
+
+class LoadTest:
+    """
+    Sends concurrent GETs to a running server and reports throughput, so the
+    same endpoints can be compared under different app servers and modes.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str,
+        concurrency: int = 32,
+        requests: int = 500,
+        timeout: float = 30,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.concurrency = concurrency
+        self.requests = requests
+        self.timeout = timeout
+
+    def fetch(self, path: str) -> tuple:
+        """Status code and latency in milliseconds of one request"""
+        request = Request(
+            self.base_url + path, headers={"Authorization": f"Bearer {self.token}"}
+        )
+        started = time.perf_counter()
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        except (URLError, OSError):
+            status = 0
+        return status, (time.perf_counter() - started) * 1000
+
+    def measure(self, name: str, path: str) -> dict:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            results = list(pool.map(self.fetch, [path] * self.requests))
+        elapsed = time.perf_counter() - started
+        timings = [timing for _, timing in results]
+        return {
+            "name": name,
+            "path": path,
+            "requests": self.requests,
+            "concurrency": self.concurrency,
+            "requests_per_second": round(self.requests / elapsed, 1),
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "errors": sum(1 for status, _ in results if status != 200),
+        }
+
+    def run(self, paths: list) -> list:
+        return [self.measure(name, path) for name, path in paths]
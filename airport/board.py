@@ -0,0 +1,84 @@
+from django.db.models import F, OuterRef, Subquery
+
+from airport.models import BoardEntry, Flight, local_day_range
+
+REFRESH_CHUNK_SIZE = 500
+
+
+def board_entries(flight: Flight) -> list:
+    """Departure and arrival board rows of a flight with route and airplane"""
+    route = flight.route
+    capacity = flight.airplane.capacity
+    return [
+        BoardEntry(
+            airport_id=airport.pk,
+            direction=direction,
+            scheduled_time=scheduled_time,
+            flight_id=flight.pk,
+            airport_code=other.airport_code,
+            city=other.closest_big_city,
+            departure_time=flight.departure_time,
+            arrival_time=flight.arrival_time,
+            capacity=capacity,
+            tickets_available=flight.tickets_available,
+        )
+        for direction, scheduled_time, airport, other in [
+            (
+                BoardEntry.DEPARTURE,
+                flight.departure_time,
+                route.source,
+                route.destination,
+            ),
+            (
+                BoardEntry.ARRIVAL,
+                flight.arrival_time,
+                route.destination,
+                route.source,
+            ),
+        ]
+    ]
+
+
+def refresh_board(flight_ids) -> int:
+    """Rebuild the board rows of the given flights, return rows written"""
+    flight_ids = list(flight_ids)
+    written = 0
+    for first in range(0, len(flight_ids), REFRESH_CHUNK_SIZE):
+        chunk = flight_ids[first:first + REFRESH_CHUNK_SIZE]
+        BoardEntry.objects.filter(flight_id__in=chunk).delete()
+        flights = (
+            Flight.objects.filter(pk__in=chunk)
+            .select_related("route__source", "route__destination", "airplane")
+            .with_tickets_available()
+            .order_by()
+        )
+        entries = BoardEntry.objects.bulk_create(
+            entry for flight in flights for entry in board_entries(flight)
+        )
+        written += len(entries)
+    return written
+
+
+def rebuild_board() -> int:
+    """Rebuild the board of every flight"""
+    BoardEntry.objects.all().delete()
+    return refresh_board(Flight.objects.values_list("pk", flat=True).order_by("pk"))
+
+
+def refresh_availability(flight_ids) -> int:
+    """Copy the seats sold of the given flights to the board with one UPDATE"""
+    seats_sold = Flight.objects.filter(pk=OuterRef("flight_id")).values("seats_sold")
+    return BoardEntry.objects.filter(flight_id__in=list(flight_ids)).update(
+        tickets_available=F("capacity") - Subquery(seats_sold)
+    )
+
+
+def get_board(airport_id: int, direction: str, date):
+    """Board rows of an airport for one local day, served from one index range"""
+    day_start, day_end = local_day_range(date)
+    return BoardEntry.objects.filter(
+        airport_id=airport_id,
+        direction=direction,
+        scheduled_time__gte=day_start,
+        scheduled_time__lt=day_end,
+    ).order_by("scheduled_time", "flight_id")
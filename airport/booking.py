@@ -0,0 +1,218 @@
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from airport.board import refresh_availability
+from airport.cache import bump_version
+from airport.models import Flight, HeldSeat, Order, Ticket
+from airport.seat_map import invalidate_seat_maps
+
+REFRESH_CHUNK_SIZE = 500
+
+
+def lock_flights(flight_ids) -> dict:
+    """
+    Lock the given flights (and load their airplanes) in one query.
+
+    Rows are locked in primary key order so two concurrent orders touching
+    the same flights cannot deadlock each other.
+    """
+    return {
+        flight.pk: flight
+        for flight in Flight.objects.select_for_update(of=("self",))
+        .select_related("airplane")
+        .filter(pk__in=flight_ids)
+        .order_by("pk")
+    }
+
+
+def check_capacity(flights: dict, tickets_data: list, error_to_raise) -> Counter:
+    """
+    Reject an order for more seats than a locked flight has left, from its
+    seats_sold counter alone, before any seat is looked at.
+    """
+    requested = Counter(ticket["flight"].pk for ticket in tickets_data)
+    for flight_id, count in requested.items():
+        flight = flights[flight_id]
+        left = flight.airplane.capacity - flight.seats_sold
+        if count > left:
+            raise error_to_raise(
+                {
+                    "tickets": f"Flight {flight_id} is sold out"
+                    if left <= 0
+                    else f"Only {left} of the {count} requested seats "
+                         f"are left on flight {flight_id}"
+                }
+            )
+    return requested
+
+
+def add_seats_sold(counts: dict) -> None:
+    """
+    Add counts[flight_id] to the seats_sold of every flight in one UPDATE.
+    Counts may be negative; a counter that drifted low through bulk writes
+    stops at zero instead of failing the delete, reconcile_seats_sold()
+    repairs it.
+    """
+    if not counts:
+        return
+    Flight.objects.filter(pk__in=list(counts)).update(
+        seats_sold=Greatest(
+            F("seats_sold")
+            + Case(
+                *(When(pk=pk, then=Value(count)) for pk, count in counts.items()),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+    )
+
+
+def tickets_counted() -> Coalesce:
+    """Ticket count of the outer flight, as a subquery"""
+    return Coalesce(
+        Subquery(
+            Ticket.objects.filter(flight_id=OuterRef("pk"))
+            .order_by()
+            .values("flight_id")
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        Value(0),
+    )
+
+
+def refresh_seats_sold(flight_ids) -> int:
+    """Recount the seats_sold of the given flights from their tickets"""
+    flight_ids = list(flight_ids)
+    updated = 0
+    for first in range(0, len(flight_ids), REFRESH_CHUNK_SIZE):
+        updated += Flight.objects.filter(
+            pk__in=flight_ids[first:first + REFRESH_CHUNK_SIZE]
+        ).update(seats_sold=tickets_counted())
+    return updated
+
+
+def reconcile_seats_sold() -> int:
+    """
+    Correct every flight whose seats_sold drifted from its ticket count,
+    e.g. after tickets were written bypassing book_tickets() and signals.
+    Returns the number of flights corrected.
+    """
+    drifted = list(
+        Flight.objects.annotate(counted=tickets_counted())
+        .exclude(seats_sold=F("counted"))
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    if drifted:
+        with transaction.atomic():
+            refresh_seats_sold(drifted)
+            refresh_availability(drifted)
+            bump_version(Flight)
+    return len(drifted)
+
+
+def collect_seats(tickets_data: list, flights: dict, error_to_raise) -> dict:
+    """Requested (flight_id, row, seat) mapped to their locked flights"""
+    seats = {}
+    for ticket in tickets_data:
+        flight = flights[ticket["flight"].pk]
+        Ticket.validate_seats(ticket["row"], ticket["seat"], error_to_raise, flight)
+        seat = (flight.pk, ticket["row"], ticket["seat"])
+        if seat in seats:
+            raise error_to_raise(
+                {
+                    "tickets": f"Seat (row: {seat[1]}, seat: {seat[2]}) "
+                               f"on flight {seat[0]} is ordered more than once"
+                }
+            )
+        seats[seat] = flight
+    return seats
+
+
+def seats_filter(seats) -> Q:
+    return reduce(or_, (Q(flight_id=f, row=r, seat=s) for f, r, s in seats))
+
+
+def check_seats_free(seats, user, error_to_raise) -> list:
+    """
+    Raise if any of the seats is sold or held by someone else than `user`,
+    in one query for tickets and unexpired holds together. Returns the
+    seats `user` holds themselves.
+    """
+    lookup = seats_filter(seats)
+    tickets = (
+        Ticket.objects.filter(lookup)
+        .annotate(held_by=Value(None, output_field=IntegerField()))
+        .order_by()
+        .values_list("flight_id", "row", "seat", "held_by")
+    )
+    held = (
+        HeldSeat.objects.filter(lookup, hold__expires_at__gt=timezone.now())
+        .order_by()
+        .values_list("flight_id", "row", "seat", "hold__user_id")
+    )
+    taken, own = [], []
+    for flight_id, row, seat, held_by in sorted(
+        tickets.union(held, all=True), key=lambda found: found[:3]
+    ):
+        if held_by is None:
+            taken.append(
+                f"Seat (row: {row}, seat: {seat}) "
+                f"on flight {flight_id} is already taken"
+            )
+        elif held_by != user.pk:
+            taken.append(
+                f"Seat (row: {row}, seat: {seat}) "
+                f"on flight {flight_id} is held by another customer"
+            )
+        else:
+            own.append((flight_id, row, seat))
+    if taken:
+        raise error_to_raise({"tickets": taken})
+    return own
+
+
+def book_tickets(order: Order, tickets_data: list, error_to_raise) -> list:
+    """
+    Create all tickets of an order with a fixed number of queries:
+    one to lock the flights, one to look for taken or held seats, one bulk
+    insert and one seats_sold update, no matter how many seats the order
+    contains. Orders for more seats than are left fail before any seat is
+    looked at. Seats the customer held are released from their holds.
+    """
+    flights = lock_flights({ticket["flight"].pk for ticket in tickets_data})
+    requested = check_capacity(flights, tickets_data, error_to_raise)
+    seats = collect_seats(tickets_data, flights, error_to_raise)
+    own = check_seats_free(seats, order.user, error_to_raise)
+
+    tickets = Ticket.objects.bulk_create(
+        [
+            Ticket(order=order, flight=flight, row=row, seat=seat)
+            for (_, row, seat), flight in seats.items()
+        ]
+    )
+    if own:
+        HeldSeat.objects.filter(seats_filter(own)).delete()
+    # bulk_create() sends no post_save signals, so do their work here
+    add_seats_sold(requested)
+    invalidate_seat_maps(flights.keys())
+    refresh_availability(flights.keys())
+    bump_version(Ticket)
+    return tickets
@@ -0,0 +1,231 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.dispatch import receiver
+from rest_framework.response import Response
+
+from airport.db_router import replica_may_lag
+
+MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache whose entries expire after a timeout"""
+
+    def __init__(self, max_entries: int, timeout: float):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResponseCache:
+    """
+    Two level read-through cache: an in-process LRU in front of an optional
+    backend from CACHES that is shared by all workers.
+    """
+
+    def __init__(self, timeout: int, max_entries: int, shared_alias=None):
+        self.timeout = timeout
+        self.local = LRUCache(max_entries, timeout)
+        self.shared = caches[shared_alias] if shared_alias else None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is MISSING and self.shared is not None:
+            value = self.shared.get(key, MISSING)
+            if value is not MISSING:
+                self.local.set(key, value)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value) -> None:
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value, self.timeout)
+
+    def clear(self) -> None:
+        self.local.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "local_entries": len(self.local),
+        }
+
+
+_response_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        conf = settings.AIRPORT_CACHE
+        _response_cache = ResponseCache(
+            conf["TIMEOUT"], conf["MAX_ENTRIES"], conf["SHARED_ALIAS"]
+        )
+    return _response_cache
+
+
+@receiver(setting_changed)
+def reset_response_cache(setting, **kwargs):
+    global _response_cache
+    if setting == "AIRPORT_CACHE":
+        _response_cache = None
+
+
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def worker_count() -> int:
+    """Worker processes serving the app, gunicorn.conf.py exports the count"""
+    return int(os.getenv("WEB_CONCURRENCY", 1))
+
+
+def check_shared_aliases() -> None:
+    """
+    Refuse to serve from several workers when the version stamps or the
+    replica pins live in a per-process cache, a write in one worker would
+    never reach the others.
+    """
+    if worker_count() <= 1:
+        return
+    aliases = {
+        "AIRPORT_CACHE['VERSION_ALIAS']": settings.AIRPORT_CACHE["VERSION_ALIAS"]
+    }
+    if settings.DATABASE_REPLICAS:
+        aliases["REPLICA_PIN_ALIAS"] = settings.REPLICA_PIN_ALIAS
+    for name, alias in aliases.items():
+        if settings.CACHES[alias]["BACKEND"] in PROCESS_LOCAL_BACKENDS:
+            raise ImproperlyConfigured(
+                f"{name} points at the per-process cache '{alias}' while "
+                f"{worker_count()} workers run, configure a cache shared by "
+                f"all workers such as Redis or memcached."
+            )
+
+
+def _version_store():
+    return caches[settings.AIRPORT_CACHE["VERSION_ALIAS"]]
+
+
+def _version_key(model) -> str:
+    return f"airport:version:{model._meta.label_lower}"
+
+
+def get_versions(models) -> dict:
+    """
+    Current version stamp of every model, keyed by model label.
+
+    A stamp is the time in nanoseconds of the last write to the model,
+    a model that has no stamp yet gets the current time.
+    """
+    store = _version_store()
+    keys = {_version_key(model): model._meta.label_lower for model in models}
+    versions = store.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        now = time.time_ns()
+        for key in missing:
+            store.add(key, now, None)
+        versions.update(store.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_version(model) -> None:
+    """
+    Give the model a new version stamp now and once more after commit,
+    so responses built from uncommitted rows are never reused.
+    """
+    key = _version_key(model)
+
+    def bump():
+        _version_store().set(key, time.time_ns(), None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+class CachedResponseMixin:
+    """
+    Serve list and retrieve responses from the response cache.
+
+    Cache keys include the version stamps of `cache_models`, the models whose
+    writes change the responses of the viewset, so any write to one of them
+    makes every previously cached response unreachable.
+    """
+
+    cache_models = ()
+
+    def get_cache_key(self, request, versions: dict) -> str:
+        versions = sorted(versions.items())
+        raw = f"{self.basename}:{self.action}:{request.build_absolute_uri()}:{versions}"
+        return "airport:response:" + hashlib.md5(raw.encode()).hexdigest()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        # Responses built inside a transaction may show rows that get rolled back
+        if not settings.AIRPORT_CACHE["TIMEOUT"] or connection.in_atomic_block:
+            return handler(request, *args, **kwargs)
+
+        response_cache = get_response_cache()
+        versions = get_versions(self.cache_models)
+        key = self.get_cache_key(request, versions)
+        data = response_cache.get(key)
+        if data is not MISSING:
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and not replica_may_lag(versions.values()):
+            response_cache.set(key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
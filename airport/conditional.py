@@ -0,0 +1,55 @@
+import hashlib
+import time
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from airport.cache import get_versions
+from airport.db_router import replica_may_lag
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified for list and retrieve, derived from the version
+    stamps of `cache_models`, so an unchanged resource is answered with
+    304 Not Modified before any row is read or serialized.
+    """
+
+    cache_models = ()
+
+    def get_validators(self, request, versions: dict) -> tuple:
+        versions = sorted(versions.items())
+        raw = (
+            f"{self.basename}:{self.action}:{request.get_full_path()}:"
+            f"{request.user.pk}:{versions}"
+        )
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        last_modified = max(version for _, version in versions) // 10**9
+        if last_modified >= time.time_ns() // 10**9:
+            # Last-Modified has whole seconds, a write later in this second
+            # would keep it, so it is only sent once the second is over
+            last_modified = None
+        return etag, last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        versions = get_versions(self.cache_models)
+        if replica_may_lag(versions.values()):
+            # A replica may not have the latest write yet, nothing to vouch for
+            return handler(request, *args, **kwargs)
+        etag, last_modified = self.get_validators(request, versions)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200 or response.status_code == 304:
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
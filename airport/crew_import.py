@@ -0,0 +1,36 @@
+from django.db import transaction
+
+from airport.cache import bump_version
+from airport.models import Crew
+from airport.seeding import chunked
+
+
+def import_crew(members, batch_size: int = 1000) -> dict:
+    """
+    Insert (first_name, last_name) pairs with one INSERT per batch.
+
+    Members already on the roster, or repeated in the input, are skipped by
+    the database through the unique_crew_full_name constraint. Existing
+    members are counted among the pairs of each batch before its insert.
+    """
+    names = list(dict.fromkeys(members))
+    existing = 0
+    with transaction.atomic():
+        for batch in chunked(names, batch_size):
+            stored = Crew.objects.filter(
+                first_name__in={first for first, _ in batch},
+                last_name__in={last for _, last in batch},
+            ).values_list("first_name", "last_name")
+            existing += len(set(batch).intersection(stored))
+            Crew.objects.bulk_create(
+                (Crew(first_name=first, last_name=last) for first, last in batch),
+                ignore_conflicts=True,
+            )
+        created = len(names) - existing
+        if created:
+            bump_version(Crew)
+    return {
+        "received": len(names),
+        "created": created,
+        "existing": existing,
+    }
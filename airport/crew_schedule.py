@@ -0,0 +1,66 @@
+from django.db.models import OuterRef, Q, Subquery
+
+from airport.models import Crew, CrewAssignment, Flight
+
+REFRESH_CHUNK_SIZE = 500
+
+# PostgreSQL exclusion constraint added by migration 0012
+CREW_OVERLAP_CONSTRAINT = "crew_assignment_no_overlap"
+
+
+def refresh_crew_assignments(flight_ids) -> int:
+    """Rebuild the crew assignments of the given flights, return rows written"""
+    flight_ids = list(flight_ids)
+    written = 0
+    for first in range(0, len(flight_ids), REFRESH_CHUNK_SIZE):
+        chunk = flight_ids[first:first + REFRESH_CHUNK_SIZE]
+        CrewAssignment.objects.filter(flight_id__in=chunk).delete()
+        links = Flight.crew.through.objects.filter(flight_id__in=chunk).values_list(
+            "crew_id", "flight_id", "flight__departure_time", "flight__arrival_time"
+        )
+        assignments = CrewAssignment.objects.bulk_create(
+            CrewAssignment(
+                crew_id=crew_id,
+                flight_id=flight_id,
+                departure_time=departure_time,
+                arrival_time=arrival_time,
+            )
+            for crew_id, flight_id, departure_time, arrival_time in links
+        )
+        written += len(assignments)
+    return written
+
+
+def previous_arrival(end, exclude_flight=None) -> Subquery:
+    """
+    Arrival of the crew member's last flight departing before `end`.
+
+    As assignments never overlap, the crew member is busy at some point
+    before `end` exactly when this arrival is later than the start of the
+    interval, so one seek on the (crew, departure_time) index answers it.
+    """
+    assignments = CrewAssignment.objects.filter(
+        crew=OuterRef("pk"), departure_time__lt=end
+    )
+    if exclude_flight is not None:
+        assignments = assignments.exclude(flight=exclude_flight)
+    return Subquery(
+        assignments.order_by("-departure_time").values("arrival_time")[:1]
+    )
+
+
+def available_crew(start, end, exclude_flight=None):
+    """Crew members without a flight between start and end"""
+    return Crew.objects.annotate(
+        previous_arrival=previous_arrival(end, exclude_flight)
+    ).filter(Q(previous_arrival__isnull=True) | Q(previous_arrival__lte=start))
+
+
+def busy_crew(crew, start, end, exclude_flight=None) -> list:
+    """Those of the crew members who are on another flight between start and end"""
+    return list(
+        Crew.objects.filter(pk__in=[member.pk for member in crew])
+        .annotate(previous_arrival=previous_arrival(end, exclude_flight))
+        .filter(previous_arrival__gt=start)
+        .order_by("pk")
+    )
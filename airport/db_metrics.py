@@ -0,0 +1,176 @@
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connection, connections
+
+
+class ConnectionMetrics:
+    """
+    Per-process counters of database connection use: how many requests
+    found a persistent connection to reuse, how many had to open one and
+    how long opening took.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.reused = 0
+            self.opened = 0
+            self.connect_ms_total = 0.0
+            self.connect_ms_max = 0.0
+
+    def record(self, connect_ms) -> None:
+        """connect_ms is None when the request reused an open connection"""
+        with self._lock:
+            self.requests += 1
+            if connect_ms is None:
+                self.reused += 1
+                return
+            self.opened += 1
+            self.connect_ms_total += connect_ms
+            self.connect_ms_max = max(self.connect_ms_max, connect_ms)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "reused": self.reused,
+                "opened": self.opened,
+                "reuse_ratio": (
+                    round(self.reused / self.requests, 3) if self.requests else None
+                ),
+                "connect_ms_mean": (
+                    round(self.connect_ms_total / self.opened, 3)
+                    if self.opened
+                    else None
+                ),
+                "connect_ms_max": round(self.connect_ms_max, 3),
+            }
+
+
+metrics = ConnectionMetrics()
+
+
+class DatabaseUse:
+    """Connections one request opened and queries it ran, on any alias"""
+
+    def __init__(self):
+        self.queries = 0
+        self.opened = 0
+        self.connect_ms = 0.0
+
+
+_current_use = ContextVar("airport_database_use", default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    use = _current_use.get()
+    if use is not None:
+        use.queries += 1
+    return execute(sql, params, many, context)
+
+
+def instrument(db_connection) -> None:
+    """
+    Wrap the backend's connect() to time connections as they actually open,
+    and count queries, once per connection object.
+    """
+    if getattr(db_connection, "_airport_metrics", False):
+        return
+    connect = db_connection.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        connect()
+        use = _current_use.get()
+        if use is not None:
+            use.opened += 1
+            use.connect_ms += (time.perf_counter() - started) * 1000
+
+    db_connection.connect = timed_connect
+    db_connection.execute_wrappers.append(_count_query)
+    db_connection._airport_metrics = True
+
+
+def instrument_connections() -> None:
+    for alias in connections:
+        instrument(connections[alias])
+
+
+def database_activity() -> dict:
+    """Server connections to this database by state, PostgreSQL only"""
+    if connection.vendor != "postgresql":
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity "
+            "WHERE datname = current_database() GROUP BY 1"
+        )
+        return dict(cursor.fetchall())
+
+
+def server_timing(connect_ms) -> str:
+    if connect_ms is None:
+        return 'db-connect;desc="reused";dur=0'
+    return f'db-connect;desc="opened";dur={connect_ms:.3f}'
+
+
+def report(use: DatabaseUse, response):
+    """
+    Record and report the request's database use; requests that opened no
+    connection and ran no query (static files, 304s, cache hits) are left out.
+    """
+    if use.opened:
+        connect_ms = use.connect_ms
+    elif use.queries:
+        connect_ms = None
+    else:
+        return response
+    metrics.record(connect_ms)
+    response["Server-Timing"] = server_timing(connect_ms)
+    return response
+
+
+class DatabaseMetricsMiddleware:
+    """
+    Times database connections as queries open them, counts requests served
+    over an already open persistent connection and reports both in a
+    Server-Timing header.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        instrument_connections()
+        use = DatabaseUse()
+        token = _current_use.set(use)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_use.reset(token)
+        return report(use, response)
+
+    async def __acall__(self, request):
+        # the ORM runs in the thread sensitive executor, wrap its connections
+        await sync_to_async(instrument_connections)()
+        use = DatabaseUse()
+        token = _current_use.set(use)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_use.reset(token)
+        return report(use, response)
@@ -0,0 +1,100 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+
+_replica_reads = ContextVar("airport_replica_reads", default=False)
+
+
+def replica_aliases() -> list:
+    return settings.DATABASE_REPLICAS
+
+
+def _pin_store():
+    # Must be shared by all workers, the next request may hit another one
+    return caches[settings.REPLICA_PIN_ALIAS]
+
+
+def _pin_key(user_id) -> str:
+    return f"airport:replica-pin:{user_id}"
+
+
+def pin_to_primary(user) -> None:
+    """Serve the user's reads from the primary until replicas caught up"""
+    _pin_store().set(_pin_key(user.pk), True, settings.REPLICA_LAG_SECONDS)
+
+
+def is_pinned(user) -> bool:
+    return user.is_authenticated and _pin_store().get(_pin_key(user.pk)) is not None
+
+
+def replica_may_lag(versions) -> bool:
+    """
+    Whether a response read from a replica may miss the last of the writes
+    stamped with these versions, such responses must not be cached.
+    """
+    if not _replica_reads.get() or not replica_aliases():
+        return False
+    return time.time_ns() - max(versions) < settings.REPLICA_LAG_SECONDS * 10**9
+
+
+class ReplicaRouter:
+    """
+    Reads of requests marked by ReplicaReadMixin go to a random replica
+    from DATABASE_REPLICAS, everything else to the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if replicas and _replica_reads.get():
+            return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica are saved to the primary as well
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive their schema through replication
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Serve the safe-method requests of a view from the read replicas.
+
+    A user who has just written is pinned to the primary for
+    REPLICA_LAG_SECONDS, so their next reads see their own writes.
+    """
+
+    _replica_reads_before = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_pinned(request.user):
+            self._replica_reads_before = _replica_reads.get()
+            _replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self._replica_reads_before is not None:
+            _replica_reads.set(self._replica_reads_before)
+            self._replica_reads_before = None
+        elif (
+            replica_aliases()
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,82 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+
+from airport.models import Ticket
+
+EXPORT_FIELDS = {
+    "order_id": "order_id",
+    "order_created_at": "order__created_at",
+    "user_email": "order__user__email",
+    "ticket_id": "id",
+    "flight_id": "flight_id",
+    "departure_time": "flight__departure_time",
+    "arrival_time": "flight__arrival_time",
+    "source": "flight__route__source__airport_code",
+    "destination": "flight__route__destination__airport_code",
+    "row": "row",
+    "seat": "seat",
+}
+
+
+def export_rows(queryset=None, chunk_size: int = 2000):
+    """
+    One tuple per ticket in EXPORT_FIELDS order, read through a server-side
+    cursor, or in keyset batches where those are disabled, so memory use
+    does not grow with the export size.
+    """
+    if queryset is None:
+        queryset = Ticket.objects.all()
+    queryset = queryset.order_by("order_id", "id")
+    if connections[queryset.db].settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"):
+        return keyset_rows(queryset, chunk_size)
+    return queryset.values_list(*EXPORT_FIELDS.values()).iterator(
+        chunk_size=chunk_size
+    )
+
+
+def keyset_rows(queryset, chunk_size: int):
+    """
+    export_rows() without a server-side cursor, for PgBouncer transaction
+    pooling: every chunk is its own query continuing after the last
+    (order_id, id) seen.
+    """
+    fields = ["order_id", "id", *EXPORT_FIELDS.values()]
+    after = Q()
+    while True:
+        chunk = list(queryset.filter(after).values_list(*fields)[:chunk_size])
+        for row in chunk:
+            yield row[2:]
+        if len(chunk) < chunk_size:
+            return
+        order_id, ticket_id = chunk[-1][:2]
+        after = Q(order_id__gt=order_id) | Q(order_id=order_id, id__gt=ticket_id)
+
+
+class Echo:
+    """File-like object whose write() hands the line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def to_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS.keys())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def to_jsonl(rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(EXPORT_FIELDS, row))) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", to_csv),
+    "jsonl": ("application/x-ndjson", to_jsonl),
+}
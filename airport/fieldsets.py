@@ -0,0 +1,181 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def field_tree(value: str) -> dict:
+    """Comma-separated dotted paths as a tree, "route.source,id" -> {...}"""
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split("."))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class Fieldset:
+    """
+    Requested shape of a response. `fields` is the tree of fields to keep,
+    None or an empty subtree keeping every field below it; `expand` is the
+    tree of relations to serialize in full instead of as ids or names.
+    """
+
+    def __init__(self, fields: dict = None, expand: dict = None):
+        self.fields = fields or None
+        self.expand = expand or {}
+
+    @classmethod
+    def from_request(cls, request) -> "Fieldset":
+        params = request.query_params
+        return cls(
+            field_tree(params.get(FIELDS_PARAM, "")),
+            field_tree(params.get(EXPAND_PARAM, "")),
+        )
+
+    def includes(self, path: str) -> bool:
+        node = self.fields
+        for name in path.split("."):
+            if not node:
+                return True
+            if name not in node:
+                return False
+            node = node[name]
+        return True
+
+    def expands(self, path: str) -> bool:
+        node = self.expand
+        for name in path.split("."):
+            if name not in node:
+                return False
+            node = node[name]
+        return True
+
+    def known(self, names) -> "Fieldset":
+        """The fieldset without requested fields other than names"""
+        if not self.fields:
+            return self
+        return Fieldset(
+            {name: node for name, node in self.fields.items() if name in names},
+            self.expand,
+        )
+
+    def child(self, name: str) -> "Fieldset":
+        return Fieldset(
+            self.fields.get(name) if self.fields else None, self.expand.get(name)
+        )
+
+
+def field_names(serializer_class) -> set:
+    """Names a fieldset can select from the serializer's output"""
+    meta = getattr(serializer_class, "Meta", None)
+    names = getattr(meta, "fields", None) or serializer_class._declared_fields
+    return {*names, *getattr(serializer_class, "extra_fields", ())}
+
+
+def request_fieldset(request, serializer_class=None) -> Fieldset:
+    """
+    Fieldset of a GET request, writes always get the full shape. Given the
+    serializer class, names it does not know are dropped as the serializer
+    itself would.
+    """
+    if request.method not in SAFE_METHODS:
+        return Fieldset()
+    fieldset = Fieldset.from_request(request)
+    if serializer_class is None:
+        return fieldset
+    return fieldset.known(field_names(serializer_class))
+
+
+def nested_models(*serializer_classes) -> tuple:
+    """
+    Models whose rows can appear in the responses of the serializers, in
+    nested, related or expanded fields. Used as `cache_models`, so that
+    validators change when any of them is written.
+    """
+    models = []
+    pending = [serializer_class() for serializer_class in serializer_classes]
+    seen = set()
+    while pending:
+        serializer = pending.pop()
+        if isinstance(serializer, ListSerializer):
+            serializer = serializer.child
+        if type(serializer) in seen:
+            continue
+        seen.add(type(serializer))
+        model = getattr(getattr(serializer, "Meta", None), "model", None)
+        if model is not None and model not in models:
+            models.append(model)
+        fields = list(serializer.fields.values())
+        fields += [expanded() for expanded in serializer.expandable_fields.values()]
+        for field in fields:
+            if isinstance(field, ManyRelatedField):
+                field = field.child_relation
+            if isinstance(field, BaseSerializer):
+                pending.append(field)
+            elif isinstance(field, RelatedField) and model is not None:
+                related = model._meta.get_field(field.source.split(".")[0])
+                if related.related_model not in models:
+                    models.append(related.related_model)
+    return tuple(models)
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets (?fields=id,route.distance) and expansion
+    (?expand=route.source) for serializers of GET responses.
+
+    `expandable_fields` maps a field name to a callable returning the
+    serializer that replaces the field when it is expanded, `extra_fields`
+    names the keys to_representation() adds on top of the fields. Nested
+    serializers get the part of the request under their field name.
+    Unknown names are ignored, so a request naming none of the fields
+    gets all of them, and input is never reshaped.
+    """
+
+    expandable_fields = {}
+    extra_fields = ()
+
+    _fieldset = None
+
+    @property
+    def fieldset(self):
+        if self._fieldset is not None:
+            return self._fieldset
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        request = self.context.get("request")
+        if (
+            parent is None
+            and request is not None
+            and not hasattr(self.root, "initial_data")
+        ):
+            self._fieldset = request_fieldset(request)
+        return self._fieldset
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.fieldset
+        if fieldset is None:
+            return fields
+        fieldset = self._fieldset = fieldset.known({*fields, *self.extra_fields})
+        for name, expanded in self.expandable_fields.items():
+            if name in fields and fieldset.expands(name):
+                fields[name] = expanded()
+        for name, field in fields.items():
+            nested = field.child if isinstance(field, ListSerializer) else field
+            if isinstance(nested, DynamicFieldsMixin):
+                nested._fieldset = fieldset.child(name)
+        return fields
+
+    @property
+    def _readable_fields(self):
+        # get_fields() drops the unknown names from the fieldset first
+        self.fields
+        fieldset = self.fieldset
+        for field in super()._readable_fields:
+            if fieldset is None or fieldset.includes(field.field_name):
+                yield field
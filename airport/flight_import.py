@@ -0,0 +1,293 @@
+import codecs
+import csv
+import json
+import re
+from bisect import bisect_left, insort
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from airport.board import refresh_board
+from airport.cache import bump_version
+from airport.crew_schedule import CREW_OVERLAP_CONSTRAINT, refresh_crew_assignments
+from airport.forms import validate_crew
+from airport.models import Airplane, Crew, CrewAssignment, Flight, Route
+from airport.seeding import chunked
+
+IMPORT_FIELDS = ("route", "airplane", "departure_time", "arrival_time", "crew")
+IMPORT_ENCODING = "utf-8-sig"
+
+
+def read_csv(lines):
+    """Rows of a CSV file with IMPORT_FIELDS columns, crew ids separated by ;"""
+    for row in csv.DictReader(lines):
+        crew = re.split(r"[;\s]+", row.get("crew") or "")
+        row["crew"] = [crew_id for crew_id in crew if crew_id]
+        yield row
+
+
+def read_jsonl(lines):
+    """Rows of a JSON Lines file, one object with IMPORT_FIELDS per line"""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+IMPORT_FORMATS = {
+    "csv": read_csv,
+    "jsonl": read_jsonl,
+}
+
+
+def import_format(name: str):
+    """Format of an import file by its extension, None if not supported"""
+    extension = name.rsplit(".", 1)[-1].lower()
+    return extension if extension in IMPORT_FORMATS else None
+
+
+def undecodable_offset(chunks):
+    """
+    Offset of the first byte of the file that is not IMPORT_ENCODING, None
+    when the whole file decodes. Run before importing, as rows are decoded
+    lazily and batches before a bad byte would already be committed.
+    """
+    decoder = codecs.getincrementaldecoder(IMPORT_ENCODING)()
+    offset, chunk = 0, b""
+    try:
+        for chunk in chunks:
+            decoder.decode(chunk)
+            offset += len(chunk)
+        chunk = b""
+        decoder.decode(chunk, final=True)
+    except UnicodeDecodeError as error:
+        # The decoder prepends bytes of a character split across chunks
+        return offset - (len(error.object) - len(chunk)) + error.start
+    return None
+
+
+class FlightImportError(Exception):
+    def __init__(self, errors: dict):
+        self.errors = errors
+
+
+def as_id(value, field: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise FlightImportError({field: [f"{value!r} is not a valid id"]})
+
+
+class FlightImporter:
+    """
+    Create flights from import rows in batches of `batch_size`.
+
+    Every batch costs a fixed number of queries: one lookup each for its
+    routes, airplanes and crew members, one for the crew's assignments in
+    the batch's time window, then bulk inserts of the flights and their
+    crew links. Rows that fail validation are reported with their 1-based
+    position and skipped, the rest of the batch is still imported.
+    """
+
+    datetime_field = serializers.DateTimeField()
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+
+    def run(self, rows) -> dict:
+        report = {"created": 0, "errors": []}
+        for first, batch in enumerate(chunked(rows, self.batch_size)):
+            created, errors = self.import_batch(batch, first * self.batch_size + 1)
+            report["created"] += created
+            report["errors"].extend(errors)
+        return report
+
+    def parse_row(self, row: dict) -> dict:
+        if not isinstance(row, dict) or not isinstance(row.get("crew", []), list):
+            raise FlightImportError({"non_field_errors": ["Not a flight object"]})
+        missing = [field for field in IMPORT_FIELDS if row.get(field) in (None, "")]
+        if missing:
+            raise FlightImportError(
+                {field: ["This field is required."] for field in missing}
+            )
+        parsed = {
+            "route": as_id(row["route"], "route"),
+            "airplane": as_id(row["airplane"], "airplane"),
+            "crew": sorted({as_id(crew_id, "crew") for crew_id in row["crew"]}),
+        }
+        for field in ("departure_time", "arrival_time"):
+            try:
+                parsed[field] = self.datetime_field.to_internal_value(row[field])
+            except serializers.ValidationError as error:
+                raise FlightImportError({field: error.detail})
+        if parsed["arrival_time"] <= parsed["departure_time"]:
+            raise FlightImportError(
+                {"arrival_time": ["Arrival must be later than departure"]}
+            )
+        try:
+            validate_crew(len(parsed["crew"]))
+        except ValidationError as error:
+            raise FlightImportError({"crew": error.messages})
+        return parsed
+
+    def schedules(self, flights: list) -> dict:
+        """Sorted (departure, arrival) of every crew member in the batch window"""
+        crew_ids = {crew_id for flight in flights for crew_id in flight["crew"]}
+        schedules = {crew_id: [] for crew_id in crew_ids}
+        if not flights:
+            return schedules
+        assignments = CrewAssignment.objects.filter(
+            crew_id__in=crew_ids,
+            departure_time__lt=max(flight["arrival_time"] for flight in flights),
+            arrival_time__gt=min(flight["departure_time"] for flight in flights),
+        ).values_list("crew_id", "departure_time", "arrival_time")
+        for crew_id, departure_time, arrival_time in assignments:
+            insort(schedules[crew_id], (departure_time, arrival_time))
+        return schedules
+
+    @staticmethod
+    def is_busy(schedule: list, departure_time, arrival_time) -> bool:
+        index = bisect_left(schedule, (departure_time, arrival_time))
+        if index > 0 and schedule[index - 1][1] > departure_time:
+            return True
+        return index < len(schedule) and schedule[index][0] < arrival_time
+
+    def import_batch(self, batch: list, first_row: int) -> tuple:
+        errors, parsed = [], []
+        for number, row in enumerate(batch, start=first_row):
+            try:
+                parsed.append((number, self.parse_row(row)))
+            except FlightImportError as error:
+                errors.append({"row": number, "errors": error.errors})
+
+        routes = set(
+            Route.objects.filter(
+                pk__in={flight["route"] for _, flight in parsed}
+            ).values_list("pk", flat=True)
+        )
+        airplanes = set(
+            Airplane.objects.filter(
+                pk__in={flight["airplane"] for _, flight in parsed}
+            ).values_list("pk", flat=True)
+        )
+        crew = set(
+            Crew.objects.filter(
+                pk__in={crew_id for _, flight in parsed for crew_id in flight["crew"]}
+            ).values_list("pk", flat=True)
+        )
+        resolved = []
+        for number, flight in parsed:
+            row_errors = {}
+            if flight["route"] not in routes:
+                row_errors["route"] = [f"Route {flight['route']} does not exist"]
+            if flight["airplane"] not in airplanes:
+                row_errors["airplane"] = [
+                    f"Airplane {flight['airplane']} does not exist"
+                ]
+            unknown = [crew_id for crew_id in flight["crew"] if crew_id not in crew]
+            if unknown:
+                row_errors["crew"] = [
+                    f"Crew {crew_id} does not exist" for crew_id in unknown
+                ]
+            if row_errors:
+                errors.append({"row": number, "errors": row_errors})
+            else:
+                resolved.append((number, flight))
+
+        schedules = self.schedules([flight for _, flight in resolved])
+        accepted = []
+        for number, flight in resolved:
+            interval = (flight["departure_time"], flight["arrival_time"])
+            busy = [
+                crew_id
+                for crew_id in flight["crew"]
+                if self.is_busy(schedules[crew_id], *interval)
+            ]
+            if busy:
+                errors.append(
+                    {
+                        "row": number,
+                        "errors": {
+                            "crew": [
+                                f"Crew {crew_id} is on another flight at that time"
+                                for crew_id in busy
+                            ]
+                        },
+                    }
+                )
+                continue
+            for crew_id in flight["crew"]:
+                insort(schedules[crew_id], interval)
+            accepted.append((number, flight))
+
+        created = 0
+        if accepted:
+            created, write_errors = self.write(accepted)
+            errors.extend(write_errors)
+        errors.sort(key=lambda error: error["row"])
+        return created, errors
+
+    def write(self, accepted: list) -> tuple:
+        """
+        Store the accepted (row number, flight) pairs, return how many were
+        stored and the errors of the rows the database refused. Crew written
+        concurrently can still trip the overlap constraint, then every row
+        of the batch is retried in a savepoint of its own.
+        """
+        errors = []
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    flight_ids = self.insert([flight for _, flight in accepted])
+            except IntegrityError as error:
+                if CREW_OVERLAP_CONSTRAINT not in str(error):
+                    raise
+                flight_ids, errors = self.write_rows(accepted)
+            if flight_ids:
+                refresh_board(flight_ids)
+                bump_version(Flight)
+        return len(flight_ids), errors
+
+    def write_rows(self, accepted: list) -> tuple:
+        flight_ids, errors = [], []
+        for number, flight in accepted:
+            try:
+                with transaction.atomic():
+                    flight_ids.extend(self.insert([flight]))
+            except IntegrityError as error:
+                if CREW_OVERLAP_CONSTRAINT not in str(error):
+                    raise
+                errors.append(
+                    {
+                        "row": number,
+                        "errors": {
+                            "crew": ["A crew member is on another flight at that time"]
+                        },
+                    }
+                )
+        return flight_ids, errors
+
+    @staticmethod
+    def insert(flights: list) -> list:
+        """Bulk insert flights with their crew links and assignments, their ids"""
+        flight_objs = Flight.objects.bulk_create(
+            Flight(
+                route_id=flight["route"],
+                airplane_id=flight["airplane"],
+                departure_time=flight["departure_time"],
+                arrival_time=flight["arrival_time"],
+            )
+            for flight in flights
+        )
+        Flight.crew.through.objects.bulk_create(
+            Flight.crew.through(flight_id=flight_obj.pk, crew_id=crew_id)
+            for flight_obj, flight in zip(flight_objs, flights)
+            for crew_id in flight["crew"]
+        )
+        flight_ids = [flight_obj.pk for flight_obj in flight_objs]
+        refresh_crew_assignments(flight_ids)
+        return flight_ids
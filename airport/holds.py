@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from airport.booking import (
+    book_tickets,
+    check_capacity,
+    check_seats_free,
+    collect_seats,
+    lock_flights,
+    seats_filter,
+)
+from airport.models import HeldSeat, Order, SeatHold
+from airport.seat_map import invalidate_seat_maps
+
+# Expired holds deleted per transaction by the sweeper
+SWEEP_BATCH_SIZE = 1000
+
+
+def hold_seats(user, seats_data: list, error_to_raise) -> SeatHold:
+    """
+    Keep the seats for `user` for SEAT_HOLD_SECONDS.
+
+    The flights are locked like for an order, so holds and orders on the
+    same flight queue up instead of racing to the unique constraints.
+    Expired holds and the user's own earlier holds on the seats give way.
+    """
+    with transaction.atomic():
+        flights = lock_flights({seat["flight"].pk for seat in seats_data})
+        check_capacity(flights, seats_data, error_to_raise)
+        seats = collect_seats(seats_data, flights, error_to_raise)
+        check_seats_free(seats, user, error_to_raise)
+        HeldSeat.objects.filter(seats_filter(seats)).delete()
+        hold = SeatHold.objects.create(
+            user=user,
+            expires_at=timezone.now() + timedelta(seconds=settings.SEAT_HOLD_SECONDS),
+        )
+        HeldSeat.objects.bulk_create(
+            HeldSeat(hold=hold, flight_id=flight_id, row=row, seat=seat)
+            for flight_id, row, seat in seats
+        )
+        invalidate_seat_maps(flights.keys())
+    return hold
+
+
+def release_hold(hold: SeatHold) -> None:
+    with transaction.atomic():
+        flight_ids = set(hold.seats.values_list("flight_id", flat=True))
+        hold.delete()
+        invalidate_seat_maps(flight_ids)
+
+
+def confirm_hold(hold: SeatHold, error_to_raise) -> Order:
+    """Turn an unexpired hold into an order with a ticket for each held seat"""
+    with transaction.atomic():
+        locked = (
+            SeatHold.objects.select_for_update()
+            .filter(pk=hold.pk, expires_at__gt=timezone.now())
+            .first()
+        )
+        seats = list(locked.seats.select_related("flight")) if locked else []
+        if not seats:
+            raise error_to_raise({"hold": "This hold has expired"})
+        order = Order.objects.create(user=locked.user)
+        tickets_data = [
+            {"flight": seat.flight, "row": seat.row, "seat": seat.seat}
+            for seat in seats
+        ]
+        book_tickets(order, tickets_data, error_to_raise)
+        locked.delete()
+    return order
+
+
+def sweep_expired_holds(now=None) -> int:
+    """
+    Delete holds that expired by `now`, in batches so no transaction keeps
+    many rows locked. Expired holds no longer block their seats, this only
+    reclaims the rows and drops the cached seat maps showing them taken.
+    """
+    now = now or timezone.now()
+    swept = 0
+    while True:
+        with transaction.atomic():
+            expired = list(
+                SeatHold.objects.filter(expires_at__lte=now)
+                .order_by("expires_at")
+                .values_list("pk", flat=True)[:SWEEP_BATCH_SIZE]
+            )
+            if not expired:
+                return swept
+            flight_ids = set(
+                HeldSeat.objects.filter(hold_id__in=expired).values_list(
+                    "flight_id", flat=True
+                )
+            )
+            HeldSeat.objects.filter(hold_id__in=expired).delete()
+            SeatHold.objects.filter(pk__in=expired).delete()
+            invalidate_seat_maps(flight_ids)
+        swept += len(expired)
@@ -0,0 +1,82 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from airport.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def request_fingerprint(request) -> str:
+    raw = json.dumps(
+        [request.method, request.path, request.data], sort_keys=True, default=str
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class IdempotentCreateMixin:
+    """
+    Honour an Idempotency-Key header on create.
+
+    The key is claimed per user in the transaction that creates the object
+    and the successful response is stored with it for
+    IDEMPOTENCY_KEY_TTL_SECONDS, so a retry with the same key gets that
+    response back without creating anything again. A retry racing the
+    first request waits on the unique (user, key) constraint until the
+    first one commits. Failed requests store nothing and may be retried.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return super().create(request, *args, **kwargs)
+        if not 0 < len(key) <= IdempotencyKey._meta.get_field("key").max_length:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} must have 1 to 255 characters"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = request_fingerprint(request)
+        now = timezone.now()
+        IdempotencyKey.objects.filter(expires_at__lte=now).delete()
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    stored = IdempotencyKey.objects.create(
+                        user=request.user,
+                        key=key,
+                        fingerprint=fingerprint,
+                        expires_at=now
+                        + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+                    )
+            except IntegrityError:
+                return self.replay(
+                    IdempotencyKey.objects.get(user=request.user, key=key),
+                    fingerprint,
+                )
+
+            response = super().create(request, *args, **kwargs)
+            if not status.is_success(response.status_code):
+                transaction.set_rollback(True)
+                return response
+            stored.status_code = response.status_code
+            stored.response = response.data
+            stored.save(update_fields=["status_code", "response"])
+        return response
+
+    @staticmethod
+    def replay(stored: IdempotencyKey, fingerprint: str) -> Response:
+        if stored.fingerprint != fingerprint:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} was used for a different request"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        response = Response(stored.response, status=stored.status_code)
+        response["Idempotent-Replayed"] = "true"
+        return response
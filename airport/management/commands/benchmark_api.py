@@ -0,0 +1,65 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from airport.benchmark import BenchmarkRunner, build_report, get_endpoints
+from airport.seeding import DataGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a data set of the given volumes and report p50/p95 latency, "
+        "query count and peak memory of every GET endpoint as JSON. "
+        "Everything runs in one transaction that is rolled back, so caches "
+        "are bypassed and the report reflects the database path."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", type=int, default=20)
+        parser.add_argument("--airplanes", type=int, default=10)
+        parser.add_argument("--routes", type=int, default=50)
+        parser.add_argument("--flights", type=int, default=200)
+        parser.add_argument("--load-factor", type=float, default=0.2)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument(
+            "--output", help="Write the JSON report to this file instead of stdout"
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                "benchmark@airport-service.local",
+                is_staff=True,
+            )
+            generator = DataGenerator(
+                airports=options["airports"],
+                airplanes=options["airplanes"],
+                routes=options["routes"],
+                load_factor=options["load_factor"],
+            )
+            volumes = generator.generate(options["flights"], users=[user])
+            volumes.update(
+                airports=options["airports"],
+                airplanes=options["airplanes"],
+                routes=options["routes"],
+            )
+            runner = BenchmarkRunner(
+                user, iterations=options["iterations"], warmup=options["warmup"]
+            )
+            results = runner.run(get_endpoints())
+            transaction.set_rollback(True)
+
+        report = json.dumps(
+            build_report(volumes, options["iterations"], results),
+            indent=2,
+            sort_keys=True,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(report + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(report)
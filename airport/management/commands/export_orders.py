@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from airport.export import EXPORT_FORMATS, export_rows
+
+
+class Command(BaseCommand):
+    help = "Stream every ticket with its order as CSV or JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", choices=sorted(EXPORT_FORMATS), default="jsonl"
+        )
+        parser.add_argument("--file", help="Write to this file instead of stdout")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        _, render = EXPORT_FORMATS[options["output"]]
+        lines = render(export_rows(chunk_size=options["chunk_size"]))
+        if options["file"]:
+            with open(options["file"], "w", newline="") as export_file:
+                export_file.writelines(lines)
+        else:
+            self.stdout.ending = ""
+            for line in lines:
+                self.stdout.write(line)
@@ -0,0 +1,41 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.crew_import import import_crew
+from airport.serializers import CrewImportSerializer
+
+
+class Command(BaseCommand):
+    help = "Add crew members from a CSV file with first_name and last_name columns"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with open(options["file"], newline="") as crew_file:
+            serializer = CrewImportSerializer(
+                data=list(csv.DictReader(crew_file)), many=True
+            )
+            if not serializer.is_valid():
+                errors = [
+                    f"line {line}: {row_errors}"
+                    for line, row_errors in enumerate(serializer.errors, start=2)
+                    if row_errors
+                ]
+                raise CommandError("\n".join(errors))
+
+        result = import_crew(
+            (
+                (member["first_name"], member["last_name"])
+                for member in serializer.validated_data
+            ),
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Added {created} of {received} crew members, "
+                "{existing} already existed".format(**result)
+            )
+        )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.flight_import import (
+    IMPORT_ENCODING,
+    IMPORT_FORMATS,
+    FlightImporter,
+    import_format,
+    undecodable_offset,
+)
+
+
+class Command(BaseCommand):
+    help = "Create flights from a CSV or JSON Lines schedule file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file")
+        parser.add_argument(
+            "--format",
+            choices=sorted(IMPORT_FORMATS),
+            help="Taken from the file extension by default",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        file_format = options["format"] or import_format(options["file"])
+        if file_format is None:
+            raise CommandError("Cannot tell the file format, pass --format")
+
+        with open(options["file"], "rb") as schedule:
+            offset = undecodable_offset(iter(lambda: schedule.read(64 * 1024), b""))
+        if offset is not None:
+            raise CommandError(f"Byte {offset} of the file is not UTF-8")
+
+        importer = FlightImporter(batch_size=options["batch_size"])
+        with open(options["file"], newline="", encoding=IMPORT_ENCODING) as schedule:
+            report = importer.run(IMPORT_FORMATS[file_format](schedule))
+
+        for error in report["errors"]:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {report['created']} flights, "
+                f"skipped {len(report['errors'])} rows"
+            )
+        )
@@ -0,0 +1,57 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.benchmark import LoadTest, get_load_test_paths
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the flight and route search read endpoints of a running "
+        "server, each through its WSGI viewset and its async view, and "
+        "report requests/sec and latency percentiles as JSON. Run it against "
+        "the same database as the server, the server's throttle rates must "
+        "allow the request volume (API_THROTTLE_USER)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://localhost:8000")
+        parser.add_argument(
+            "--email", required=True, help="Existing user the requests run as"
+        )
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument(
+            "--output", help="Write the JSON report to this file instead of stdout"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["email"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+        paths = get_load_test_paths()
+        if not paths:
+            raise CommandError("No flights to load-test, run seed_airport_data")
+
+        load_test = LoadTest(
+            options["base_url"],
+            str(AccessToken.for_user(user)),
+            concurrency=options["concurrency"],
+            requests=options["requests"],
+        )
+        report = json.dumps(
+            {"base_url": options["base_url"], "endpoints": load_test.run(paths)},
+            indent=2,
+            sort_keys=True,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(report + "\n")
+            self.stdout.write(
+                self.style.SUCCESS(f"Report written to {options['output']}")
+            )
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from airport.schedules import materialise_horizon
+
+
+class Command(BaseCommand):
+    help = (
+        "Store the instances of recurring schedules departing in the coming days, "
+        "once or every --interval seconds"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.FLIGHT_SCHEDULE_HORIZON_DAYS,
+            help="Length of the horizon in days, from the start of today",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep storing with this many seconds between runs, 0 stores once",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            created = materialise_horizon(days=options["days"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Stored {created} scheduled flights")
+            )
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from airport.board import rebuild_board
+
+
+class Command(BaseCommand):
+    help = "Rebuild the departure/arrival board table from flights"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            written = rebuild_board()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} board entries"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from airport.booking import reconcile_seats_sold
+
+
+class Command(BaseCommand):
+    help = "Recount the seats sold of every flight from its tickets"
+
+    def handle(self, *args, **options):
+        corrected = reconcile_seats_sold()
+        self.stdout.write(
+            self.style.SUCCESS(f"Corrected seats sold of {corrected} flights")
+        )
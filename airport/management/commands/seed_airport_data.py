@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from airport.seeding import DataGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate airports, routes, airplanes, crew and users once, then "
+        "stream the given number of flights with their orders and tickets "
+        "into the database in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("flights", type=int, help="Number of flights to generate")
+        parser.add_argument("--airports", type=int, default=50)
+        parser.add_argument("--airplanes", type=int, default=20)
+        parser.add_argument("--routes", type=int, default=200)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument(
+            "--load-factor",
+            type=float,
+            default=0.5,
+            help="Share of the seats of every flight that gets sold",
+        )
+        parser.add_argument(
+            "--interval-minutes",
+            type=int,
+            default=10,
+            help="Minutes between two consecutive departures",
+        )
+        parser.add_argument(
+            "--start",
+            help="Departure date of the first flight (YYYY-MM-DD), today by default",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Flights written per transaction, bounds memory use",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        start = None
+        if options["start"]:
+            start = timezone.make_aware(
+                datetime.strptime(options["start"], "%Y-%m-%d")
+            )
+        try:
+            generator = DataGenerator(
+                airports=options["airports"],
+                airplanes=options["airplanes"],
+                routes=options["routes"],
+                users=options["users"],
+                load_factor=options["load_factor"],
+                interval=timedelta(minutes=options["interval_minutes"]),
+                batch_size=options["batch_size"],
+                seed=options["seed"],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+        def log(counts):
+            self.stdout.write(
+                f"{counts['flights']} flights, {counts['orders']} orders, "
+                f"{counts['tickets']} tickets"
+            )
+
+        counts = generator.generate(options["flights"], start=start, log=log)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {counts['flights']} flights, {counts['orders']} orders "
+                f"and {counts['tickets']} tickets"
+            )
+        )
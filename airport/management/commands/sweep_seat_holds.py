@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from airport.holds import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Delete expired seat holds, once or every --interval seconds"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep sweeping with this many seconds between runs, 0 sweeps once",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            swept = sweep_expired_holds()
+            self.stdout.write(self.style.SUCCESS(f"Swept {swept} expired seat holds"))
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,117 @@
+# Generated by Django 4.2 on 2026-10-18 17:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+CHUNK_SIZE = 1000
+
+
+def populate_board(apps, schema_editor):
+    Flight = apps.get_model("airport", "Flight")
+    BoardEntry = apps.get_model("airport", "BoardEntry")
+    flights = (
+        Flight.objects.select_related("route__source", "route__destination", "airplane")
+        .annotate(ticket_count=models.Count("tickets"))
+        .order_by("pk")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    entries = []
+    for flight in flights:
+        capacity = flight.airplane.rows * flight.airplane.seats_in_row
+        available = capacity - flight.ticket_count
+        for direction, airport, other in [
+            ("departure", flight.route.source, flight.route.destination),
+            ("arrival", flight.route.destination, flight.route.source),
+        ]:
+            entries.append(
+                BoardEntry(
+                    airport=airport,
+                    direction=direction,
+                    scheduled_time=(
+                        flight.departure_time
+                        if direction == "departure"
+                        else flight.arrival_time
+                    ),
+                    flight=flight,
+                    airport_code=other.airport_code,
+                    city=other.closest_big_city,
+                    departure_time=flight.departure_time,
+                    arrival_time=flight.arrival_time,
+                    capacity=capacity,
+                    tickets_available=available,
+                )
+            )
+        if len(entries) >= CHUNK_SIZE:
+            BoardEntry.objects.bulk_create(entries)
+            entries = []
+    BoardEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0008_order_airport_ord_user_id_7bd9fb_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BoardEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "direction",
+                    models.CharField(
+                        choices=[("departure", "Departure"), ("arrival", "Arrival")],
+                        max_length=9,
+                    ),
+                ),
+                ("scheduled_time", models.DateTimeField()),
+                ("airport_code", models.CharField(max_length=10)),
+                ("city", models.CharField(max_length=100)),
+                ("departure_time", models.DateTimeField()),
+                ("arrival_time", models.DateTimeField()),
+                ("capacity", models.IntegerField()),
+                ("tickets_available", models.IntegerField()),
+                (
+                    "airport",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="board_entries",
+                        to="airport.airport",
+                    ),
+                ),
+                (
+                    "flight",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="board_entries",
+                        to="airport.flight",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["scheduled_time", "flight"],
+                "indexes": [
+                    models.Index(
+                        fields=["airport", "direction", "scheduled_time"],
+                        name="airport_boa_airport_ede439_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="boardentry",
+            constraint=models.UniqueConstraint(
+                fields=("flight", "direction"), name="unique_board_entry"
+            ),
+        ),
+        migrations.RunPython(populate_board, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0010_flight_airport_fli_route_i_baa295_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="crew",
+            name="first_name",
+            field=models.CharField(max_length=30),
+        ),
+        migrations.AlterField(
+            model_name="crew",
+            name="last_name",
+            field=models.CharField(max_length=30),
+        ),
+        migrations.AddConstraint(
+            model_name="crew",
+            constraint=models.UniqueConstraint(
+                fields=("first_name", "last_name"), name="unique_crew_full_name"
+            ),
+        ),
+    ]
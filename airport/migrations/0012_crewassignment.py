@@ -0,0 +1,135 @@
+# Generated by Django 4.2 on 2026-10-18 19:40
+
+from itertools import islice
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+CHUNK_SIZE = 1000
+
+
+def populate_assignments(apps, schema_editor):
+    Flight = apps.get_model("airport", "Flight")
+    CrewAssignment = apps.get_model("airport", "CrewAssignment")
+    links = Flight.crew.through.objects.values_list(
+        "crew_id", "flight_id", "flight__departure_time", "flight__arrival_time"
+    ).iterator(chunk_size=CHUNK_SIZE)
+    # bulk_create() turns its argument into a list, so feed it fixed chunks
+    while chunk := list(islice(links, CHUNK_SIZE)):
+        CrewAssignment.objects.bulk_create(
+            CrewAssignment(
+                crew_id=crew_id,
+                flight_id=flight_id,
+                departure_time=departure_time,
+                arrival_time=arrival_time,
+            )
+            for crew_id, flight_id, departure_time, arrival_time in chunk
+        )
+
+
+OVERLAPS_SQL = """
+    SELECT a.crew_id, a.flight_id, b.flight_id
+    FROM airport_crewassignment a
+    JOIN airport_crewassignment b
+        ON b.crew_id = a.crew_id
+        AND b.id > a.id
+        AND tstzrange(b.departure_time, b.arrival_time)
+            && tstzrange(a.departure_time, a.arrival_time)
+    ORDER BY a.crew_id, a.flight_id, b.flight_id
+    LIMIT 20
+"""
+
+
+def add_no_overlap_constraint(apps, schema_editor):
+    # Range types and GiST exclusion constraints are PostgreSQL only
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(OVERLAPS_SQL)
+        overlaps = cursor.fetchall()
+    if overlaps:
+        # Which of two overlapping flights keeps the crew member is for
+        # a person to decide, the constraint cannot be added before
+        raise RuntimeError(
+            "Crew members are assigned to overlapping flights, remove them "
+            "from one flight of each pair and migrate again:\n"
+            + "\n".join(
+                f"crew {crew_id}: flights {first_id} and {second_id}"
+                for crew_id, first_id, second_id in overlaps
+            )
+        )
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        "ALTER TABLE airport_crewassignment "
+        "ADD CONSTRAINT crew_assignment_no_overlap EXCLUDE USING gist "
+        "(crew_id WITH =, tstzrange(departure_time, arrival_time) WITH &&) "
+        "DEFERRABLE INITIALLY DEFERRED"
+    )
+
+
+def remove_no_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE airport_crewassignment "
+        "DROP CONSTRAINT IF EXISTS crew_assignment_no_overlap"
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0011_crew_unique_crew_full_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CrewAssignment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("departure_time", models.DateTimeField()),
+                ("arrival_time", models.DateTimeField()),
+                (
+                    "crew",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="assignments",
+                        to="airport.crew",
+                    ),
+                ),
+                (
+                    "flight",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="crew_assignments",
+                        to="airport.flight",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["departure_time"],
+                "indexes": [
+                    models.Index(
+                        fields=["crew", "departure_time"],
+                        name="airport_cre_crew_id_031e1d_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="crewassignment",
+            constraint=models.UniqueConstraint(
+                fields=("crew", "flight"), name="unique_crew_assignment"
+            ),
+        ),
+        migrations.RunPython(populate_assignments, migrations.RunPython.noop),
+        migrations.RunPython(add_no_overlap_constraint, remove_no_overlap_constraint),
+    ]
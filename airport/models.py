@@ -1,8 +1,11 @@
 import os
 import uuid
+from datetime import datetime, time, timedelta
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -12,6 +15,14 @@ def airplane_image_file_path(instance, filename):
     return os.path.join("uploads/airplanes//", filename)
 
 
+def local_day_range(date) -> tuple:
+    """Aware [start, end) bounds of a calendar day in the current time zone"""
+    return (
+        timezone.make_aware(datetime.combine(date, time.min)),
+        timezone.make_aware(datetime.combine(date + timedelta(days=1), time.min)),
+    )
+
+
 class Crew(models.Model):
     first_name = models.CharField(max_length=30)
     last_name = models.CharField(max_length=30)
@@ -23,14 +34,12 @@ class Crew(models.Model):
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
 
-    def save(self, *args, **kwargs):
-        if (
-                Crew.objects.exclude(pk=self.pk)
-                        .filter(first_name=self.first_name, last_name=self.last_name)
-                        .exists()
-        ):
-            raise ValidationError("Crew with this full name already exists.")
-        super().save(*args, **kwargs)
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["first_name", "last_name"], name="unique_crew_full_name"
+            )
+        ]
 
 
 class Airport(models.Model):
@@ -104,6 +113,117 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["user", "created_at"])]
+
+
+class FlightSchedule(models.Model):
+    """
+    A flight repeated on some weekdays at the same local time within a
+    validity window. Its instances become Flight rows only when they enter
+    the materialisation horizon or are booked, see airport.schedules.
+    """
+
+    route = models.ForeignKey(
+        Route, on_delete=models.CASCADE, related_name="schedules"
+    )
+    airplane = models.ForeignKey(
+        Airplane, on_delete=models.CASCADE, related_name="schedules"
+    )
+    # ISO weekdays the flight operates on, "135" for Monday, Wednesday, Friday
+    weekdays = models.CharField(max_length=7)
+    departure = models.TimeField()
+    duration = models.DurationField()
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+
+    def __str__(self):
+        return f"{self.route} | {self.weekdays} {self.departure}"
+
+    class Meta:
+        ordering = ["valid_from", "departure"]
+
+    @staticmethod
+    def validate_validity(valid_from, valid_until, error_to_raise):
+        if valid_until < valid_from:
+            raise error_to_raise(
+                {"valid_until": "The schedule cannot end before it starts"}
+            )
+
+    def clean(self):
+        FlightSchedule.validate_validity(
+            self.valid_from, self.valid_until, ValidationError
+        )
+
+    def occurrences(self, start, end):
+        """Aware departure times of the instances departing in [start, end)"""
+        first = max(self.valid_from, timezone.localdate(start))
+        last = min(self.valid_until, timezone.localdate(end))
+        day = first
+        while day <= last:
+            if str(day.isoweekday()) in self.weekdays:
+                departure_time = timezone.make_aware(
+                    datetime.combine(day, self.departure)
+                )
+                if start <= departure_time < end:
+                    yield departure_time
+            day += timedelta(days=1)
+
+    def instance(self, departure_time) -> "Flight":
+        """Unsaved flight departing at departure_time"""
+        return Flight(
+            route=self.route,
+            airplane=self.airplane,
+            schedule=self,
+            departure_time=departure_time,
+            arrival_time=departure_time + self.duration,
+        )
+
+
+class FlightQuerySet(models.QuerySet):
+    def with_tickets_available(self):
+        """Annotate each flight with the number of free seats from seats_sold"""
+        return self.annotate(
+            tickets_available=(
+                F("airplane__rows") * F("airplane__seats_in_row") - F("seats_sold")
+            )
+        )
+
+    def matching(
+        self,
+        departure=None,
+        arrival=None,
+        departure_after=None,
+        departure_before=None,
+        source=None,
+        destination=None,
+    ):
+        """Filter on time ranges so the departure_time indexes stay usable"""
+        queryset = self
+        if departure:
+            day_start, day_end = local_day_range(departure)
+            queryset = queryset.filter(
+                departure_time__gte=day_start, departure_time__lt=day_end
+            )
+
+        if arrival:
+            day_start, day_end = local_day_range(arrival)
+            queryset = queryset.filter(
+                arrival_time__gte=day_start, arrival_time__lt=day_end
+            )
+
+        if departure_after:
+            queryset = queryset.filter(departure_time__gte=departure_after)
+
+        if departure_before:
+            queryset = queryset.filter(departure_time__lt=departure_before)
+
+        if source:
+            queryset = queryset.filter(route__source_id__in=source)
+
+        if destination:
+            queryset = queryset.filter(route__destination_id__in=destination)
+
+        return queryset
 
 
 class Flight(models.Model):
@@ -112,9 +232,31 @@ class Flight(models.Model):
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crew = models.ManyToManyField(Crew, related_name="flights")
+    schedule = models.ForeignKey(
+        FlightSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="flights",
+    )
+    # Tickets of the flight, kept up to date by the booking transaction and
+    # the Ticket signals, recounted by the reconcile_seats_sold command
+    seats_sold = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = FlightQuerySet.as_manager()
+
+    _tickets_available = None
 
     class Meta:
-        indexes = [models.Index(fields=["departure_time", "arrival_time"])]
+        indexes = [
+            models.Index(fields=["departure_time", "arrival_time"]),
+            models.Index(fields=["route", "departure_time"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schedule", "departure_time"], name="unique_schedule_departure"
+            )
+        ]
 
     def __str__(self):
         departure_time = self.departure_time.strftime("%Y-%m-%d  %H:%M")
@@ -126,9 +268,29 @@ class Flight(models.Model):
             f"Return Time - {arrival_time}"
         )
 
+    def save(self, *args, update_fields=None, **kwargs):
+        # seats_sold only moves through F() updates, an instance loaded
+        # before a booking must not write its stale count back
+        if not self._state.adding and not kwargs.get("force_insert"):
+            if update_fields is None:
+                update_fields = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key
+                ]
+            update_fields = [name for name in update_fields if name != "seats_sold"]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
     @property
     def tickets_available(self):
-        return self.airplane.rows * self.airplane.seats_in_row - self.tickets.count()
+        if self._tickets_available is not None:
+            return self._tickets_available
+        return self.airplane.capacity - self.seats_sold
+
+    @tickets_available.setter
+    def tickets_available(self, value):
+        # Populated by FlightQuerySet.with_tickets_available()
+        self._tickets_available = value
 
 
 class Ticket(models.Model):
@@ -154,6 +316,13 @@ class Ticket(models.Model):
                     }
                 )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        ticket = super().from_db(db, field_names, values)
+        # The flight the row is stored on, the signals move seats_sold from it
+        ticket._stored_flight_id = ticket.__dict__.get("flight_id")
+        return ticket
+
     def clean(self) -> None:
         Ticket.validate_seats(
             self.row,
@@ -174,3 +343,138 @@ class Ticket(models.Model):
     class Meta:
         unique_together = ("flight", "row", "seat")
         ordering = ["row"]
+
+
+class SeatHold(models.Model):
+    """
+    Seats kept for one user until `expires_at`, so a slow checkout cannot
+    lose them to a concurrent order. Expired holds count as free at once,
+    the sweeper only reclaims their rows, see airport.holds.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.user} until {self.expires_at}"
+
+    class Meta:
+        ordering = ["expires_at"]
+
+
+class HeldSeat(models.Model):
+    hold = models.ForeignKey(SeatHold, on_delete=models.CASCADE, related_name="seats")
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="held_seats"
+    )
+    row = models.IntegerField()
+    seat = models.IntegerField()
+
+    def __str__(self):
+        return f"{str(self.flight)} (row: {self.row}, seat: {self.seat})"
+
+    class Meta:
+        ordering = ["row", "seat"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["flight", "row", "seat"], name="unique_held_seat"
+            )
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """Stored response of a create request sent with an Idempotency-Key header"""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.user}: {self.key}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="unique_idempotency_key"
+            )
+        ]
+
+
+class BoardEntry(models.Model):
+    """Denormalised departure/arrival board row, one per flight and direction"""
+
+    DEPARTURE = "departure"
+    ARRIVAL = "arrival"
+    DIRECTION_CHOICES = [(DEPARTURE, "Departure"), (ARRIVAL, "Arrival")]
+
+    airport = models.ForeignKey(
+        Airport, on_delete=models.CASCADE, related_name="board_entries"
+    )
+    direction = models.CharField(max_length=9, choices=DIRECTION_CHOICES)
+    scheduled_time = models.DateTimeField()
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="board_entries"
+    )
+    airport_code = models.CharField(max_length=10)
+    city = models.CharField(max_length=100)
+    departure_time = models.DateTimeField()
+    arrival_time = models.DateTimeField()
+    capacity = models.IntegerField()
+    tickets_available = models.IntegerField()
+
+    def __str__(self):
+        return f"{self.direction} {self.airport_code} {self.scheduled_time}"
+
+    class Meta:
+        ordering = ["scheduled_time", "flight"]
+        indexes = [
+            models.Index(fields=["airport", "direction", "scheduled_time"])
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["flight", "direction"], name="unique_board_entry"
+            )
+        ]
+
+
+class CrewAssignment(models.Model):
+    """
+    Time a crew member spends on a flight, copied from the flight so that
+    the crew member's next or previous flight is a single index seek.
+
+    Assignments of one crew member never overlap. PostgreSQL enforces this
+    with the crew_assignment_no_overlap exclusion constraint, elsewhere
+    FlightSerializer is the only guard.
+    """
+
+    crew = models.ForeignKey(
+        Crew, on_delete=models.CASCADE, related_name="assignments"
+    )
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="crew_assignments"
+    )
+    departure_time = models.DateTimeField()
+    arrival_time = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.crew} {self.departure_time} - {self.arrival_time}"
+
+    class Meta:
+        ordering = ["departure_time"]
+        indexes = [models.Index(fields=["crew", "departure_time"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["crew", "flight"], name="unique_crew_assignment"
+            )
+        ]
@@ -0,0 +1,73 @@
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination that seeks by the ordering key instead of OFFSET,
+    so every page costs the same no matter how deep the client scrolls.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "id"
+
+
+class FlightPagination(KeysetPagination):
+    ordering = ("departure_time", "id")
+
+    def page_covers(self, departure_time) -> bool:
+        """
+        Whether a flight departing at departure_time that is not in the
+        queryset, such as an unsaved instance of a schedule, belongs on the
+        current page: after the previous page's flights and up to the next
+        page's, so paging in one direction shows it exactly once.
+        """
+        position = self.cursor and parse_datetime(self.cursor.position)
+        if self.cursor and self.cursor.reverse:
+            after = self.page[0].departure_time if self.has_previous else None
+            if position and departure_time >= position:
+                return False
+            return after is None or departure_time > after
+        until = self.page[-1].departure_time if self.has_next else None
+        if position and departure_time <= position:
+            return False
+        return until is None or departure_time <= until
+
+    def trim_page(self, flights: list) -> list:
+        """
+        Cut the page with flights added by page_covers() back to page_size
+        flights, the flights cut off come first on the next page in the
+        direction of paging. Flights departing at the same moment are kept
+        together, the cursor position cannot tell them apart.
+        """
+        if len(flights) <= self.page_size:
+            return flights
+        reverse = self.cursor is not None and self.cursor.reverse
+        if reverse:
+            flights = flights[::-1]
+        cut = self.page_size
+        while cut > 0 and self._same_departure(flights, cut):
+            cut -= 1
+        if cut == 0:
+            cut = self.page_size
+            while cut < len(flights) and self._same_departure(flights, cut):
+                cut += 1
+            if cut == len(flights):
+                return flights[::-1] if reverse else flights
+        position = self._get_position_from_instance(flights[cut], self.ordering)
+        self.page = flights[:cut]
+        if reverse:
+            self.page.reverse()
+            self.has_previous, self.previous_position = True, position
+        else:
+            self.has_next, self.next_position = True, position
+        return self.page
+
+    @staticmethod
+    def _same_departure(flights: list, index: int) -> bool:
+        return flights[index].departure_time == flights[index - 1].departure_time
+
+
+class OrderPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
@@ -0,0 +1,215 @@
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+
+from airport.cache import get_versions
+from airport.models import Airport, Flight, Route, local_day_range
+
+
+class RouteGraph:
+    """
+    Airports and the routes between them as in-memory adjacency lists.
+
+    The graph is loaded lazily with two queries and reloaded whenever the
+    Route or Airport version stamp changes. The stamps live in a cache
+    shared by all workers, so writes made by any process are noticed.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._routes = None
+        self._adjacency = {}
+        self._codes = {}
+        self._paths = {}
+        self._versions = None
+
+    def _load(self) -> None:
+        # Read from the primary, the graph outlives the request and a
+        # lagging replica would keep it stale under the current stamps
+        self._routes = {}
+        self._adjacency = defaultdict(set)
+        for route_id, *route in Route.objects.using("default").values_list(
+            "id", "source_id", "destination_id", "distance"
+        ):
+            self._add_route(route_id, *route)
+        self._codes = dict(
+            Airport.objects.using("default").values_list("airport_code", "id")
+        )
+        self._paths = {}
+
+    def _add_route(self, route_id, source_id, destination_id, distance) -> None:
+        self._routes[route_id] = (source_id, destination_id, distance)
+        self._adjacency[source_id].add(route_id)
+
+    def _ensure_loaded(self) -> None:
+        # Stamps are read before the rows, a write racing the load bumps
+        # them again and the next call reloads
+        versions = get_versions((Route, Airport))
+        with self._lock:
+            if self._routes is None or versions != self._versions:
+                self._load()
+                self._versions = versions
+
+    def airport_id(self, code: str):
+        self._ensure_loaded()
+        return self._codes.get(code)
+
+    def paths(self, origin_id: int, destination_id: int, max_legs: int) -> list:
+        """Every chain of routes without repeated airports, as route id tuples"""
+        self._ensure_loaded()
+        key = (origin_id, destination_id, max_legs)
+        with self._lock:
+            if key not in self._paths:
+                self._paths[key] = self._find_paths(*key)
+            return self._paths[key]
+
+    def _find_paths(self, origin_id: int, destination_id: int, max_legs: int) -> list:
+        paths = []
+        stack = [(origin_id, (), {origin_id})]
+        while stack:
+            airport_id, path, visited = stack.pop()
+            for route_id in self._adjacency.get(airport_id, ()):
+                next_id = self._routes[route_id][1]
+                if next_id == destination_id:
+                    paths.append(path + (route_id,))
+                elif next_id not in visited and len(path) + 1 < max_legs:
+                    stack.append((next_id, path + (route_id,), visited | {next_id}))
+        return paths
+
+
+route_graph = RouteGraph()
+
+
+def plan_itineraries(
+    origin_code: str,
+    destination_code: str,
+    date,
+    max_legs: int,
+    max_connection: timedelta,
+) -> tuple:
+    """
+    Candidate route paths between two airports and the single flight query
+    covering all of them, ([], None) when the airports are not connected.
+    """
+    origin_id = route_graph.airport_id(origin_code)
+    destination_id = route_graph.airport_id(destination_code)
+    if origin_id is None or destination_id is None or origin_id == destination_id:
+        return [], None
+    paths = route_graph.paths(origin_id, destination_id, max_legs)
+    if not paths:
+        return [], None
+
+    day_start, day_end = local_day_range(date)
+    window_end = day_end + (max_legs - 1) * (max_connection + timedelta(days=1))
+    flights = (
+        Flight.objects.filter(
+            route_id__in={route_id for path in paths for route_id in path},
+            departure_time__gte=day_start,
+            departure_time__lt=window_end,
+        )
+        .select_related("route__source", "route__destination", "airplane")
+        .with_tickets_available()
+        .filter(tickets_available__gt=0)
+        .order_by("departure_time")
+    )
+    return paths, flights
+
+
+def chain_itineraries(
+    paths: list,
+    flights,
+    date,
+    min_connection: timedelta,
+    max_connection: timedelta,
+    limit: int,
+) -> list:
+    """Chain flights ordered by departure along the paths into itineraries"""
+    _, day_end = local_day_range(date)
+    flights_by_route = defaultdict(list)
+    for flight in flights:
+        flights_by_route[flight.route_id].append(flight)
+    departures = {
+        route_id: [flight.departure_time for flight in flights]
+        for route_id, flights in flights_by_route.items()
+    }
+
+    itineraries = []
+    for path in paths:
+        first_leg = flights_by_route.get(path[0], [])
+        first_leg = first_leg[: bisect_left(departures.get(path[0], []), day_end)]
+        partial = [[flight] for flight in first_leg]
+        for route_id in path[1:]:
+            extended = []
+            for legs in partial:
+                earliest = legs[-1].arrival_time + min_connection
+                latest = legs[-1].arrival_time + max_connection
+                route_departures = departures.get(route_id, [])
+                start = bisect_left(route_departures, earliest)
+                end = bisect_right(route_departures, latest)
+                for flight in flights_by_route[route_id][start:end]:
+                    extended.append(legs + [flight])
+            partial = extended
+        for legs in partial:
+            itineraries.append(
+                {
+                    "legs": legs,
+                    "departure_time": legs[0].departure_time,
+                    "arrival_time": legs[-1].arrival_time,
+                    "duration": legs[-1].arrival_time - legs[0].departure_time,
+                    "distance": sum(leg.route.distance for leg in legs),
+                    "connections": len(legs) - 1,
+                }
+            )
+
+    itineraries.sort(
+        key=lambda itinerary: (itinerary["arrival_time"], itinerary["connections"])
+    )
+    return itineraries[:limit]
+
+
+def find_itineraries(
+    origin_code: str,
+    destination_code: str,
+    date,
+    max_legs: int = 2,
+    min_connection: timedelta = timedelta(minutes=45),
+    max_connection: timedelta = timedelta(hours=24),
+    limit: int = 20,
+) -> list:
+    """
+    Itineraries whose first flight leaves on the given date, connecting
+    flights leave between min_connection and max_connection after landing.
+    Flights of all candidate routes are read with a single query.
+    """
+    paths, flights = plan_itineraries(
+        origin_code, destination_code, date, max_legs, max_connection
+    )
+    if not paths:
+        return []
+    return chain_itineraries(
+        paths, flights, date, min_connection, max_connection, limit
+    )
+
+
+async def afind_itineraries(
+    origin_code: str,
+    destination_code: str,
+    date,
+    max_legs: int = 2,
+    min_connection: timedelta = timedelta(minutes=45),
+    max_connection: timedelta = timedelta(hours=24),
+    limit: int = 20,
+) -> list:
+    """Async find_itineraries() reading flights through the async ORM"""
+    paths, flights = await sync_to_async(plan_itineraries)(
+        origin_code, destination_code, date, max_legs, max_connection
+    )
+    if not paths:
+        return []
+    flights = [flight async for flight in flights.aiterator()]
+    return chain_itineraries(
+        paths, flights, date, min_connection, max_connection, limit
+    )
@@ -0,0 +1,190 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from airport.board import refresh_board
+from airport.cache import bump_version
+from airport.crew_schedule import refresh_crew_assignments
+from airport.models import Flight, FlightSchedule, local_day_range
+from airport.seat_map import invalidate_seat_maps
+
+# Longest departure window the flight list adds virtual flights to
+VIRTUAL_WINDOW_MAX = timedelta(days=31)
+
+
+def materialise(schedules, start, end) -> int:
+    """
+    Store the instances of the schedules departing in [start, end) as
+    Flight rows, return how many were new. Instances stored before are
+    left alone, so the call can be repeated.
+    """
+    schedules = list(schedules)
+    with transaction.atomic():
+        stored = {
+            (schedule_id, departure_time): pk
+            for pk, schedule_id, departure_time in Flight.objects.filter(
+                schedule__in=schedules,
+                departure_time__gte=start,
+                departure_time__lt=end,
+            ).values_list("pk", "schedule_id", "departure_time")
+        }
+        Flight.objects.bulk_create(
+            (
+                schedule.instance(departure_time)
+                for schedule in schedules
+                for departure_time in schedule.occurrences(start, end)
+                if (schedule.pk, departure_time) not in stored
+            ),
+            ignore_conflicts=True,
+        )
+        new_flights = list(
+            Flight.objects.filter(
+                schedule__in=schedules,
+                departure_time__gte=start,
+                departure_time__lt=end,
+            )
+            .exclude(pk__in=stored.values())
+            .values_list("pk", flat=True)
+        )
+        if new_flights:
+            refresh_board(new_flights)
+            bump_version(Flight)
+    return len(new_flights)
+
+
+def materialise_horizon(schedules=None, days: int = None) -> int:
+    """Store the instances of the coming days, from the start of today"""
+    if days is None:
+        days = settings.FLIGHT_SCHEDULE_HORIZON_DAYS
+    today = timezone.localdate()
+    start = local_day_range(today)[0]
+    end = local_day_range(today + timedelta(days=days))[0]
+    if schedules is None:
+        schedules = FlightSchedule.objects.filter(valid_until__gte=today)
+    return materialise(schedules.select_related("route", "airplane"), start, end)
+
+
+def reschedule(schedule: FlightSchedule) -> None:
+    """
+    Bring the stored upcoming flights of an edited schedule in line with it.
+    Flights without tickets are moved to the schedule's route, airplane and
+    duration while it still has an instance at their departure time and
+    deleted otherwise, sold flights and flights with unexpired seat holds
+    are left as they are. Then the new instances of the horizon are stored.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        flights = list(
+            schedule.flights.filter(departure_time__gte=now, tickets__isnull=True)
+            .exclude(held_seats__hold__expires_at__gt=now)
+            .values_list("pk", "departure_time")
+        )
+        if flights:
+            departures = [departure_time for _, departure_time in flights]
+            occurrences = set(
+                schedule.occurrences(
+                    min(departures), max(departures) + timedelta(microseconds=1)
+                )
+            )
+            kept = [pk for pk, departure in flights if departure in occurrences]
+            Flight.objects.filter(
+                pk__in=[pk for pk, departure in flights if departure not in occurrences]
+            ).delete()
+            Flight.objects.filter(pk__in=kept).update(
+                route=schedule.route,
+                airplane=schedule.airplane,
+                arrival_time=F("departure_time") + schedule.duration,
+            )
+            if kept:
+                invalidate_seat_maps(kept)
+                refresh_board(kept)
+                refresh_crew_assignments(kept)
+                bump_version(Flight)
+    materialise_horizon(FlightSchedule.objects.filter(pk=schedule.pk))
+
+
+def materialise_instance(schedule: FlightSchedule, departure_time) -> tuple:
+    """
+    The stored flight of one instance, stored now if it was not yet.
+    Returns (flight, created), None if the schedule has no such instance.
+    """
+    end = departure_time + timedelta(microseconds=1)
+    if not any(schedule.occurrences(departure_time, end)):
+        return None, False
+    created = materialise([schedule], departure_time, end)
+    return schedule.flights.get(departure_time=departure_time), bool(created)
+
+
+def virtual_window(
+    departure=None, departure_after=None, departure_before=None, **filters
+):
+    """
+    Departure window of a flight list query that virtual flights are added
+    to, None for queries not bounded on both ends or longer than
+    VIRTUAL_WINDOW_MAX.
+    """
+    start, end = departure_after, departure_before
+    if departure:
+        day_start, day_end = local_day_range(departure)
+        start = max(start, day_start) if start else day_start
+        end = min(end, day_end) if end else day_end
+    if start is None or end is None:
+        return None
+    if not start < end <= start + VIRTUAL_WINDOW_MAX:
+        return None
+    return start, end
+
+
+def virtual_flights(
+    start, end, arrival=None, source=None, destination=None
+) -> list:
+    """
+    Unsaved flights of the schedules departing in [start, end) that are
+    not stored yet, with all their seats available.
+    """
+    schedules = FlightSchedule.objects.select_related(
+        "route__source", "route__destination", "airplane"
+    ).filter(
+        valid_from__lte=timezone.localdate(end),
+        valid_until__gte=timezone.localdate(start),
+    )
+    if source:
+        schedules = schedules.filter(route__source_id__in=source)
+    if destination:
+        schedules = schedules.filter(route__destination_id__in=destination)
+    schedules = list(schedules)
+    stored = set(
+        Flight.objects.filter(
+            schedule__in=schedules, departure_time__gte=start, departure_time__lt=end
+        ).values_list("schedule_id", "departure_time")
+    )
+    arrival_range = local_day_range(arrival) if arrival else None
+    flights = []
+    for schedule in schedules:
+        for departure_time in schedule.occurrences(start, end):
+            if (schedule.pk, departure_time) in stored:
+                continue
+            flight = schedule.instance(departure_time)
+            if arrival_range and not (
+                arrival_range[0] <= flight.arrival_time < arrival_range[1]
+            ):
+                continue
+            flight.tickets_available = schedule.airplane.capacity
+            flights.append(flight)
+    return flights
+
+
+def flight_order(flight) -> tuple:
+    """Sort key of stored and virtual flights, stored first on a tie"""
+    return (
+        flight.departure_time,
+        flight.pk is None,
+        flight.pk or flight.schedule_id,
+    )
+
+
+def merge_flights(stored: list, virtual: list) -> list:
+    return sorted([*stored, *virtual], key=flight_order)
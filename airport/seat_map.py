@@ -0,0 +1,105 @@
+import base64
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from airport.models import Flight, HeldSeat, Ticket
+
+
+def seat_map_cache_key(flight_id: int) -> str:
+    return f"airport:seat-map:{flight_id}"
+
+
+class SeatMap:
+    """
+    Taken seats of a flight packed into a rows x seats_in_row bitset.
+
+    Seat (row, seat) is bit number (row - 1) * seats_in_row + (seat - 1),
+    counted from the most significant bit of the first byte. Seats under
+    an unexpired hold count as taken until `holds_expire`.
+    """
+
+    def __init__(self, flight_id: int, rows: int, seats_in_row: int, bits=None):
+        self.flight_id = flight_id
+        self.holds_expire = None
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        if bits is None:
+            bits = bytes((rows * seats_in_row + 7) // 8)
+        self.bits = bytearray(bits)
+
+    def _position(self, row: int, seat: int) -> tuple:
+        index = (row - 1) * self.seats_in_row + (seat - 1)
+        return index >> 3, 0x80 >> (index & 7)
+
+    def take(self, row: int, seat: int) -> None:
+        byte, mask = self._position(row, seat)
+        self.bits[byte] |= mask
+
+    def is_taken(self, row: int, seat: int) -> bool:
+        byte, mask = self._position(row, seat)
+        return bool(self.bits[byte] & mask)
+
+    @property
+    def capacity(self) -> int:
+        return self.rows * self.seats_in_row
+
+    @property
+    def taken(self) -> int:
+        return int.from_bytes(self.bits, "big").bit_count()
+
+    @property
+    def available(self) -> int:
+        return self.capacity - self.taken
+
+    @property
+    def seats(self) -> str:
+        return base64.b64encode(bytes(self.bits)).decode("ascii")
+
+    @classmethod
+    def for_flight(cls, flight: Flight) -> "SeatMap":
+        seat_map = cls(flight.pk, flight.airplane.rows, flight.airplane.seats_in_row)
+        for row, seat in Ticket.objects.filter(flight_id=flight.pk).values_list(
+            "row", "seat"
+        ):
+            seat_map.take(row, seat)
+        for row, seat, expires_at in HeldSeat.objects.filter(
+            flight_id=flight.pk, hold__expires_at__gt=timezone.now()
+        ).values_list("row", "seat", "hold__expires_at"):
+            seat_map.take(row, seat)
+            if seat_map.holds_expire is None or expires_at < seat_map.holds_expire:
+                seat_map.holds_expire = expires_at
+        return seat_map
+
+
+def get_seat_map(flight: Flight) -> SeatMap:
+    """Seat map of the flight, served from the cache when it is enabled"""
+    timeout = settings.SEAT_MAP_CACHE_TIMEOUT
+    if not timeout:
+        return SeatMap.for_flight(flight)
+
+    key = seat_map_cache_key(flight.pk)
+    cached = cache.get(key)
+    geometry = (flight.airplane.rows, flight.airplane.seats_in_row)
+    if cached is not None and cached[:2] == geometry:
+        return SeatMap(flight.pk, *cached)
+
+    seat_map = SeatMap.for_flight(flight)
+    if seat_map.holds_expire:
+        # Do not keep showing held seats as taken once the first hold expires
+        until_expiry = (seat_map.holds_expire - timezone.now()).total_seconds()
+        timeout = max(1, min(timeout, int(until_expiry) + 1))
+    cache.set(key, (*geometry, bytes(seat_map.bits)), timeout)
+    return seat_map
+
+
+def invalidate_seat_maps(flight_ids) -> None:
+    """
+    Drop cached seat maps now and again once the current transaction commits,
+    so a map rebuilt from not yet committed data cannot outlive the write.
+    """
+    keys = [seat_map_cache_key(flight_id) for flight_id in set(flight_ids)]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,263 @@
+import math
+import random
+from datetime import timedelta
+from itertools import cycle, islice, product
+from string import ascii_uppercase
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from airport.board import refresh_board
+from airport.booking import refresh_seats_sold
+from airport.crew_schedule import refresh_crew_assignments
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+AIRPLANE_MODELS = (
+    ("Airbus A320", 30, 6),
+    ("Boeing 737-800", 32, 6),
+    ("Embraer E190", 25, 4),
+    ("Airbus A330", 40, 8),
+    ("Boeing 777", 50, 10),
+)
+CRUISE_SPEED_KMH = 800
+TURNAROUND = timedelta(hours=1)
+CREW_SIZE = 2
+
+
+def chunked(iterable, size: int):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def airport_codes():
+    for letters in product(ascii_uppercase, repeat=3):
+        yield "".join(letters)
+
+
+class DataGenerator:
+    """
+    Generates a realistic data set in streaming batches.
+
+    Reference data (airports, airplanes, routes, crew, users) is created
+    once and reused on later runs, flights and their orders and tickets are
+    appended batch by batch so memory use is bounded by `batch_size` flights
+    no matter how many are generated. Every flight gets a crew of two that
+    is not flying anywhere else at the time, and seats are drawn without
+    repetition from the airplane geometry.
+    """
+
+    def __init__(
+        self,
+        airports: int = 50,
+        airplanes: int = 20,
+        routes: int = 200,
+        users: int = 100,
+        load_factor: float = 0.5,
+        interval: timedelta = timedelta(minutes=10),
+        batch_size: int = 100,
+        insert_batch_size: int = 5000,
+        seed: int = 0,
+    ):
+        if airports < 2 or routes > airports * (airports - 1):
+            raise ValueError("Not enough airports for that many distinct routes")
+        if not 0 <= load_factor <= 1:
+            raise ValueError("Load factor must be between 0 and 1")
+        self.airports = airports
+        self.airplanes = airplanes
+        self.routes = routes
+        self.users = users
+        self.load_factor = load_factor
+        self.interval = interval
+        self.batch_size = batch_size
+        self.insert_batch_size = insert_batch_size
+        self.random = random.Random(seed)
+
+    def create_reference_data(self, users=None) -> None:
+        airplane_type, _ = AirplaneType.objects.get_or_create(name="Seeded jets")
+        codes = list(islice(airport_codes(), self.airports))
+        Airport.objects.bulk_create(
+            (
+                Airport(
+                    name=f"{code} International",
+                    airport_code=code,
+                    closest_big_city=f"{code.capitalize()}ville",
+                )
+                for code in codes
+            ),
+            ignore_conflicts=True,
+        )
+        airports = list(Airport.objects.filter(airport_code__in=codes))
+
+        specs = {
+            f"{model} #{i // len(AIRPLANE_MODELS) + 1}": (rows, seats)
+            for i, (model, rows, seats) in zip(
+                range(self.airplanes), cycle(AIRPLANE_MODELS)
+            )
+        }
+        existing = set(
+            Airplane.objects.filter(name__in=specs).values_list("name", flat=True)
+        )
+        Airplane.objects.bulk_create(
+            Airplane(
+                name=name,
+                rows=rows,
+                seats_in_row=seats_in_row,
+                airplane_type=airplane_type,
+            )
+            for name, (rows, seats_in_row) in specs.items()
+            if name not in existing
+        )
+        self.airplane_objs = list(Airplane.objects.filter(name__in=specs))
+
+        Route.objects.bulk_create(
+            (
+                Route(
+                    source=airports[i % len(airports)],
+                    destination=airports[
+                        (i % len(airports) + i // len(airports) + 1) % len(airports)
+                    ],
+                    distance=self.random.randint(200, 9000),
+                )
+                for i in range(self.routes)
+            ),
+            ignore_conflicts=True,
+        )
+        self.route_objs = list(
+            Route.objects.filter(source__in=airports, destination__in=airports)
+        )
+
+        if users is None:
+            emails = [f"seed-{i}@airport-service.local" for i in range(self.users)]
+            get_user_model().objects.bulk_create(
+                (
+                    get_user_model()(email=email, password=make_password(None))
+                    for email in emails
+                ),
+                ignore_conflicts=True,
+            )
+            users = get_user_model().objects.filter(email__in=emails)
+        self.user_ids = [user.pk for user in users]
+
+    def crew_needed(self) -> int:
+        """
+        Size of the crew pool so that a pair is back on the ground and
+        turned around before it is scheduled again.
+        """
+        longest_flight = max(self.flight_duration(route) for route in self.route_objs)
+        pairs = math.ceil((longest_flight + TURNAROUND) / self.interval) + 1
+        return pairs * CREW_SIZE
+
+    def create_crew(self) -> None:
+        count = self.crew_needed()
+        first_names = [f"Seed{i}" for i in range(count)]
+        Crew.objects.bulk_create(
+            (Crew(first_name=f"Seed{i}", last_name=f"Pilot{i}") for i in range(count)),
+            ignore_conflicts=True,
+        )
+        self.crew_ids = list(
+            Crew.objects.filter(first_name__in=first_names)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+    @staticmethod
+    def flight_duration(route: Route) -> timedelta:
+        return timedelta(hours=route.distance / CRUISE_SPEED_KMH + 0.5)
+
+    def build_flights(self, start, first: int, count: int) -> list:
+        flights = []
+        for i in range(first, first + count):
+            route = self.random.choice(self.route_objs)
+            departure_time = start + i * self.interval
+            flights.append(
+                Flight(
+                    route=route,
+                    airplane=self.random.choice(self.airplane_objs),
+                    departure_time=departure_time,
+                    arrival_time=departure_time + self.flight_duration(route),
+                )
+            )
+        return flights
+
+    def build_crew_links(self, flights: list, first: int) -> list:
+        pairs = len(self.crew_ids) // CREW_SIZE
+        links = []
+        for i, flight in enumerate(flights, start=first):
+            pair = i % pairs
+            for crew_id in self.crew_ids[pair * CREW_SIZE:(pair + 1) * CREW_SIZE]:
+                links.append(Flight.crew.through(flight_id=flight.pk, crew_id=crew_id))
+        return links
+
+    def build_bookings(self, flights: list) -> tuple:
+        """Orders of one to four adjacent seats each, up to the load factor"""
+        orders, seats = [], []
+        for flight in flights:
+            airplane = flight.airplane
+            sold = round(airplane.capacity * self.load_factor)
+            taken = sorted(self.random.sample(range(airplane.capacity), sold))
+            while taken:
+                size = min(self.random.randint(1, 4), len(taken))
+                group, taken = taken[:size], taken[size:]
+                orders.append(Order(user_id=self.random.choice(self.user_ids)))
+                seats.append((flight, group))
+        return orders, seats
+
+    def generate(self, flights: int, start=None, users=None, log=None) -> dict:
+        if start is None:
+            # Start after earlier runs so their crews are back on the ground
+            last_arrival = Flight.objects.aggregate(last=Max("arrival_time"))["last"]
+            start = timezone.now()
+            if last_arrival and last_arrival + TURNAROUND > start:
+                start = last_arrival + TURNAROUND
+        with transaction.atomic():
+            self.create_reference_data(users=users)
+            self.create_crew()
+
+        counts = {"flights": 0, "orders": 0, "tickets": 0}
+        for first in range(0, flights, self.batch_size):
+            with transaction.atomic():
+                flight_objs = Flight.objects.bulk_create(
+                    self.build_flights(
+                        start, first, min(self.batch_size, flights - first)
+                    )
+                )
+                Flight.crew.through.objects.bulk_create(
+                    self.build_crew_links(flight_objs, first),
+                    batch_size=self.insert_batch_size,
+                )
+                refresh_crew_assignments(flight.pk for flight in flight_objs)
+                orders, seats = self.build_bookings(flight_objs)
+                Order.objects.bulk_create(orders, batch_size=self.insert_batch_size)
+                tickets = (
+                    Ticket(
+                        order=order,
+                        flight=flight,
+                        row=slot // flight.airplane.seats_in_row + 1,
+                        seat=slot % flight.airplane.seats_in_row + 1,
+                    )
+                    for order, (flight, group) in zip(orders, seats)
+                    for slot in group
+                )
+                for chunk in chunked(tickets, self.insert_batch_size):
+                    Ticket.objects.bulk_create(chunk)
+                    counts["tickets"] += len(chunk)
+                refresh_seats_sold(flight.pk for flight in flight_objs)
+                refresh_board(flight.pk for flight in flight_objs)
+            counts["flights"] += len(flight_objs)
+            counts["orders"] += len(orders)
+            if log:
+                log(counts)
+        return counts
@@ -1,6 +1,14 @@
-from django.db import transaction
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.validators import UniqueTogetherValidator
+from .booking import book_tickets
+from .crew_schedule import CREW_OVERLAP_CONSTRAINT, busy_crew
+from .fieldsets import DynamicFieldsMixin
+from .flight_import import IMPORT_FORMATS, import_format, undecodable_offset
 from .forms import validate_crew
+from .holds import hold_seats
 from airport.models import (
     Airplane,
     Flight,
@@ -10,42 +18,153 @@ from airport.models import (
     AirplaneType,
     Crew,
     Airport,
+    BoardEntry,
+    FlightSchedule,
+    HeldSeat,
+    SeatHold,
 )
 
 
-class AirplaneTypeSerializer(serializers.ModelSerializer):
+class AirplaneTypeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = AirplaneType
         fields = ("id", "name")
 
 
-class AirportSerializer(serializers.ModelSerializer):
+class AirportSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Airport
         fields = ("id", "name", "airport_code", "closest_big_city")
 
 
-class CrewSerializer(serializers.ModelSerializer):
+class CrewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Crew
         fields = ("id", "first_name", "last_name")
+        validators = [
+            UniqueTogetherValidator(
+                queryset=Crew.objects.all(),
+                fields=("first_name", "last_name"),
+                message="Crew with this full name already exists.",
+            )
+        ]
+
+
+class FlightScheduleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "route": lambda: RouteSerializer(read_only=True),
+        "airplane": lambda: AirplaneSerializer(read_only=True),
+    }
+
+    class Meta:
+        model = FlightSchedule
+        fields = (
+            "id",
+            "route",
+            "airplane",
+            "weekdays",
+            "departure",
+            "duration",
+            "valid_from",
+            "valid_until",
+        )
+
+    def validate_weekdays(self, weekdays):
+        if not weekdays or set(weekdays) - set("1234567"):
+            raise serializers.ValidationError(
+                "Use ISO weekday numbers, 1 for Monday to 7 for Sunday"
+            )
+        return "".join(sorted(set(weekdays)))
+
+    def validate_duration(self, duration):
+        if duration <= timedelta(0):
+            raise serializers.ValidationError("Duration must be positive")
+        return duration
+
+    def validate(self, attrs):
+        data = super(FlightScheduleSerializer, self).validate(attrs)
+        FlightSchedule.validate_validity(
+            data.get("valid_from", getattr(self.instance, "valid_from", None)),
+            data.get("valid_until", getattr(self.instance, "valid_until", None)),
+            serializers.ValidationError,
+        )
+        return data
+
+
+class ScheduledFlightSerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField(
+        help_text="Departure of the schedule's instance to store"
+    )
+
+
+class FlightImportSerializer(serializers.Serializer):
+    file = serializers.FileField(help_text="CSV or JSON Lines file of flights")
+    format = serializers.ChoiceField(
+        choices=sorted(IMPORT_FORMATS),
+        required=False,
+        help_text="Taken from the file extension by default",
+    )
+
+    def validate_file(self, file):
+        offset = undecodable_offset(file.chunks())
+        if offset is not None:
+            raise serializers.ValidationError(
+                f"The file is not UTF-8 encoded, byte {offset} cannot be decoded"
+            )
+        file.seek(0)
+        return file
+
+    def validate(self, attrs):
+        if "format" not in attrs:
+            attrs["format"] = import_format(attrs["file"].name)
+            if attrs["format"] is None:
+                raise serializers.ValidationError(
+                    {"format": f"Choose one of: {', '.join(sorted(IMPORT_FORMATS))}"}
+                )
+        return attrs
 
 
-class AirplaneSerializer(serializers.ModelSerializer):
+class CrewAvailabilitySerializer(serializers.Serializer):
+    start = serializers.DateTimeField(help_text="Start of the interval")
+    end = serializers.DateTimeField(help_text="End of the interval")
+
+    def validate(self, attrs):
+        if attrs["end"] <= attrs["start"]:
+            raise serializers.ValidationError(
+                {"end": "End must be later than start"}
+            )
+        return attrs
+
+
+class CrewImportSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """One member of a crew import, duplicates are skipped by the import"""
+
+    class Meta:
+        model = Crew
+        fields = ("first_name", "last_name")
+        validators = []
+
+
+class AirplaneSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     airplane_type = AirplaneTypeSerializer(many=False)
+    expandable_fields = {
+        "airplane_type": lambda: AirplaneTypeSerializer(read_only=True),
+    }
 
     class Meta:
         model = Airplane
         fields = ("id", "name", "rows", "seats_in_row", "airplane_type")
 
 
-class AirplaneCreateSerializer(serializers.ModelSerializer):
+class AirplaneCreateSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = AirplaneSerializer.expandable_fields
+
     class Meta:
         model = Airplane
         fields = ("id", "name", "rows", "seats_in_row", "airplane_type")
 
 
-class AirplaneImageSerializer(serializers.ModelSerializer):
+class AirplaneImageSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Airplane
         fields = ("id", "image")
@@ -53,6 +172,7 @@ class AirplaneImageSerializer(serializers.ModelSerializer):
 
 class AirplaneDetailSerializer(AirplaneSerializer):
     airplane_type = serializers.StringRelatedField(many=False, read_only=True)
+    extra_fields = ("image_url",)
 
     class Meta:
         model = Airplane
@@ -60,12 +180,18 @@ class AirplaneDetailSerializer(AirplaneSerializer):
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        image_serializer = AirplaneImageSerializer(instance)
-        representation["image_url"] = image_serializer.data.get("image", "")
+        if self.fieldset is None or self.fieldset.includes("image_url"):
+            image_serializer = AirplaneImageSerializer(instance)
+            representation["image_url"] = image_serializer.data.get("image", "")
         return representation
 
 
-class RouteSerializer(serializers.ModelSerializer):
+class RouteSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "source": lambda: AirportSerializer(read_only=True),
+        "destination": lambda: AirportSerializer(read_only=True),
+    }
+
     class Meta:
         model = Route
         fields = ("id", "source", "destination", "distance")
@@ -88,7 +214,11 @@ class RouteListSerializer(RouteSerializer):
     destination = serializers.StringRelatedField(many=False)
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "flight": lambda: FlightListSerializer(read_only=True),
+    }
+
     def validate(self, attrs) -> dict:
         data = super(TicketSerializer, self).validate(attrs)
         Ticket.validate_seats(
@@ -104,17 +234,89 @@ class TicketSerializer(serializers.ModelSerializer):
         fields = ("flight", "row", "seat")
 
 
+class BookedFlightField(serializers.PrimaryKeyRelatedField):
+    """Resolves flights from the batch loaded by TicketBookingListSerializer"""
+
+    def to_internal_value(self, data):
+        flights = getattr(self.parent.parent, "flights", None)
+        if flights is None:
+            return super().to_internal_value(data)
+        try:
+            return flights[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class TicketBookingListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            flight_ids = set()
+            for item in data:
+                try:
+                    flight_ids.add(int(item["flight"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+            self.flights = Flight.objects.select_related("airplane").in_bulk(
+                flight_ids
+            )
+        return super().to_internal_value(data)
+
+
+class TicketBookingSerializer(TicketSerializer):
+    flight = BookedFlightField(queryset=Flight.objects.select_related("airplane"))
+
+    class Meta:
+        model = Ticket
+        fields = ("flight", "row", "seat")
+        # Taken seats are checked for the whole order at once by book_tickets()
+        validators = []
+        list_serializer_class = TicketBookingListSerializer
+
+
+class HeldSeatSerializer(TicketBookingSerializer):
+    class Meta:
+        model = HeldSeat
+        fields = ("flight", "row", "seat")
+        # Taken and held seats are checked for the whole hold by hold_seats()
+        validators = []
+        list_serializer_class = TicketBookingListSerializer
+
+
+class SeatHoldSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    seats = HeldSeatSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        model = SeatHold
+        fields = ("id", "seats", "created_at", "expires_at")
+        read_only_fields = ("created_at", "expires_at")
+
+    def create(self, validated_data):
+        return hold_seats(
+            self.context["request"].user,
+            validated_data["seats"],
+            serializers.ValidationError,
+        )
+
+
 class TicketSeatsSerializer(TicketSerializer):
     class Meta:
         model = Ticket
         fields = ("row", "seat")
 
 
-class FlightSerializer(serializers.ModelSerializer):
+class FlightSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     departure_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
     arrival_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
     crew = serializers.PrimaryKeyRelatedField(many=True, queryset=Crew.objects.all())
 
+    expandable_fields = {
+        "route": lambda: RouteSerializer(read_only=True),
+        "airplane": lambda: AirplaneSerializer(read_only=True),
+        "crew": lambda: CrewSerializer(many=True, read_only=True),
+    }
+
     class Meta:
         model = Flight
         fields = ("id", "route", "airplane", "departure_time", "arrival_time", "crew")
@@ -123,6 +325,45 @@ class FlightSerializer(serializers.ModelSerializer):
         validate_crew(len(crew))
         return crew
 
+    def validate(self, attrs):
+        data = super(FlightSerializer, self).validate(attrs)
+        departure_time = data.get(
+            "departure_time", getattr(self.instance, "departure_time", None)
+        )
+        arrival_time = data.get(
+            "arrival_time", getattr(self.instance, "arrival_time", None)
+        )
+        if arrival_time <= departure_time:
+            raise serializers.ValidationError(
+                {"arrival_time": "Arrival must be later than departure"}
+            )
+        crew = data.get("crew", self.instance.crew.all() if self.instance else [])
+        busy = busy_crew(
+            crew, departure_time, arrival_time, exclude_flight=self.instance
+        )
+        if busy:
+            raise serializers.ValidationError(
+                {
+                    "crew": [
+                        f"{member.full_name} is on another flight at that time"
+                        for member in busy
+                    ]
+                }
+            )
+        return data
+
+    def save(self, **kwargs):
+        # The database has the last word on overlaps written concurrently
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError as error:
+            if CREW_OVERLAP_CONSTRAINT not in str(error):
+                raise
+            raise serializers.ValidationError(
+                {"crew": "A crew member is on another flight at that time"}
+            )
+
 
 class FlightDetailSerializer(FlightSerializer):
     route = RouteSerializer(many=False, read_only=True)
@@ -150,6 +391,7 @@ class FlightListSerializer(FlightSerializer):
         source="airplane.capacity", read_only=True
     )
     tickets_available = serializers.IntegerField(read_only=True)
+    schedule = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
         model = Flight
@@ -161,20 +403,28 @@ class FlightListSerializer(FlightSerializer):
             "arrival_time",
             "airplane_num_seats",
             "tickets_available",
+            "schedule",
         )
 
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        representation["tickets_available"] = instance.tickets_available
-        return representation
+
+class SeatMapSerializer(DynamicFieldsMixin, serializers.Serializer):
+    flight = serializers.IntegerField(source="flight_id")
+    rows = serializers.IntegerField()
+    seats_in_row = serializers.IntegerField()
+    taken = serializers.IntegerField()
+    available = serializers.IntegerField()
+    seats = serializers.CharField(
+        help_text="Base64 bitset of taken seats, row by row, "
+                  "most significant bit first"
+    )
 
 
 class TicketListSerializer(TicketSerializer):
     flight = FlightListSerializer(many=False, read_only=True)
 
 
-class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+class OrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    tickets = TicketBookingSerializer(many=True, read_only=False, allow_empty=False)
 
     class Meta:
         model = Order
@@ -185,10 +435,85 @@ class OrderSerializer(serializers.ModelSerializer):
         with transaction.atomic():
             tickets_data = validated_data.pop("tickets")
             order = Order.objects.create(**validated_data, user=user)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+            book_tickets(order, tickets_data, serializers.ValidationError)
             return order
 
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=False)
+
+
+class FlightFilterSerializer(serializers.Serializer):
+    departure = serializers.DateField(
+        required=False, help_text="Local day of departure"
+    )
+    arrival = serializers.DateField(required=False, help_text="Local day of arrival")
+    departure_after = serializers.DateTimeField(
+        required=False, help_text="Departure at or after this moment"
+    )
+    departure_before = serializers.DateTimeField(
+        required=False, help_text="Departure before this moment"
+    )
+    source = serializers.CharField(
+        required=False, help_text="Comma-separated ids of departure airports"
+    )
+    destination = serializers.CharField(
+        required=False, help_text="Comma-separated ids of arrival airports"
+    )
+
+    @staticmethod
+    def _params_to_ints(qs):
+        try:
+            return [int(str_id) for str_id in qs.split(",")]
+        except ValueError:
+            raise serializers.ValidationError("Expected comma-separated ids")
+
+    def validate_source(self, value):
+        return self._params_to_ints(value)
+
+    def validate_destination(self, value):
+        return self._params_to_ints(value)
+
+
+class RouteSearchSerializer(serializers.Serializer):
+    origin = serializers.CharField(help_text="Airport code of departure")
+    destination = serializers.CharField(help_text="Airport code of arrival")
+    date = serializers.DateField(help_text="Departure date of the first flight")
+    max_legs = serializers.IntegerField(min_value=1, max_value=3, default=2)
+    min_connection = serializers.IntegerField(
+        min_value=0, default=45, help_text="Minimum connection time in minutes"
+    )
+
+
+class ItinerarySerializer(DynamicFieldsMixin, serializers.Serializer):
+    legs = FlightListSerializer(many=True)
+    departure_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
+    arrival_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
+    duration = serializers.DurationField()
+    distance = serializers.IntegerField()
+    connections = serializers.IntegerField()
+
+
+class BoardQuerySerializer(serializers.Serializer):
+    direction = serializers.ChoiceField(
+        choices=["departures", "arrivals"], default="departures"
+    )
+    date = serializers.DateField(
+        required=False, help_text="Local day of the board, today by default"
+    )
+
+
+class BoardEntrySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    flight = serializers.IntegerField(source="flight_id")
+
+    class Meta:
+        model = BoardEntry
+        fields = (
+            "flight",
+            "scheduled_time",
+            "airport_code",
+            "city",
+            "departure_time",
+            "arrival_time",
+            "tickets_available",
+        )
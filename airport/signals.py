@@ -0,0 +1,101 @@
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from airport.board import refresh_availability, refresh_board
+from airport.booking import add_seats_sold
+from airport.cache import bump_version
+from airport.crew_schedule import refresh_crew_assignments
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    FlightSchedule,
+    Order,
+    Route,
+    Ticket,
+)
+from airport.seat_map import invalidate_seat_maps
+
+
+def stored_flight_id(ticket: Ticket):
+    """Flight the ticket's row was stored on before this save or delete"""
+    return getattr(ticket, "_stored_flight_id", None) or ticket.flight_id
+
+
+# Registered before ticket_changed, which copies seats_sold to the board
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, **kwargs):
+    if created:
+        add_seats_sold({instance.flight_id: 1})
+    elif stored_flight_id(instance) != instance.flight_id:
+        add_seats_sold({stored_flight_id(instance): -1, instance.flight_id: 1})
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    add_seats_sold({stored_flight_id(instance): -1})
+
+
+@receiver([post_save, post_delete], sender=Ticket)
+def ticket_changed(sender, instance, **kwargs):
+    flight_ids = list({stored_flight_id(instance), instance.flight_id})
+    invalidate_seat_maps(flight_ids)
+    refresh_availability(flight_ids)
+    instance._stored_flight_id = instance.flight_id
+
+
+@receiver([post_save, post_delete], sender=Airport)
+@receiver([post_save, post_delete], sender=AirplaneType)
+@receiver([post_save, post_delete], sender=Airplane)
+@receiver([post_save, post_delete], sender=Route)
+@receiver([post_save, post_delete], sender=Crew)
+@receiver([post_save, post_delete], sender=Flight)
+@receiver([post_save, post_delete], sender=FlightSchedule)
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=Ticket)
+def model_changed(sender, **kwargs):
+    bump_version(sender)
+
+
+@receiver(m2m_changed, sender=Flight.crew.through)
+def flight_crew_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith("post_"):
+        bump_version(Flight)
+        if not reverse:
+            refresh_crew_assignments([instance.pk])
+        else:
+            refresh_crew_assignments(
+                pk_set or instance.assignments.values_list("flight_id", flat=True)
+            )
+
+
+@receiver(post_save, sender=Flight)
+def flight_saved(sender, instance, created, **kwargs):
+    refresh_board([instance.pk])
+    if not created:
+        refresh_crew_assignments([instance.pk])
+
+
+@receiver(post_save, sender=Route)
+def route_board_changed(sender, instance, created, **kwargs):
+    if not created:
+        refresh_board(instance.flight_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Airport)
+def airport_board_changed(sender, instance, created, **kwargs):
+    if not created:
+        refresh_board(
+            Flight.objects.filter(
+                Q(route__source=instance) | Q(route__destination=instance)
+            ).values_list("pk", flat=True)
+        )
+
+
+@receiver(post_save, sender=Airplane)
+def airplane_board_changed(sender, instance, created, **kwargs):
+    if not created:
+        refresh_board(instance.flight_set.values_list("pk", flat=True))
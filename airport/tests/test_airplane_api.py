@@ -80,7 +80,7 @@ class AuthenticateAirplaneApiTests(TestCase):
         serializer = AirplaneSerializer(airplanes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_retrieve_flight_detail(self):
         pass
@@ -119,7 +119,7 @@ class AdminAirplaneApiTests(TestCase):
         serializer = AirplaneSerializer(airplanes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_create_airplane(self):
         airplane_type = AirplaneType.objects.create(name="Large Jets")
@@ -218,3 +218,18 @@ class AirplaneImageUploadTests(TestCase):
             )
             self.assertIn("image_url", res.data)
             self.assertNotEqual(res.data["image_url"], "")
+
+    def test_airplane_detail_sparse_fields(self):
+        airplane = sample_airplane()
+        url = reverse("airport:airplane-detail", args=[airplane.id])
+
+        res = self.client.get(url, {"fields": "id"})
+        self.assertEqual(res.data, {"id": airplane.id})
+
+        res = self.client.get(url, {"fields": "id,image_url"})
+        self.assertEqual(set(res.data), {"id", "image_url"})
+
+        # Unknown names are ignored, naming nothing known selects everything
+        res = self.client.get(url, {"fields": "wingspan"})
+        self.assertEqual(res.data["id"], airplane.id)
+        self.assertIn("image_url", res.data)
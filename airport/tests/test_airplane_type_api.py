@@ -48,7 +48,7 @@ class AuthenticatedAirplaneTypeApiTests(TestCase):
         serializer = AirplaneTypeSerializer(airport_types, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
 
 class AdminAirplaneTypeApiTests(TestCase):
@@ -68,7 +68,7 @@ class AdminAirplaneTypeApiTests(TestCase):
         serializer = AirplaneTypeSerializer(airplane_type, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_create_airplane_type(self):
         sample_airplane_type()
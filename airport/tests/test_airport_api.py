@@ -50,7 +50,7 @@ class AuthenticatedFlightApiTests(TestCase):
         serializer = AirportSerializer(airports, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
 
 class AdminAirportApiTests(TestCase):
@@ -70,7 +70,7 @@ class AdminAirportApiTests(TestCase):
         serializer = AirportSerializer(airport, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_create_airport(self):
         sample_airport()
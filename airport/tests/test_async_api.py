@@ -0,0 +1,170 @@
+from datetime import datetime
+from django.contrib.auth import get_user_model
+from django.test import LiveServerTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from airport.benchmark import LoadTest, get_load_test_paths
+from airport.models import Airport, Route, AirplaneType, Airplane, Flight, Order, Ticket
+
+FLIGHT_URL = reverse("airport:flight-list")
+ASYNC_FLIGHT_URL = reverse("airport:async-flight-list")
+ROUTE_SEARCH_URL = reverse("airport:route-search")
+ASYNC_ROUTE_SEARCH_URL = reverse("airport:async-route-search")
+
+
+def detail_url(flight_id: int):
+    return reverse("airport:flight-detail", args=[flight_id])
+
+
+def async_detail_url(flight_id: int):
+    return reverse("airport:async-flight-detail", args=[flight_id])
+
+
+def sample_flights():
+    geneva = Airport.objects.create(
+        name="Geneva", airport_code="GVA", closest_big_city="Geneva"
+    )
+    valencia = Airport.objects.create(
+        name="Valencia", airport_code="VLC", closest_big_city="Valencia"
+    )
+    route = Route.objects.create(source=geneva, destination=valencia, distance=1200)
+    airplane_type = AirplaneType.objects.create(name="Medium Jets")
+    airplane = Airplane.objects.create(
+        name="Airbus A320", rows=30, seats_in_row=6, airplane_type=airplane_type
+    )
+    return [
+        Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=timezone.make_aware(datetime(2023, 12, day, hour)),
+            arrival_time=timezone.make_aware(datetime(2023, 12, day, hour + 2)),
+        )
+        for day, hour in [(15, 8), (15, 8), (15, 12), (16, 9)]
+    ]
+
+
+class UnauthenticatedAsyncApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(ASYNC_FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("WWW-Authenticate", res)
+
+
+class AuthenticatedAsyncApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@myproject.com",
+            "password",
+        )
+        self.client.force_authenticate(self.user)
+        self.flights = sample_flights()
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=self.flights[0], row=1, seat=1)
+
+    def test_list_matches_viewset(self):
+        res = self.client.get(ASYNC_FLIGHT_URL)
+        expected = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["results"], expected.json()["results"])
+
+    def test_list_filters(self):
+        res = self.client.get(ASYNC_FLIGHT_URL, {"departure": "2023-12-16"})
+
+        self.assertEqual(
+            [flight["id"] for flight in res.json()["results"]], [self.flights[3].id]
+        )
+
+    def test_list_invalid_filter(self):
+        res = self.client.get(ASYNC_FLIGHT_URL, {"departure_after": "yesterday"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("departure_after", res.json())
+
+    def test_list_paginated_by_cursor(self):
+        ids = []
+        url = f"{ASYNC_FLIGHT_URL}?page_size=2"
+        while url:
+            res = self.client.get(url)
+            ids.extend(flight["id"] for flight in res.json()["results"])
+            url = res.json()["next"]
+
+        self.assertEqual(ids, [flight.id for flight in self.flights])
+
+    def test_list_invalid_cursor(self):
+        res = self.client.get(ASYNC_FLIGHT_URL, {"cursor": "garbage"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_detail_matches_viewset(self):
+        res = self.client.get(async_detail_url(self.flights[0].id))
+        expected = self.client.get(detail_url(self.flights[0].id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), expected.json())
+
+    def test_detail_not_found(self):
+        res = self.client.get(async_detail_url(0))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_route_search_matches_viewset(self):
+        params = {"origin": "GVA", "destination": "VLC", "date": "2023-12-15"}
+        res = self.client.get(ASYNC_ROUTE_SEARCH_URL, params)
+        expected = self.client.get(ROUTE_SEARCH_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()), 3)
+        self.assertEqual(res.json(), expected.json())
+
+    async def test_served_under_asgi(self):
+        token = AccessToken.for_user(self.user)
+        res = await self.async_client.get(
+            ASYNC_FLIGHT_URL, headers={"Authorization": f"Bearer {token}"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()["results"]), 4)
+        self.assertEqual(res.json()["results"][0]["tickets_available"], 179)
+
+    def test_post_not_allowed(self):
+        res = self.client.post(ASYNC_FLIGHT_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class LoadTestTests(LiveServerTestCase):
+    def test_load_test_reports_every_endpoint(self):
+        user = get_user_model().objects.create_user("load@myproject.com", "password")
+        sample_flights()
+        load_test = LoadTest(
+            self.live_server_url,
+            str(AccessToken.for_user(user)),
+            concurrency=2,
+            requests=4,
+        )
+
+        results = load_test.run(get_load_test_paths())
+
+        self.assertEqual(
+            [result["name"] for result in results],
+            [
+                "flight-list",
+                "async-flight-list",
+                "flight-detail",
+                "async-flight-detail",
+                "route-search",
+                "async-route-search",
+            ],
+        )
+        for result in results:
+            self.assertEqual(result["errors"], 0, result)
+            self.assertGreater(result["requests_per_second"], 0)
@@ -0,0 +1,60 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from airport.benchmark import percentile
+from airport.models import Flight, Order
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_report(self):
+        out = StringIO()
+        call_command(
+            "benchmark_api",
+            airports=4,
+            airplanes=2,
+            routes=6,
+            flights=3,
+            load_factor=0.05,
+            iterations=2,
+            warmup=0,
+            stdout=out,
+        )
+        report = json.loads(out.getvalue())
+
+        self.assertEqual(report["volumes"]["flights"], 3)
+        self.assertGreater(report["volumes"]["tickets"], 0)
+        names = {endpoint["name"] for endpoint in report["endpoints"]}
+        self.assertTrue(
+            {"flight-list", "flight-detail", "order-list", "crew-detail"} <= names
+        )
+        self.assertTrue(
+            {
+                "async-flight-list",
+                "async-flight-detail",
+                "async-route-search",
+                "db-metrics",
+            }
+            <= names
+        )
+        for endpoint in report["endpoints"]:
+            self.assertEqual(endpoint["status"], 200, endpoint["name"])
+            for key in ("p50_ms", "p95_ms", "queries", "peak_memory_kb"):
+                self.assertIn(key, endpoint)
+
+    def test_seeded_data_rolled_back(self):
+        call_command(
+            "benchmark_api", flights=4, iterations=1, warmup=0, stdout=StringIO()
+        )
+
+        self.assertFalse(Flight.objects.exists())
+        self.assertFalse(Order.objects.exists())
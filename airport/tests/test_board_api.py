@@ -0,0 +1,148 @@
+from datetime import datetime
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from airport.models import Airport, Route, AirplaneType, Airplane, Flight, BoardEntry
+
+ORDER_URL = reverse("airport:order-list")
+
+
+def board_url(airport_id: int):
+    return reverse("airport:airport-board", args=[airport_id])
+
+
+def sample_flight(route, airplane, departure_time, arrival_time):
+    return Flight.objects.create(
+        route=route,
+        airplane=airplane,
+        departure_time=timezone.make_aware(
+            datetime.strptime(departure_time, "%Y-%m-%d %H:%M")
+        ),
+        arrival_time=timezone.make_aware(
+            datetime.strptime(arrival_time, "%Y-%m-%d %H:%M")
+        ),
+    )
+
+
+class AirportBoardApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@myproject.com",
+            "password",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.aberdeen = Airport.objects.create(
+            name="Aberdeen", airport_code="ABZ", closest_big_city="Aberdeen"
+        )
+        self.valencia = Airport.objects.create(
+            name="Valencia", airport_code="VLC", closest_big_city="Valencia"
+        )
+        self.route = Route.objects.create(
+            source=self.aberdeen, destination=self.valencia, distance=1900
+        )
+        airplane_type = AirplaneType.objects.create(name="Medium Jets")
+        self.airplane = Airplane.objects.create(
+            name="Airbus A320", rows=30, seats_in_row=6, airplane_type=airplane_type
+        )
+        self.flight = sample_flight(
+            self.route, self.airplane, "2023-12-15 22:00", "2023-12-16 01:30"
+        )
+
+    def test_departures_board(self):
+        res = self.client.get(
+            board_url(self.aberdeen.id), {"date": "2023-12-15"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["flight"], self.flight.id)
+        self.assertEqual(res.data[0]["airport_code"], "VLC")
+        self.assertEqual(res.data[0]["city"], "Valencia")
+        self.assertEqual(res.data[0]["tickets_available"], 180)
+
+    def test_arrivals_board_uses_arrival_day(self):
+        res = self.client.get(
+            board_url(self.valencia.id),
+            {"direction": "arrivals", "date": "2023-12-16"},
+        )
+        departures = self.client.get(
+            board_url(self.valencia.id), {"date": "2023-12-16"}
+        )
+
+        self.assertEqual([entry["flight"] for entry in res.data], [self.flight.id])
+        self.assertEqual(res.data[0]["airport_code"], "ABZ")
+        self.assertEqual(departures.data, [])
+
+    def test_board_is_one_query(self):
+        for hour in range(10, 20):
+            sample_flight(
+                self.route,
+                self.airplane,
+                f"2023-12-15 {hour}:00",
+                f"2023-12-15 {hour}:30",
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                board_url(self.aberdeen.id), {"date": "2023-12-15"}
+            )
+
+        self.assertEqual(len(res.data), 11)
+        # airport lookup and the board range scan
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("JOIN", queries[1]["sql"])
+
+    def test_booking_updates_availability(self):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "flight": self.flight.id},
+                {"row": 1, "seat": 2, "flight": self.flight.id},
+            ]
+        }
+        self.client.post(ORDER_URL, payload, format="json")
+
+        res = self.client.get(
+            board_url(self.aberdeen.id), {"date": "2023-12-15"}
+        )
+
+        self.assertEqual(res.data[0]["tickets_available"], 178)
+
+    def test_board_follows_changes(self):
+        self.valencia.closest_big_city = "València"
+        self.valencia.save()
+        self.flight.departure_time = timezone.make_aware(
+            datetime(2023, 12, 15, 21, 0)
+        )
+        self.flight.save()
+
+        entry = BoardEntry.objects.get(
+            flight=self.flight, direction=BoardEntry.DEPARTURE
+        )
+        self.assertEqual(entry.city, "València")
+        self.assertEqual(entry.scheduled_time, self.flight.departure_time)
+
+        self.flight.delete()
+        self.assertFalse(BoardEntry.objects.exists())
+
+    def test_invalid_direction(self):
+        res = self.client.get(board_url(self.aberdeen.id), {"direction": "up"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_board_command(self):
+        BoardEntry.objects.all().delete()
+        out = StringIO()
+
+        call_command("rebuild_board", stdout=out)
+
+        self.assertEqual(BoardEntry.objects.count(), 2)
+        self.assertIn("Wrote 2 board entries", out.getvalue())
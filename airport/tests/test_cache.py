@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.cache import (
+    MISSING,
+    LRUCache,
+    check_shared_aliases,
+    get_response_cache,
+)
+from airport.models import Airport, Route
+
+AIRPORT_URL = reverse("airport:airport-list")
+ROUTE_URL = reverse("airport:route-list")
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_least_recently_used_entry_evicted(self):
+        lru = LRUCache(max_entries=2, timeout=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIs(lru.get("b"), MISSING)
+        self.assertEqual(lru.get("c"), 3)
+
+    def test_entry_expires(self):
+        lru = LRUCache(max_entries=2, timeout=60)
+        with mock.patch("airport.cache.time.monotonic", return_value=0):
+            lru.set("a", 1)
+        with mock.patch("airport.cache.time.monotonic", return_value=61):
+            self.assertIs(lru.get("a"), MISSING)
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "shared": {"BACKEND": "django.core.cache.backends.redis.RedisCache"},
+    }
+)
+class SharedAliasCheckTests(SimpleTestCase):
+    def test_single_worker_may_use_local_cache(self):
+        with mock.patch.dict("os.environ", {"WEB_CONCURRENCY": "1"}):
+            check_shared_aliases()
+
+    def test_workers_refuse_local_version_cache(self):
+        with mock.patch.dict("os.environ", {"WEB_CONCURRENCY": "4"}):
+            with self.assertRaises(ImproperlyConfigured):
+                check_shared_aliases()
+
+    def test_workers_accept_shared_version_cache(self):
+        conf = {**settings.AIRPORT_CACHE, "VERSION_ALIAS": "shared"}
+        with self.settings(AIRPORT_CACHE=conf), mock.patch.dict(
+            "os.environ", {"WEB_CONCURRENCY": "4"}
+        ):
+            check_shared_aliases()
+
+    def test_workers_refuse_local_pin_cache(self):
+        conf = {**settings.AIRPORT_CACHE, "VERSION_ALIAS": "shared"}
+        with self.settings(
+            AIRPORT_CACHE=conf,
+            DATABASE_REPLICAS=["replica_1"],
+            REPLICA_PIN_ALIAS="default",
+        ), mock.patch.dict("os.environ", {"WEB_CONCURRENCY": "4"}):
+            with self.assertRaises(ImproperlyConfigured):
+                check_shared_aliases()
+
+
+class ReferenceDataCacheApiTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        get_response_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@myproject.com",
+            "password",
+        )
+        self.client.force_authenticate(self.user)
+        self.airport1 = Airport.objects.create(
+            name="Aberdeen", airport_code="ABZ", closest_big_city="Aberdeen"
+        )
+        self.airport2 = Airport.objects.create(
+            name="Valencia", airport_code="VLC", closest_big_city="Valencia"
+        )
+
+    def test_list_served_from_cache(self):
+        stats = get_response_cache().stats()
+
+        res = self.client.get(AIRPORT_URL)
+        self.assertEqual(res["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached["X-Cache"], "HIT")
+        self.assertEqual(cached.data, res.data)
+        self.assertEqual(get_response_cache().stats()["hits"], stats["hits"] + 1)
+        self.assertEqual(
+            get_response_cache().stats()["misses"], stats["misses"] + 1
+        )
+
+    def test_cache_invalidated_on_write(self):
+        self.client.get(AIRPORT_URL)
+
+        Airport.objects.create(
+            name="Geneva", airport_code="GVA", closest_big_city="Geneva"
+        )
+        res = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(len(res.data["results"]), 3)
+
+    def test_route_cache_invalidated_on_airport_write(self):
+        Route.objects.create(
+            source=self.airport1, destination=self.airport2, distance=500
+        )
+        self.client.get(ROUTE_URL)
+
+        self.airport1.closest_big_city = "Dyce"
+        self.airport1.save()
+        res = self.client.get(ROUTE_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertIn("Dyce", res.data["results"][0]["source"])
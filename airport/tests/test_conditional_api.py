@@ -0,0 +1,110 @@
+import time
+from datetime import date, time as clock, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import FlightSchedule, Order, Ticket
+from airport.tests.test_flight_api import sample_flight1
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+class ConditionalGetApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@myproject.com",
+            "password",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight1()
+
+    def test_not_modified_without_queries(self):
+        res = self.client.get(FLIGHT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("ETag", res)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since(self):
+        later = time.time_ns() + 2 * 10**9
+        with mock.patch("airport.conditional.time.time_ns", return_value=later):
+            res = self.client.get(FLIGHT_URL)
+            res = self.client.get(
+                FLIGHT_URL, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"]
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_no_last_modified_within_write_second(self):
+        res = self.client.get(FLIGHT_URL)
+        self.assertNotIn("Last-Modified", res)
+
+        res = self.client.get(
+            FLIGHT_URL, HTTP_IF_MODIFIED_SINCE="Wed, 01 Jan 2070 00:00:00 GMT"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_etag_changes_on_ticket_write(self):
+        etag = self.client.get(FLIGHT_URL)["ETag"]
+
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=self.flight, row=1, seat=1)
+        res = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_etag_changes_on_booking(self):
+        etag = self.client.get(FLIGHT_URL)["ETag"]
+
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 1}]},
+            format="json",
+        )
+        res = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_etag_differs_between_users(self):
+        etag = self.client.get(ORDER_URL)["ETag"]
+
+        other = get_user_model().objects.create_user(
+            "other@myproject.com",
+            "password",
+        )
+        self.client.force_authenticate(other)
+        res = self.client.get(ORDER_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_expanded_response_revalidates_on_nested_write(self):
+        schedule = FlightSchedule.objects.create(
+            route=self.flight.route,
+            airplane=self.flight.airplane,
+            weekdays="1",
+            departure=clock(8, 30),
+            duration=timedelta(hours=2),
+            valid_from=date(2030, 1, 1),
+            valid_until=date(2030, 12, 31),
+        )
+        url = reverse("airport:flightschedule-detail", args=[schedule.pk])
+        etag = self.client.get(url, {"expand": "route"})["ETag"]
+
+        route = schedule.route
+        route.distance = 2500
+        route.save()
+        res = self.client.get(url, {"expand": "route"}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["route"]["distance"], 2500)
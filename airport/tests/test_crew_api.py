@@ -1,12 +1,26 @@
+import tempfile
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
-from airport.models import Crew
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Route,
+)
 from airport.serializers import CrewSerializer
 
 CREW_URL = reverse("airport:crew-list")
+CREW_IMPORT_URL = reverse("airport:crew-bulk-import")
+CREW_AVAILABLE_URL = reverse("airport:crew-available")
 
 
 def sample_crew(**params):
@@ -54,7 +68,7 @@ class AdminCrewApiTests(TestCase):
         serializer = CrewSerializer(crew, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_create_crew(self):
         sample_crew()
@@ -65,3 +79,167 @@ class AdminCrewApiTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data["first_name"], payload["first_name"])
         self.assertEqual(response.data["last_name"], payload["last_name"])
+
+    def test_create_duplicate_crew(self):
+        sample_crew()
+
+        payload = {"first_name": "Alice", "last_name": "Smith"}
+        response = self.client.post(CREW_URL, payload)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Crew.objects.count(), 1)
+
+    def test_full_name_unique_in_database(self):
+        sample_crew()
+        sample_crew(last_name="Jones")
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            sample_crew()
+
+    def test_import_crew(self):
+        sample_crew()
+        payload = [
+            {"first_name": "Alice", "last_name": "Smith"},
+            {"first_name": "Victory", "last_name": "Brent"},
+            {"first_name": "Victory", "last_name": "Brent"},
+            *(
+                {"first_name": f"Pilot{i}", "last_name": "Seed"}
+                for i in range(50)
+            ),
+        ]
+
+        with self.assertNumQueries(4):
+            response = self.client.post(CREW_IMPORT_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.data, {"received": 52, "created": 51, "existing": 1}
+        )
+        self.assertEqual(Crew.objects.count(), 52)
+
+    def test_import_only_existing_crew(self):
+        sample_crew()
+        payload = [{"first_name": "Alice", "last_name": "Smith"}]
+
+        response = self.client.post(CREW_IMPORT_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data, {"received": 1, "created": 0, "existing": 1}
+        )
+
+    def test_import_crew_invalid_rows(self):
+        payload = [
+            {"first_name": "Victory", "last_name": "Brent"},
+            {"first_name": "", "last_name": "Brent"},
+        ]
+
+        response = self.client.post(CREW_IMPORT_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("first_name", response.data[1])
+        self.assertFalse(Crew.objects.exists())
+
+
+class CrewAvailabilityApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = get_user_model().objects.create_user(
+            email="admin@admin.com", password="1qazxcde3", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        route = Route.objects.create(
+            source=Airport.objects.create(
+                name="Aberdeen", airport_code="ABZ", closest_big_city="Aberdeen"
+            ),
+            destination=Airport.objects.create(
+                name="Valencia", airport_code="VLC", closest_big_city="Valencia"
+            ),
+            distance=500,
+        )
+        airplane = Airplane.objects.create(
+            name="Boeing 777X",
+            rows=10,
+            seats_in_row=2,
+            airplane_type=AirplaneType.objects.create(name="Large Jets"),
+        )
+        self.busy = sample_crew(first_name="Busy")
+        self.earlier = sample_crew(first_name="Earlier")
+        self.free = sample_crew(first_name="Free")
+        for crew, departure_time, arrival_time in [
+            (self.busy, "2023-12-17T08:00:00Z", "2023-12-17T11:00:00Z"),
+            (self.busy, "2023-12-17T12:00:00Z", "2023-12-17T16:00:00Z"),
+            (self.earlier, "2023-12-17T08:00:00Z", "2023-12-17T10:00:00Z"),
+        ]:
+            flight = Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=departure_time,
+                arrival_time=arrival_time,
+            )
+            flight.crew.add(crew)
+
+    def available(self, start, end):
+        response = self.client.get(CREW_AVAILABLE_URL, {"start": start, "end": end})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [member["first_name"] for member in response.data["results"]]
+
+    def test_available_crew(self):
+        self.assertEqual(
+            self.available("2023-12-17T10:00:00Z", "2023-12-17T13:00:00Z"),
+            ["Earlier", "Free"],
+        )
+        self.assertEqual(
+            self.available("2023-12-17T09:00:00Z", "2023-12-17T09:30:00Z"),
+            ["Free"],
+        )
+        self.assertEqual(
+            self.available("2023-12-17T16:00:00Z", "2023-12-17T20:00:00Z"),
+            ["Busy", "Earlier", "Free"],
+        )
+
+    def test_crew_removed_from_flight_is_available(self):
+        flight = self.earlier.flights.get()
+        flight.crew.remove(self.earlier)
+
+        self.assertEqual(
+            self.available("2023-12-17T09:00:00Z", "2023-12-17T09:30:00Z"),
+            ["Earlier", "Free"],
+        )
+
+    def test_invalid_interval(self):
+        response = self.client.get(
+            CREW_AVAILABLE_URL,
+            {"start": "2023-12-17T10:00:00Z", "end": "2023-12-17T09:00:00Z"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ImportCrewCommandTests(TestCase):
+    def write_csv(self, content):
+        crew_file = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        self.addCleanup(crew_file.close)
+        crew_file.write(content)
+        crew_file.flush()
+        return crew_file.name
+
+    def test_import_crew(self):
+        sample_crew()
+        path = self.write_csv(
+            "first_name,last_name\nAlice,Smith\nVictory,Brent\nOlga,Brent\n"
+        )
+        out = StringIO()
+
+        call_command("import_crew", path, "--batch-size", "1", stdout=out)
+
+        self.assertIn("Added 2 of 3 crew members, 1 already existed", out.getvalue())
+        self.assertEqual(Crew.objects.count(), 3)
+
+    def test_import_crew_reports_line(self):
+        path = self.write_csv("first_name,last_name\nAlice,Smith\n,Brent\n")
+
+        with self.assertRaisesMessage(CommandError, "line 3"):
+            call_command("import_crew", path)
+        self.assertFalse(Crew.objects.exists())
@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.db_metrics import (
+    ConnectionMetrics,
+    DatabaseUse,
+    _current_use,
+    instrument,
+    metrics,
+)
+
+DB_METRICS_URL = reverse("airport:db-metrics")
+AIRPORT_URL = reverse("airport:airport-list")
+
+
+class ConnectionMetricsTests(TestCase):
+    def test_stats(self):
+        connection_metrics = ConnectionMetrics()
+        connection_metrics.record(None)
+        connection_metrics.record(None)
+        connection_metrics.record(4.0)
+        connection_metrics.record(8.0)
+
+        stats = connection_metrics.stats()
+
+        self.assertEqual(stats["requests"], 4)
+        self.assertEqual(stats["reused"], 2)
+        self.assertEqual(stats["opened"], 2)
+        self.assertEqual(stats["reuse_ratio"], 0.5)
+        self.assertEqual(stats["connect_ms_mean"], 6.0)
+        self.assertEqual(stats["connect_ms_max"], 8.0)
+
+    def test_stats_empty(self):
+        stats = ConnectionMetrics().stats()
+
+        self.assertIsNone(stats["reuse_ratio"])
+        self.assertIsNone(stats["connect_ms_mean"])
+
+    def test_instrument_times_connects_lazily(self):
+        backend = mock.Mock(execute_wrappers=[], _airport_metrics=False)
+        connect = backend.connect
+        instrument(backend)
+        instrument(backend)
+        execute = mock.Mock()
+
+        use = DatabaseUse()
+        token = _current_use.set(use)
+        try:
+            backend.execute_wrappers[0](execute, "SELECT 1", None, False, {})
+            self.assertEqual(use.opened, 0)
+            backend.connect()
+        finally:
+            _current_use.reset(token)
+
+        connect.assert_called_once_with()
+        self.assertEqual(len(backend.execute_wrappers), 1)
+        self.assertEqual(use.queries, 1)
+        self.assertEqual(use.opened, 1)
+        self.assertGreaterEqual(use.connect_ms, 0)
+
+
+class DatabaseMetricsApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@myproject.com",
+            "password",
+        )
+        self.admin_user = get_user_model().objects.create_user(
+            email="admin@admin.com", password="1qazxcde3", is_staff=True
+        )
+        metrics.reset()
+
+    def test_server_timing_header(self):
+        self.client.force_authenticate(self.user)
+        res = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(res["Server-Timing"], 'db-connect;desc="reused";dur=0')
+        self.assertEqual(metrics.stats()["reused"], 1)
+
+    def test_request_without_queries_not_counted(self):
+        res = self.client.get("/missing/")
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("Server-Timing", res)
+        self.assertEqual(metrics.stats()["requests"], 0)
+
+    def test_metrics_forbidden_for_non_admin(self):
+        self.client.force_authenticate(self.user)
+        res = self.client.get(DB_METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics(self):
+        self.client.force_authenticate(self.admin_user)
+        self.client.get(AIRPORT_URL)
+        res = self.client.get(DB_METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # the metrics view itself runs no query on SQLite and is not counted
+        self.assertEqual(res.data["connections"]["requests"], 1)
+        self.assertIn("conn_max_age", res.data["settings"])
+        self.assertTrue(res.data["settings"]["server_side_cursors"])
@@ -0,0 +1,200 @@
+import time
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.cache import get_response_cache
+from airport.db_router import (
+    ReplicaRouter,
+    _replica_reads,
+    is_pinned,
+    pin_to_primary,
+    replica_may_lag,
+)
+from airport.models import Airport
+from airport.route_graph import RouteGraph
+
+AIRPORT_URL = reverse("airport:airport-list")
+
+
+class ReplicaReadsMixin:
+    def mark_replica_reads(self):
+        token = _replica_reads.set(True)
+        self.addCleanup(_replica_reads.reset, token)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaRouterTests(ReplicaReadsMixin, TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_primary_by_default(self):
+        self.assertIsNone(self.router.db_for_read(Airport))
+
+    def test_marked_reads_go_to_replica(self):
+        self.mark_replica_reads()
+
+        self.assertEqual(self.router.db_for_read(Airport), "replica_1")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_marked_reads_without_replicas_go_to_primary(self):
+        self.mark_replica_reads()
+
+        self.assertIsNone(self.router.db_for_read(Airport))
+
+    def test_writes_go_to_primary(self):
+        self.mark_replica_reads()
+
+        self.assertEqual(self.router.db_for_write(Airport), "default")
+
+    def test_route_graph_loads_from_primary(self):
+        Airport.objects.create(
+            name="Geneva", airport_code="GVA", closest_big_city="Geneva"
+        )
+        self.mark_replica_reads()
+
+        # replica_1 is not configured, reading from it would raise
+        self.assertIsNotNone(RouteGraph().airport_id("GVA"))
+
+    def test_no_migrations_on_replicas(self):
+        self.assertFalse(self.router.allow_migrate("replica_1", "airport"))
+        self.assertIsNone(self.router.allow_migrate("default", "airport"))
+
+    def test_pinning(self):
+        user = get_user_model().objects.create_user("test@myproject.com", "password")
+        self.assertFalse(is_pinned(user))
+
+        pin_to_primary(user)
+
+        self.assertTrue(is_pinned(user))
+
+    def test_replica_may_lag(self):
+        now = time.time_ns()
+        self.assertFalse(replica_may_lag([now]))
+
+        self.mark_replica_reads()
+
+        self.assertTrue(replica_may_lag([now - 10**9, now]))
+        lag = settings.REPLICA_LAG_SECONDS * 10**9
+        self.assertFalse(replica_may_lag([now - lag - 10**9]))
+
+
+# The default database stands in for a replica: the routing decisions are
+# recorded while every query still runs inside the test transaction
+@override_settings(DATABASE_REPLICAS=["default"])
+class ReplicaReadApiTests(TestCase):
+    def setUp(self):
+        caches[settings.AIRPORT_CACHE["VERSION_ALIAS"]].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@admin.com", password="1qazxcde3", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        Airport.objects.create(
+            name="Geneva", airport_code="GVA", closest_big_city="Geneva"
+        )
+
+    def read_aliases(self, method, url, **kwargs) -> list:
+        """Databases the router picked for the reads of one request"""
+        aliases = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            alias = db_for_read(router, model, **hints)
+            aliases.append(alias)
+            return alias
+
+        with mock.patch.object(ReplicaRouter, "db_for_read", record):
+            res = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(res.status_code, 400)
+        return aliases
+
+    def test_safe_requests_read_from_replica(self):
+        aliases = self.read_aliases("get", AIRPORT_URL)
+
+        self.assertTrue(aliases)
+        self.assertEqual(set(aliases), {"default"})
+        self.assertFalse(_replica_reads.get())
+
+    def test_reads_after_write_go_to_primary(self):
+        self.read_aliases(
+            "post",
+            AIRPORT_URL,
+            data={
+                "name": "Zurich",
+                "airport_code": "ZRH",
+                "closest_big_city": "Zurich",
+            },
+        )
+
+        self.assertTrue(is_pinned(self.user))
+        aliases = self.read_aliases("get", AIRPORT_URL)
+        self.assertTrue(aliases)
+        self.assertEqual(set(aliases), {None})
+
+    def test_no_validators_while_replica_may_lag(self):
+        res = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", res)
+        self.assertNotIn("Last-Modified", res)
+
+
+class ReplicaCacheApiTests(TransactionTestCase):
+    def setUp(self):
+        caches[settings.AIRPORT_CACHE["VERSION_ALIAS"]].clear()
+        get_response_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@myproject.com",
+            "password",
+        )
+        self.client.force_authenticate(self.user)
+
+    # Set on the test only, as the router keeps flush() off replicas
+    @override_settings(DATABASE_REPLICAS=["default"])
+    def test_no_caching_while_replica_may_lag(self):
+        Airport.objects.create(
+            name="Geneva", airport_code="GVA", closest_big_city="Geneva"
+        )
+
+        self.assertEqual(self.client.get(AIRPORT_URL)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(AIRPORT_URL)["X-Cache"], "MISS")
+
+        with override_settings(REPLICA_LAG_SECONDS=0):
+            self.client.get(AIRPORT_URL)
+            self.assertEqual(self.client.get(AIRPORT_URL)["X-Cache"], "HIT")
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "needs POSTGRES_REPLICA_HOSTS, see README")
+class ReplicaDatabaseTests(TransactionTestCase):
+    databases = {"default", *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        caches[settings.AIRPORT_CACHE["VERSION_ALIAS"]].clear()
+        get_response_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@admin.com", password="1qazxcde3", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_read_your_writes(self):
+        res = self.client.post(
+            AIRPORT_URL,
+            {"name": "Zurich", "airport_code": "ZRH", "closest_big_city": "Zurich"},
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [airport["airport_code"] for airport in res.data["results"]], ["ZRH"]
+        )
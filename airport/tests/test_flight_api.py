@@ -1,21 +1,49 @@
 import datetime
 from datetime import datetime
+import base64
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+
 import pytz
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
-from airport.models import Flight, Route, Airplane, AirplaneType, Crew, Airport
+from airport.models import (
+    Flight,
+    Route,
+    Airplane,
+    AirplaneType,
+    Crew,
+    Airport,
+    Order,
+    Ticket,
+    BoardEntry,
+    CrewAssignment,
+)
+from airport.crew_schedule import CREW_OVERLAP_CONSTRAINT, refresh_crew_assignments
 from airport.serializers import FlightListSerializer, FlightDetailSerializer
 
 FLIGHT_URL = reverse("airport:flight-list")
+FLIGHT_IMPORT_URL = reverse("airport:flight-bulk-import")
 
 
 def detail_url(flight_id: int):
     return reverse("airport:flight-detail", args=[flight_id])
 
 
+def seat_map_url(flight_id: int):
+    return reverse("airport:flight-seat-map", args=[flight_id])
+
+
 def sample_flight1(**params):
     Airport1 = Airport.objects.create(
         name="Geneva", airport_code="GTR", closest_big_city="Geneva"
@@ -111,7 +139,7 @@ class AuthenticatedFlightApiTests(TestCase):
         serializer = FlightListSerializer(flights, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_filter_flight_by_departure(self):
         flight1 = sample_flight1()
@@ -124,9 +152,9 @@ class AuthenticatedFlightApiTests(TestCase):
         serializer2 = FlightListSerializer(flight2)
         serializer3 = FlightListSerializer(flight3)
 
-        self.assertNotIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
-        self.assertIn(serializer3.data, res.data)
+        self.assertNotIn(serializer1.data, res.data["results"])
+        self.assertNotIn(serializer2.data, res.data["results"])
+        self.assertIn(serializer3.data, res.data["results"])
 
     def test_filter_flight_by_arrival(self):
         flight1 = sample_flight1()
@@ -139,9 +167,128 @@ class AuthenticatedFlightApiTests(TestCase):
         serializer2 = FlightListSerializer(flight2)
         serializer3 = FlightListSerializer(flight3)
 
-        self.assertNotIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
-        self.assertIn(serializer3.data, res.data)
+        self.assertNotIn(serializer1.data, res.data["results"])
+        self.assertNotIn(serializer2.data, res.data["results"])
+        self.assertIn(serializer3.data, res.data["results"])
+
+    def test_list_flight_tickets_available(self):
+        flight = sample_flight1()
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=flight, row=1, seat=1)
+        Ticket.objects.create(order=order, flight=flight, row=1, seat=2)
+
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"][0]["tickets_available"], flight.airplane.capacity - 2
+        )
+        flight.refresh_from_db()
+        self.assertEqual(flight.seats_sold, 2)
+        self.assertEqual(
+            Flight.objects.with_tickets_available().get(pk=flight.pk).tickets_available,
+            flight.tickets_available,
+        )
+
+    def test_list_flight_query_count_independent_of_tickets(self):
+        flight = sample_flight1()
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=flight, row=1, seat=1)
+
+        with CaptureQueriesContext(connection) as few_tickets:
+            self.client.get(FLIGHT_URL)
+
+        for row in range(2, 12):
+            Ticket.objects.create(order=order, flight=flight, row=row, seat=1)
+
+        with CaptureQueriesContext(connection) as many_tickets:
+            self.client.get(FLIGHT_URL)
+
+        self.assertEqual(len(few_tickets), len(many_tickets))
+
+    def test_list_flight_paginated_by_cursor(self):
+        flight1 = sample_flight1()
+        flight2 = sample_flight2()
+        flight3 = sample_flight3()
+
+        res = self.client.get(FLIGHT_URL, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]],
+            [flight2.id, flight1.id],
+        )
+        self.assertIsNotNone(res.data["next"])
+
+        res = self.client.get(res.data["next"])
+
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]], [flight3.id]
+        )
+        self.assertIsNone(res.data["next"])
+
+    def test_filter_flight_by_departure_range(self):
+        flight1 = sample_flight1()
+        flight2 = sample_flight2()
+        flight3 = sample_flight3()
+
+        res = self.client.get(
+            FLIGHT_URL,
+            {
+                "departure_after": "2023-12-14T10:07:09",
+                "departure_before": "2023-12-17T10:07:09",
+            },
+        )
+
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]],
+            [flight2.id, flight1.id],
+        )
+        self.assertNotIn(flight3.id, [flight["id"] for flight in res.data["results"]])
+
+    def test_filter_flight_by_departure_uses_local_day(self):
+        late = sample_flight1(
+            departure_time="2023-12-17 23:30:00", arrival_time="2023-12-18 02:00:00"
+        )
+        after_midnight = sample_flight3(
+            departure_time="2023-12-18 00:30:00", arrival_time="2023-12-18 03:00:00"
+        )
+
+        res = self.client.get(FLIGHT_URL, {"departure": "2023-12-17"})
+        ids = [flight["id"] for flight in res.data["results"]]
+
+        self.assertIn(late.id, ids)
+        self.assertNotIn(after_midnight.id, ids)
+
+    def test_filter_flight_by_source_and_destination(self):
+        flight1 = sample_flight1()
+        flight2 = sample_flight2()
+        flight3 = sample_flight3()
+
+        res = self.client.get(
+            FLIGHT_URL,
+            {"source": f"{flight1.route.source_id},{flight3.route.source_id}"},
+        )
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]],
+            [flight1.id, flight3.id],
+        )
+
+        res = self.client.get(
+            FLIGHT_URL, {"destination": flight2.route.destination_id}
+        )
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]], [flight2.id]
+        )
+
+    def test_filter_flight_invalid_params(self):
+        res = self.client.get(
+            FLIGHT_URL, {"departure": "17.12.2023", "source": "Geneva"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("departure", res.data)
+        self.assertIn("source", res.data)
 
     def test_retrieve_flight_detail(self):
         flight1 = sample_flight1()
@@ -153,6 +300,79 @@ class AuthenticatedFlightApiTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_list_flight_sparse_fields(self):
+        flight1 = sample_flight1()
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(FLIGHT_URL, {"fields": "id,departure_time"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"],
+            [{"id": flight1.id, "departure_time": "2023-12-15 13:07:09"}],
+        )
+        flight_query = next(
+            query["sql"] for query in queries if "airport_flight" in query["sql"]
+        )
+        self.assertNotIn("airport_airport", flight_query)
+        self.assertNotIn("airport_airplane", flight_query)
+
+    def test_retrieve_flight_sparse_nested_fields(self):
+        flight1 = sample_flight1()
+
+        res = self.client.get(
+            detail_url(flight1.id), {"fields": "id,route.distance,airplane.name"}
+        )
+
+        self.assertEqual(
+            res.data,
+            {
+                "id": flight1.id,
+                "route": {"distance": 1900},
+                "airplane": {"name": "Boeing 777X"},
+            },
+        )
+
+    def test_retrieve_flight_route_joins_expanded_airports_only(self):
+        flight1 = sample_flight1()
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(detail_url(flight1.id), {"fields": "route"})
+
+        self.assertEqual(res.data["route"]["source"], flight1.route.source_id)
+        flight_query = next(
+            query["sql"] for query in queries if "airport_flight" in query["sql"]
+        )
+        self.assertIn("airport_route", flight_query)
+        self.assertNotIn("airport_airport", flight_query)
+
+    def test_retrieve_flight_unknown_fields_ignored(self):
+        flight1 = sample_flight1()
+
+        res = self.client.get(detail_url(flight1.id), {"fields": "gate"})
+
+        self.assertEqual(res.data["id"], flight1.id)
+        self.assertIn("route", res.data)
+
+    def test_retrieve_flight_expanded(self):
+        flight1 = sample_flight1()
+        crew = Crew.objects.create(first_name="Crew1", last_name="Member1")
+        flight1.crew.add(crew)
+
+        res = self.client.get(
+            detail_url(flight1.id),
+            {"fields": "crew,route", "expand": "crew,route.source"},
+        )
+
+        self.assertEqual(
+            res.data["crew"],
+            [{"id": crew.id, "first_name": "Crew1", "last_name": "Member1"}],
+        )
+        self.assertEqual(res.data["route"]["source"]["airport_code"], "GTR")
+        self.assertEqual(
+            res.data["route"]["destination"], flight1.route.destination_id
+        )
+
     def test_create_flight_forbidden(self):
         Airport1 = Airport.objects.create(
             name="Aberdeen", airport_code="ABZ", closest_big_city="Aberdeen"
@@ -185,6 +405,98 @@ class AuthenticatedFlightApiTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
 
+class FlightIndexTests(TestCase):
+    def setUp(self):
+        self.flight = sample_flight1()
+
+    def explain(self, queryset):
+        if connection.vendor == "postgresql":
+            # Tiny test tables are cheaper to scan, make the planner show its index
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_route_departure_range_uses_index(self):
+        plan = self.explain(
+            Flight.objects.filter(
+                route=self.flight.route,
+                departure_time__gte="2023-12-15 00:00:00",
+                departure_time__lt="2023-12-16 00:00:00",
+            )
+        )
+
+        self.assertIn("airport_fli_route_i_baa295_idx", plan)
+
+    def test_departure_day_filter_is_sargable(self):
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "testpass")
+        )
+        with CaptureQueriesContext(connection) as queries:
+            res = client.get(FLIGHT_URL, {"departure": "2023-12-15"})
+
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]], [self.flight.id]
+        )
+        flight_query = next(
+            query["sql"] for query in queries if "airport_flight" in query["sql"]
+        )
+        self.assertIn('"airport_flight"."departure_time" >=', flight_query)
+        self.assertNotIn("cast_date", flight_query)
+        self.assertNotIn("::date", flight_query)
+
+
+class FlightSeatMapApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@myproject.com",
+            "password",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.flight = sample_flight1()
+        self.order = Order.objects.create(user=self.user)
+
+    def test_seat_map(self):
+        Ticket.objects.create(order=self.order, flight=self.flight, row=1, seat=1)
+        Ticket.objects.create(order=self.order, flight=self.flight, row=2, seat=2)
+
+        res = self.client.get(seat_map_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 250)
+        self.assertEqual(res.data["seats_in_row"], 2)
+        self.assertEqual(res.data["taken"], 2)
+        self.assertEqual(res.data["available"], 498)
+        bits = base64.b64decode(res.data["seats"])
+        self.assertEqual(len(bits), 63)
+        self.assertEqual(bits[0], 0b10010000)
+        self.assertFalse(any(bits[1:]))
+
+    def test_seat_map_cache_invalidated_on_ticket_write(self):
+        res = self.client.get(seat_map_url(self.flight.id))
+        self.assertEqual(res.data["taken"], 0)
+
+        ticket = Ticket.objects.create(
+            order=self.order, flight=self.flight, row=1, seat=1
+        )
+        res = self.client.get(seat_map_url(self.flight.id))
+        self.assertEqual(res.data["taken"], 1)
+
+        self.client.post(
+            reverse("airport:order-list"),
+            {"tickets": [{"flight": self.flight.id, "row": 3, "seat": 1}]},
+            format="json",
+        )
+        res = self.client.get(seat_map_url(self.flight.id))
+        self.assertEqual(res.data["taken"], 2)
+
+        ticket.delete()
+        res = self.client.get(seat_map_url(self.flight.id))
+        self.assertEqual(res.data["taken"], 1)
+
+
 class AdminFlightApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -270,3 +582,303 @@ class AdminFlightApiTests(TestCase):
         response = self.client.delete(url)
 
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def crew_flight_payload(self, departure_time, arrival_time, crew):
+        route = Route.objects.first() or Route.objects.create(
+            source=Airport.objects.create(
+                name="Aberdeen", airport_code="ABZ", closest_big_city="Aberdeen"
+            ),
+            destination=Airport.objects.create(
+                name="Valencia", airport_code="VLC", closest_big_city="Valencia"
+            ),
+            distance=500,
+        )
+        airplane = Airplane.objects.first() or Airplane.objects.create(
+            name="McDonnell Douglas DC-10",
+            rows=180,
+            seats_in_row=2,
+            airplane_type=AirplaneType.objects.create(name="Medium Jets"),
+        )
+        return {
+            "route": route.pk,
+            "airplane": airplane.pk,
+            "departure_time": departure_time,
+            "arrival_time": arrival_time,
+            "crew": [member.pk for member in crew],
+        }
+
+    def test_create_flight_with_busy_crew(self):
+        crew_1 = Crew.objects.create(first_name="Crew1", last_name="Member1")
+        crew_2 = Crew.objects.create(first_name="Crew2", last_name="Member2")
+        crew_3 = Crew.objects.create(first_name="Crew3", last_name="Member3")
+        payload = self.crew_flight_payload(
+            "2023-12-17 10:00:00", "2023-12-17 16:00:00", [crew_1, crew_2]
+        )
+        self.assertEqual(
+            self.client.post(FLIGHT_URL, payload).status_code,
+            status.HTTP_201_CREATED,
+        )
+
+        payload = self.crew_flight_payload(
+            "2023-12-17 15:00:00", "2023-12-17 18:00:00", [crew_2, crew_3]
+        )
+        response = self.client.post(FLIGHT_URL, payload)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["crew"], ["Crew2 Member2 is on another flight at that time"]
+        )
+        self.assertEqual(Flight.objects.count(), 1)
+
+    def test_create_flight_after_crew_landed(self):
+        crew = [
+            Crew.objects.create(first_name="Crew1", last_name="Member1"),
+            Crew.objects.create(first_name="Crew2", last_name="Member2"),
+        ]
+        for departure_time, arrival_time in [
+            ("2023-12-17 10:00:00", "2023-12-17 16:00:00"),
+            ("2023-12-17 16:00:00", "2023-12-17 18:00:00"),
+            ("2023-12-17 06:00:00", "2023-12-17 10:00:00"),
+        ]:
+            payload = self.crew_flight_payload(departure_time, arrival_time, crew)
+            response = self.client.post(FLIGHT_URL, payload)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(crew[0].assignments.count(), 3)
+
+    def test_update_flight_with_busy_crew(self):
+        crew = [
+            Crew.objects.create(first_name="Crew1", last_name="Member1"),
+            Crew.objects.create(first_name="Crew2", last_name="Member2"),
+        ]
+        first = self.client.post(
+            FLIGHT_URL,
+            self.crew_flight_payload(
+                "2023-12-17 10:00:00", "2023-12-17 16:00:00", crew
+            ),
+        ).data["id"]
+        second = self.client.post(
+            FLIGHT_URL,
+            self.crew_flight_payload(
+                "2023-12-18 10:00:00", "2023-12-18 16:00:00", crew
+            ),
+        ).data["id"]
+
+        # A flight never conflicts with its own assignments
+        response = self.client.patch(
+            detail_url(first), {"arrival_time": "2023-12-17 17:00:00"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            crew[0].assignments.get(flight_id=first).arrival_time.hour,
+            Flight.objects.get(pk=first).arrival_time.hour,
+        )
+
+        response = self.client.patch(
+            detail_url(second), {"departure_time": "2023-12-17 12:00:00"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("crew", response.data)
+
+    def test_create_flight_arriving_before_departure(self):
+        crew = [
+            Crew.objects.create(first_name="Crew1", last_name="Member1"),
+            Crew.objects.create(first_name="Crew2", last_name="Member2"),
+        ]
+        payload = self.crew_flight_payload(
+            "2023-12-17 16:00:00", "2023-12-17 10:00:00", crew
+        )
+
+        response = self.client.post(FLIGHT_URL, payload)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("arrival_time", response.data)
+
+
+class FlightImportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = get_user_model().objects.create_user(
+            email="admin@admin.com", password="1qazxcde3", is_staff=True
+        )
+        self.client.force_authenticate(self.admin_user)
+        self.route = Route.objects.create(
+            source=Airport.objects.create(
+                name="Aberdeen", airport_code="ABZ", closest_big_city="Aberdeen"
+            ),
+            destination=Airport.objects.create(
+                name="Valencia", airport_code="VLC", closest_big_city="Valencia"
+            ),
+            distance=500,
+        )
+        self.airplane = Airplane.objects.create(
+            name="Boeing 777X",
+            rows=10,
+            seats_in_row=2,
+            airplane_type=AirplaneType.objects.create(name="Large Jets"),
+        )
+        self.crew = [
+            Crew.objects.create(first_name=f"Crew{i}", last_name="Member")
+            for i in range(4)
+        ]
+
+    def rows(self, count, crew=None, day=1):
+        crew = crew or self.crew[:2]
+        return [
+            {
+                "route": self.route.pk,
+                "airplane": self.airplane.pk,
+                "departure_time": f"2024-01-{day:02d}T{hour:02d}:00:00Z",
+                "arrival_time": f"2024-01-{day:02d}T{hour:02d}:30:00Z",
+                "crew": [member.pk for member in crew],
+            }
+            for hour in range(count)
+        ]
+
+    def upload(self, rows, name="flights.jsonl"):
+        content = "".join(json.dumps(row) + "\n" for row in rows)
+        return self.client.post(
+            FLIGHT_IMPORT_URL,
+            {"file": SimpleUploadedFile(name, content.encode())},
+            format="multipart",
+        )
+
+    def test_import_jsonl(self):
+        response = self.upload(self.rows(3))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {"created": 3, "errors": []})
+        self.assertEqual(Flight.objects.count(), 3)
+        self.assertEqual(CrewAssignment.objects.count(), 6)
+        self.assertEqual(BoardEntry.objects.count(), 6)
+
+    def test_import_csv(self):
+        content = (
+            "route,airplane,departure_time,arrival_time,crew\n"
+            f"{self.route.pk},{self.airplane.pk},2024-01-01 10:00,2024-01-01 12:00,"
+            f"{self.crew[0].pk};{self.crew[1].pk}\n"
+        )
+        response = self.client.post(
+            FLIGHT_IMPORT_URL,
+            {"file": SimpleUploadedFile("flights.csv", content.encode())},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        flight = Flight.objects.get()
+        self.assertEqual(
+            sorted(flight.crew.values_list("pk", flat=True)),
+            [self.crew[0].pk, self.crew[1].pk],
+        )
+
+    def test_queries_do_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as few:
+            self.upload(self.rows(2, day=1))
+        with CaptureQueriesContext(connection) as many:
+            self.upload(self.rows(20, day=2))
+
+        self.assertEqual(Flight.objects.count(), 22)
+        self.assertEqual(len(few), len(many))
+
+    def test_invalid_rows_reported_and_skipped(self):
+        rows = self.rows(3)
+        rows[0]["route"] = 999
+        rows[1]["arrival_time"] = "tomorrow"
+        rows.append({**rows[2], "crew": [self.crew[1].pk, self.crew[2].pk]})
+
+        response = self.upload(rows)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 1)
+        errors = [
+            (error["row"], sorted(error["errors"]))
+            for error in response.data["errors"]
+        ]
+        self.assertEqual(errors, [(1, ["route"]), (2, ["arrival_time"]), (4, ["crew"])])
+
+    def test_crew_busy_with_existing_flight(self):
+        self.upload(self.rows(1))
+
+        response = self.upload(self.rows(1, crew=self.crew[1:3]))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["errors"][0]["errors"]["crew"],
+            [f"Crew {self.crew[1].pk} is on another flight at that time"],
+        )
+        self.assertEqual(Flight.objects.count(), 1)
+
+    def test_crew_overlap_written_concurrently(self):
+        # stands in for the exclusion constraint of PostgreSQL
+        taken = datetime(2024, 1, 1, 1, tzinfo=pytz.UTC)
+
+        def refresh(flight_ids):
+            if Flight.objects.filter(pk__in=flight_ids, departure_time=taken).exists():
+                raise IntegrityError(f'violates "{CREW_OVERLAP_CONSTRAINT}"')
+            return refresh_crew_assignments(flight_ids)
+
+        with mock.patch(
+            "airport.flight_import.refresh_crew_assignments", side_effect=refresh
+        ):
+            response = self.upload(self.rows(3))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(
+            response.data["errors"],
+            [
+                {
+                    "row": 2,
+                    "errors": {
+                        "crew": ["A crew member is on another flight at that time"]
+                    },
+                }
+            ],
+        )
+        self.assertEqual(Flight.objects.count(), 2)
+        self.assertEqual(CrewAssignment.objects.count(), 4)
+        self.assertEqual(BoardEntry.objects.count(), 4)
+
+    def test_unknown_format(self):
+        response = self.upload(self.rows(1), name="flights.xlsx")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("format", response.data)
+
+    def test_file_not_utf8(self):
+        content = "".join(json.dumps(row) + "\n" for row in self.rows(3))
+        content = content.encode().replace(b"\n", b"\n\xff", 1)
+
+        response = self.client.post(
+            FLIGHT_IMPORT_URL,
+            {"file": SimpleUploadedFile("flights.jsonl", content)},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("not UTF-8", str(response.data["file"]))
+        self.assertFalse(Flight.objects.exists())
+
+    def test_import_forbidden_for_non_admin(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@myproject.com", "password")
+        )
+
+        response = self.upload(self.rows(1))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl") as schedule:
+            schedule.writelines(json.dumps(row) + "\n" for row in self.rows(4))
+            schedule.write("not json\n")
+            schedule.flush()
+            out, err = StringIO(), StringIO()
+
+            call_command(
+                "import_flights", schedule.name, batch_size=3, stdout=out, stderr=err
+            )
+
+        self.assertIn("Created 4 flights, skipped 1 rows", out.getvalue())
+        self.assertIn("row 5:", err.getvalue())
+        self.assertEqual(CrewAssignment.objects.count(), 8)
@@ -0,0 +1,340 @@
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    BoardEntry,
+    Flight,
+    FlightSchedule,
+    HeldSeat,
+    Order,
+    Route,
+    SeatHold,
+    Ticket,
+)
+
+SCHEDULE_URL = reverse("airport:flightschedule-list")
+FLIGHT_URL = reverse("airport:flight-list")
+ASYNC_FLIGHT_URL = reverse("airport:async-flight-list")
+
+
+def detail_url(schedule_id):
+    return reverse("airport:flightschedule-detail", args=[schedule_id])
+
+
+def flight_url(schedule_id):
+    return reverse("airport:flightschedule-flight", args=[schedule_id])
+
+
+def sample_schedule(**params):
+    route = Route.objects.create(
+        source=Airport.objects.create(
+            name="Aberdeen", airport_code="ABZ", closest_big_city="Aberdeen"
+        ),
+        destination=Airport.objects.create(
+            name="Valencia", airport_code="VLC", closest_big_city="Valencia"
+        ),
+        distance=500,
+    )
+    airplane = Airplane.objects.create(
+        name="Boeing 777X",
+        rows=10,
+        seats_in_row=2,
+        airplane_type=AirplaneType.objects.create(name="Large Jets"),
+    )
+    defaults = {
+        "route": route,
+        "airplane": airplane,
+        "weekdays": "135",
+        "departure": time(8, 30),
+        "duration": timedelta(hours=2),
+        "valid_from": date(2030, 1, 1),
+        "valid_until": date(2030, 12, 31),
+    }
+    defaults.update(params)
+    return FlightSchedule.objects.create(**defaults)
+
+
+def local(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class FlightScheduleModelTests(TestCase):
+    def test_occurrences(self):
+        schedule = sample_schedule(valid_from=date(2030, 1, 2))
+
+        occurrences = list(
+            schedule.occurrences(local(2029, 12, 30), local(2030, 1, 8))
+        )
+
+        # 2030-01-01 is a Tuesday, the schedule starts on Wednesday the 2nd
+        self.assertEqual(
+            occurrences,
+            [
+                local(2030, 1, 2, 8, 30),
+                local(2030, 1, 4, 8, 30),
+                local(2030, 1, 7, 8, 30),
+            ],
+        )
+
+    def test_occurrences_within_bounds(self):
+        schedule = sample_schedule()
+
+        self.assertEqual(
+            list(schedule.occurrences(local(2030, 1, 2, 9), local(2030, 1, 4, 8, 30))),
+            [],
+        )
+
+
+class FlightScheduleApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@myproject.com",
+            "password",
+        )
+        self.client.force_authenticate(self.user)
+        self.schedule = sample_schedule()
+
+    def test_list_adds_virtual_flights(self):
+        res = self.client.get(FLIGHT_URL, {"departure": "2030-01-02"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+        flight = res.data["results"][0]
+        self.assertIsNone(flight["id"])
+        self.assertEqual(flight["schedule"], self.schedule.pk)
+        self.assertEqual(flight["departure_time"], "2030-01-02 08:30:00")
+        self.assertEqual(flight["tickets_available"], 20)
+        self.assertFalse(Flight.objects.exists())
+
+    def test_list_without_window_has_stored_flights_only(self):
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.data["results"], [])
+
+    def test_list_respects_filters(self):
+        res = self.client.get(
+            FLIGHT_URL,
+            {"departure": "2030-01-02", "source": self.schedule.route.destination_id},
+        )
+
+        self.assertEqual(res.data["results"], [])
+
+    def test_store_instance(self):
+        res = self.client.post(
+            flight_url(self.schedule.pk), {"departure_time": "2030-01-02 08:30"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        flight = Flight.objects.get(pk=res.data["id"])
+        self.assertEqual(flight.schedule, self.schedule)
+        self.assertEqual(flight.arrival_time, local(2030, 1, 2, 10, 30))
+        self.assertEqual(BoardEntry.objects.filter(flight=flight).count(), 2)
+
+        res = self.client.post(
+            flight_url(self.schedule.pk), {"departure_time": "2030-01-02 08:30"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["id"], flight.pk)
+
+        res = self.client.get(FLIGHT_URL, {"departure": "2030-01-02"})
+        self.assertEqual([item["id"] for item in res.data["results"]], [flight.pk])
+
+    def test_store_instance_not_in_schedule(self):
+        res = self.client.post(
+            flight_url(self.schedule.pk), {"departure_time": "2030-01-01 08:30"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Flight.objects.exists())
+
+    def test_pages_show_every_flight_once(self):
+        for departure_time in ["2030-01-09 08:30", "2030-01-14 08:30"]:
+            self.client.post(
+                flight_url(self.schedule.pk), {"departure_time": departure_time}
+            )
+        Flight.objects.create(
+            route=self.schedule.route,
+            airplane=self.schedule.airplane,
+            departure_time=local(2030, 1, 9, 8, 30),
+            arrival_time=local(2030, 1, 9, 10, 30),
+        )
+
+        departures, ids = [], []
+        res = self.client.get(
+            FLIGHT_URL,
+            {
+                "departure_after": "2030-01-01T00:00",
+                "departure_before": "2030-01-20T00:00",
+                "page_size": 2,
+            },
+        )
+        while True:
+            self.assertLessEqual(len(res.data["results"]), 2)
+            departures += [item["departure_time"] for item in res.data["results"]]
+            ids += [item["id"] for item in res.data["results"] if item["id"]]
+            if not res.data["next"]:
+                break
+            res = self.client.get(res.data["next"])
+
+        # Mon/Wed/Fri from the 2nd to the 18th, plus the unscheduled flight
+        self.assertEqual(len(departures), 9)
+        self.assertEqual(departures, sorted(departures))
+        self.assertEqual(departures.count("2030-01-09 08:30:00"), 2)
+        self.assertEqual(len(ids), 3)
+
+    def test_async_list_matches_viewset(self):
+        self.client.post(
+            flight_url(self.schedule.pk), {"departure_time": "2030-01-09 08:30"}
+        )
+        params = {
+            "departure_after": "2030-01-01T00:00",
+            "departure_before": "2030-01-20T00:00",
+            "page_size": 3,
+        }
+
+        pages = []
+        for url in (FLIGHT_URL, ASYNC_FLIGHT_URL):
+            flights = []
+            res = self.client.get(url, params)
+            while True:
+                flights += res.json()["results"]
+                if not res.json()["next"]:
+                    break
+                res = self.client.get(res.json()["next"])
+            pages.append(flights)
+
+        self.assertEqual(len(pages[0]), 8)
+        self.assertEqual(pages[1], pages[0])
+
+
+class AdminFlightScheduleApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = get_user_model().objects.create_user(
+            email="admin@admin.com", password="1qazxcde3", is_staff=True
+        )
+        self.client.force_authenticate(self.admin_user)
+        self.schedule = sample_schedule()
+
+    @override_settings(FLIGHT_SCHEDULE_HORIZON_DAYS=3)
+    def test_create_stores_horizon(self):
+        today = timezone.localdate()
+        payload = {
+            "route": self.schedule.route_id,
+            "airplane": self.schedule.airplane_id,
+            "weekdays": "7654321",
+            "departure": "23:00",
+            "duration": "02:00:00",
+            "valid_from": today,
+            "valid_until": today + timedelta(days=30),
+        }
+
+        res = self.client.post(SCHEDULE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["weekdays"], "1234567")
+        flights = Flight.objects.filter(schedule_id=res.data["id"])
+        self.assertEqual(
+            [timezone.localdate(flight.departure_time) for flight in flights],
+            [today + timedelta(days=day) for day in range(3)],
+        )
+
+    def test_update_moves_unsold_flights(self):
+        stored = {
+            day: self.client.post(
+                flight_url(self.schedule.pk), {"departure_time": f"2030-01-{day} 08:30"}
+            ).data["id"]
+            for day in ("02", "04", "07")
+        }
+        order = Order.objects.create(user=self.admin_user)
+        Ticket.objects.create(order=order, flight_id=stored["04"], row=1, seat=1)
+        airplane = Airplane.objects.create(
+            name="Airbus A321",
+            rows=20,
+            seats_in_row=6,
+            airplane_type=self.schedule.airplane.airplane_type,
+        )
+
+        res = self.client.patch(
+            detail_url(self.schedule.pk),
+            {"weekdays": "1", "airplane": airplane.pk, "duration": "03:00:00"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Wednesday the 2nd is no longer flown, Friday the 4th is sold
+        self.assertFalse(Flight.objects.filter(pk=stored["02"]).exists())
+        sold = Flight.objects.get(pk=stored["04"])
+        self.assertEqual(sold.airplane, self.schedule.airplane)
+        moved = Flight.objects.get(pk=stored["07"])
+        self.assertEqual(moved.airplane, airplane)
+        self.assertEqual(moved.arrival_time, local(2030, 1, 7, 11, 30))
+        self.assertEqual(
+            BoardEntry.objects.get(flight=moved, direction="departure").capacity, 120
+        )
+
+    def test_update_keeps_held_flights(self):
+        stored = {
+            day: self.client.post(
+                flight_url(self.schedule.pk), {"departure_time": f"2030-01-{day} 08:30"}
+            ).data["id"]
+            for day in ("02", "09")
+        }
+        now = timezone.now()
+        for day, expires_at in (
+            ("02", now + timedelta(minutes=10)),
+            ("09", now - timedelta(minutes=1)),
+        ):
+            hold = SeatHold.objects.create(user=self.admin_user, expires_at=expires_at)
+            HeldSeat.objects.create(hold=hold, flight_id=stored[day], row=1, seat=1)
+
+        res = self.client.patch(detail_url(self.schedule.pk), {"weekdays": "1"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # only the expired hold no longer keeps its flight
+        self.assertTrue(Flight.objects.filter(pk=stored["02"]).exists())
+        self.assertFalse(Flight.objects.filter(pk=stored["09"]).exists())
+
+    def test_invalid_schedule(self):
+        payload = {
+            "route": self.schedule.route_id,
+            "airplane": self.schedule.airplane_id,
+            "weekdays": "08",
+            "departure": "23:00",
+            "duration": "02:00:00",
+            "valid_from": "2030-02-01",
+            "valid_until": "2030-01-01",
+        }
+
+        res = self.client.post(SCHEDULE_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("weekdays", res.data)
+
+        payload["weekdays"] = "1"
+        res = self.client.post(SCHEDULE_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("valid_until", res.data)
+
+    def test_materialise_command(self):
+        self.schedule.valid_from = timezone.localdate()
+        self.schedule.weekdays = "1234567"
+        self.schedule.save()
+        out = StringIO()
+
+        call_command("materialise_flights", days=5, stdout=out)
+        call_command("materialise_flights", days=5, stdout=out)
+
+        self.assertIn("Stored 5 scheduled flights", out.getvalue())
+        self.assertIn("Stored 0 scheduled flights", out.getvalue())
+        self.assertEqual(self.schedule.flights.count(), 5)
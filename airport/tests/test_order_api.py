@@ -1,10 +1,29 @@
-from datetime import datetime
+import csv
+import json
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
-from airport.models import Airport, Order, Route, AirplaneType, Airplane, Ticket, Flight
+from airport.models import (
+    Airport,
+    BoardEntry,
+    Order,
+    Route,
+    AirplaneType,
+    Airplane,
+    Ticket,
+    Flight,
+    IdempotencyKey,
+)
+from airport.export import export_rows
 from airport.serializers import OrderListSerializer
 
 ORDER_URL = reverse("airport:order-list")
@@ -167,7 +186,7 @@ class AuthenticatedOrderApiTests(TestCase):
         serializer = OrderListSerializer(orders, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_create_order(self):
         """Test creating a new order"""
@@ -200,7 +219,7 @@ class AuthenticatedOrderApiTests(TestCase):
         serializer = OrderListSerializer(orders, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_orders_limited_to_user(self):
         """Test that orders returned are for the authenticated user"""
@@ -215,8 +234,8 @@ class AuthenticatedOrderApiTests(TestCase):
         res = self.client.get(ORDER_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]["id"], order.id)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["id"], order.id)
 
     def test_create_order_with_invalid_tickets(self):
         """Test ticket validation"""
@@ -243,3 +262,336 @@ class AuthenticatedOrderApiTests(TestCase):
         res = self.client.post(ORDER_URL, payload, format="json")
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_order_with_seat_repeated_in_order(self):
+        """Test that one order cannot book the same seat twice"""
+
+        payload = {
+            "tickets": [
+                {"flight": self.flight.id, "row": 2, "seat": 1},
+                {"flight": self.flight.id, "row": 2, "seat": 1},
+            ]
+        }
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_create_order_with_unknown_flight(self):
+        payload = {"tickets": [{"flight": self.flight.id + 100, "row": 2, "seat": 1}]}
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_order_query_count_independent_of_ticket_count(self):
+        """Test that booking 9 seats costs as many queries as booking one"""
+
+        def book(rows):
+            payload = {
+                "tickets": [
+                    {"flight": self.flight.id, "row": row, "seat": 1}
+                    for row in rows
+                ]
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(ORDER_URL, payload, format="json")
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        single_ticket_queries = book([1])
+        nine_ticket_queries = book(range(2, 11))
+
+        self.assertEqual(single_ticket_queries, nine_ticket_queries)
+        self.assertEqual(Ticket.objects.count(), 10)
+
+
+    def test_create_order_counts_seats_sold(self):
+        payload = {
+            "tickets": [
+                {"flight": self.flight.id, "row": 3, "seat": 1},
+                {"flight": self.flight.id, "row": 4, "seat": 2},
+            ]
+        }
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 2)
+        Order.objects.get(pk=res.data["id"]).delete()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 0)
+
+    def test_saving_stale_flight_keeps_seats_sold(self):
+        stale = Flight.objects.get(pk=self.flight.pk)
+        payload = {"tickets": [{"flight": self.flight.id, "row": 3, "seat": 1}]}
+        self.client.post(ORDER_URL, payload, format="json")
+
+        stale.arrival_time = stale.arrival_time + timedelta(minutes=30)
+        stale.save()
+
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 1)
+        self.assertEqual(self.flight.arrival_time, stale.arrival_time)
+
+    def test_moving_ticket_moves_seats_sold(self):
+        other_flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=timezone.make_aware(datetime(2023, 12, 16, 13)),
+            arrival_time=timezone.make_aware(datetime(2023, 12, 16, 16)),
+        )
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=self.flight, row=1, seat=1)
+
+        ticket = Ticket.objects.get()
+        ticket.flight = other_flight
+        ticket.save()
+
+        self.flight.refresh_from_db()
+        other_flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 0)
+        self.assertEqual(other_flight.seats_sold, 1)
+        self.assertEqual(
+            set(
+                BoardEntry.objects.filter(direction="departure").values_list(
+                    "flight_id", "tickets_available"
+                )
+            ),
+            {(self.flight.pk, 500), (other_flight.pk, 499)},
+        )
+
+        ticket.delete()
+        other_flight.refresh_from_db()
+        self.assertEqual(other_flight.seats_sold, 0)
+
+    def test_create_order_for_sold_out_flight(self):
+        Flight.objects.filter(pk=self.flight.pk).update(seats_sold=499)
+        payload = {
+            "tickets": [
+                {"flight": self.flight.id, "row": 3, "seat": 1},
+                {"flight": self.flight.id, "row": 4, "seat": 2},
+            ]
+        }
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Only 1 of the 2 requested seats", str(res.data["tickets"]))
+
+        Flight.objects.filter(pk=self.flight.pk).update(seats_sold=500)
+        res = self.client.post(
+            ORDER_URL, {"tickets": payload["tickets"][:1]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("sold out", str(res.data["tickets"]))
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_reconcile_seats_sold_command(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.bulk_create(
+            [
+                Ticket(order=order, flight=self.flight, row=1, seat=1),
+                Ticket(order=order, flight=self.flight, row=1, seat=2),
+            ]
+        )
+        out = StringIO()
+
+        call_command("reconcile_seats_sold", stdout=out)
+        call_command("reconcile_seats_sold", stdout=out)
+
+        self.assertIn("Corrected seats sold of 1 flights", out.getvalue())
+        self.assertIn("Corrected seats sold of 0 flights", out.getvalue())
+        self.assertEqual(Flight.objects.get(pk=self.flight.pk).tickets_available, 498)
+
+    def test_list_order_sparse_fields(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=self.flight, row=3, seat=1)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ORDER_URL, {"fields": "id,tickets.row"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"], [{"id": order.id, "tickets": [{"row": 3}]}]
+        )
+        self.assertFalse(any("airport_flight" in q["sql"] for q in queries))
+
+    def test_retrieve_order_expanded_flight(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=self.flight, row=3, seat=1)
+
+        res = self.client.get(
+            detail_url(order.id), {"fields": "tickets", "expand": "tickets.flight"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        flight = res.data["tickets"][0]["flight"]
+        self.assertEqual(flight["id"], self.flight.id)
+        self.assertEqual(flight["tickets_available"], 499)
+
+    def test_create_order_with_idempotency_key(self):
+        """Test that a retry with the same key returns the first order"""
+
+        payload = {"tickets": [{"flight": self.flight.id, "row": 3, "seat": 1}]}
+
+        first = self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="order-1"
+        )
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.client.post(
+                ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="order-1"
+            )
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse(any("airport_ticket" in q["sql"] for q in queries))
+
+    def test_idempotency_key_reused_for_other_request(self):
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"flight": self.flight.id, "row": 3, "seat": 1}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="order-1",
+        )
+
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"flight": self.flight.id, "row": 4, "seat": 1}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="order-1",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_failed_order_does_not_use_up_idempotency_key(self):
+        payload = {"tickets": [{"flight": self.flight.id, "row": 3, "seat": 1}]}
+        order = Order.objects.create(user=self.user)
+        ticket = Ticket.objects.create(order=order, flight=self.flight, row=3, seat=1)
+
+        res = self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="order-1"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        ticket.delete()
+        res = self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="order-1"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_idempotency_key_scoped_to_user_and_expires(self):
+        other_user = get_user_model().objects.create_user(
+            "other@myproject.com",
+            "testpass",
+        )
+        stored = IdempotencyKey.objects.create(
+            user=other_user,
+            key="order-1",
+            fingerprint="",
+            status_code=201,
+            response={},
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+        IdempotencyKey.objects.create(
+            user=self.user,
+            key="order-2",
+            fingerprint="",
+            status_code=201,
+            response={},
+            expires_at=timezone.now(),
+        )
+
+        for key in ["order-1", "order-2"]:
+            res = self.client.post(
+                ORDER_URL,
+                {"tickets": [{"flight": self.flight.id, "row": 3, "seat": key[-1]}]},
+                format="json",
+                HTTP_IDEMPOTENCY_KEY=key,
+            )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(
+            set(IdempotencyKey.objects.values_list("user_id", "key")),
+            {
+                (other_user.pk, "order-1"),
+                (self.user.pk, "order-1"),
+                (self.user.pk, "order-2"),
+            },
+        )
+        self.assertTrue(IdempotencyKey.objects.filter(pk=stored.pk).exists())
+
+
+class OrderExportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@myproject.com",
+            "password",
+        )
+        self.admin_user = get_user_model().objects.create_user(
+            email="admin@admin.com", password="1qazxcde3", is_staff=True
+        )
+        self.order, self.tickets = sample_order1(self.user)
+        self.export_url = reverse("airport:order-export")
+
+    def test_export_forbidden_for_non_admin(self):
+        self.client.force_authenticate(self.user)
+        res = self.client.get(self.export_url)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_jsonl(self):
+        self.client.force_authenticate(self.admin_user)
+        res = self.client.get(self.export_url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [row["ticket_id"] for row in rows], [ticket.id for ticket in self.tickets]
+        )
+        self.assertEqual(rows[0]["user_email"], self.user.email)
+        self.assertEqual(rows[0]["source"], "ABZ")
+
+    def test_export_csv(self):
+        self.client.force_authenticate(self.admin_user)
+        res = self.client.get(self.export_url, {"output": "csv"})
+
+        self.assertEqual(res["Content-Type"], "text/csv")
+        content = b"".join(res.streaming_content).decode()
+        rows = list(csv.reader(content.splitlines()))
+        self.assertEqual(rows[0][0], "order_id")
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][-2:], ["4", "1"])
+
+    def test_export_unknown_output(self):
+        self.client.force_authenticate(self.admin_user)
+        res = self.client.get(self.export_url, {"output": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command("export_orders", output="csv", stdout=out)
+
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+    def test_export_without_server_side_cursors(self):
+        sample_order2(self.user)
+        expected = list(export_rows())
+
+        with mock.patch.dict(
+            connection.settings_dict, {"DISABLE_SERVER_SIDE_CURSORS": True}
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                rows = list(export_rows(chunk_size=2))
+
+        self.assertEqual(rows, expected)
+        self.assertEqual(len(queries), len(expected) // 2 + 1)
@@ -0,0 +1,31 @@
+import importlib
+
+from django.test import SimpleTestCase
+
+from airport.cache import PROCESS_LOCAL_BACKENDS
+
+
+class ProductionSettingsTests(SimpleTestCase):
+    def setUp(self):
+        self.settings = importlib.import_module("airport_service.settings_production")
+
+    def test_debug_off(self):
+        self.assertFalse(self.settings.DEBUG)
+
+    def test_debug_toolbar_removed(self):
+        self.assertNotIn("debug_toolbar", self.settings.INSTALLED_APPS)
+        self.assertFalse(
+            any("debug_toolbar" in middleware for middleware in self.settings.MIDDLEWARE)
+        )
+
+    def test_json_only(self):
+        self.assertEqual(
+            self.settings.REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"],
+            ("rest_framework.renderers.JSONRenderer",),
+        )
+        self.assertIn("DEFAULT_THROTTLE_RATES", self.settings.REST_FRAMEWORK)
+
+    def test_default_cache_shared_by_workers(self):
+        self.assertNotIn(
+            self.settings.CACHES["default"]["BACKEND"], PROCESS_LOCAL_BACKENDS
+        )
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytz
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+ROUTE_URL = reverse("airport:route-list")
+
+ROW_COUNTS = (10, 100, 1000)
+
+
+class ListQueryBudgetTests(TestCase):
+    """Every list endpoint runs a fixed number of queries, whatever the row count"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@myproject.com",
+            "password",
+        )
+        self.client.force_authenticate(self.user)
+        airplane_type = AirplaneType.objects.create(name="Large Jets")
+        self.airplane = Airplane.objects.create(
+            name="Boeing 777X", rows=1000, seats_in_row=2, airplane_type=airplane_type
+        )
+        self.departure = datetime(2023, 12, 15, 13, 0, tzinfo=pytz.UTC)
+
+    def create_routes(self, count: int) -> list:
+        airports = Airport.objects.bulk_create(
+            Airport(
+                name=f"Airport {i}",
+                airport_code=f"A{i}",
+                closest_big_city=f"City {i}",
+            )
+            for i in range(count + 1)
+        )
+        return Route.objects.bulk_create(
+            Route(source=airports[i], destination=airports[i + 1], distance=500)
+            for i in range(count)
+        )
+
+    def create_flights(self, count: int) -> list:
+        return Flight.objects.bulk_create(
+            Flight(
+                route=route,
+                airplane=self.airplane,
+                departure_time=self.departure + timedelta(hours=i),
+                arrival_time=self.departure + timedelta(hours=i + 3),
+            )
+            for i, route in enumerate(self.create_routes(count))
+        )
+
+    def create_orders(self, count: int) -> None:
+        flights = self.create_flights(count)
+        orders = Order.objects.bulk_create(
+            Order(user=self.user) for _ in range(count)
+        )
+        Ticket.objects.bulk_create(
+            Ticket(order=order, flight=flight, row=1, seat=1)
+            for order, flight in zip(orders, flights)
+        )
+
+    def assert_list_queries(self, url: str, seed, num_queries: int) -> None:
+        for count in ROW_COUNTS:
+            with self.subTest(rows=count):
+                seed(count)
+                with self.assertNumQueries(num_queries):
+                    res = self.client.get(url, {"page_size": 100})
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(res.data["results"]), min(count, 100))
+                Order.objects.all().delete()
+                Flight.objects.all().delete()
+                Airport.objects.all().delete()
+
+    def test_flight_list_queries(self):
+        self.assert_list_queries(FLIGHT_URL, self.create_flights, 1)
+
+    def test_route_list_queries(self):
+        self.assert_list_queries(ROUTE_URL, self.create_routes, 1)
+
+    def test_order_list_queries(self):
+        self.assert_list_queries(ORDER_URL, self.create_orders, 3)
@@ -1,5 +1,9 @@
+import time
+from datetime import datetime
 from django.contrib.auth import get_user_model
-from ..models import Airport, Route
+from django.core.cache import cache
+from django.utils import timezone
+from ..models import Airport, Route, Airplane, AirplaneType, Flight
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
@@ -7,6 +11,7 @@ from rest_framework.test import APIClient
 from ..serializers import RouteListSerializer, RouteDetailSerializer
 
 ROUTE_URL = reverse("airport:route-list")
+ROUTE_SEARCH_URL = reverse("airport:route-search")
 
 
 def detail_url(route_id: int):
@@ -53,8 +58,8 @@ class AuthenticatedRouteApiTests(TestCase):
         serializer1 = RouteListSerializer(route1)
         serializer2 = RouteListSerializer(route2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertNotIn(serializer2.data, res.data["results"])
 
     def test_filter_route_by_destination(self):
         """Test filtering routes by destination"""
@@ -72,8 +77,8 @@ class AuthenticatedRouteApiTests(TestCase):
         serializer1 = RouteListSerializer(route1)
         serializer2 = RouteListSerializer(route2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertNotIn(serializer2.data, res.data["results"])
 
     def test_create_route_forbidden(self):
         """Test that creating a route is forbidden"""
@@ -127,3 +132,119 @@ class AdminFlightApiTests(TestCase):
             res.data["non_field_errors"][0],
             "The city of departure and arrival cannot be the same",
         )
+
+
+class RouteSearchApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@myproject.com",
+            "password",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.geneva = Airport.objects.create(
+            name="Geneva", airport_code="GVA", closest_big_city="Geneva"
+        )
+        self.munich = Airport.objects.create(
+            name="Munich", airport_code="MUC", closest_big_city="Munich"
+        )
+        self.kyiv = Airport.objects.create(
+            name="Boryspil", airport_code="KBP", closest_big_city="Kyiv"
+        )
+        direct = sample_route(self.geneva, self.kyiv, distance=2000)
+        first_leg = sample_route(self.geneva, self.munich, distance=500)
+        second_leg = sample_route(self.munich, self.kyiv, distance=1600)
+
+        airplane_type = AirplaneType.objects.create(name="Medium Jets")
+        self.airplane = Airplane.objects.create(
+            name="Airbus A320", rows=30, seats_in_row=6, airplane_type=airplane_type
+        )
+        self.direct = self.sample_flight(direct, "2023-12-17 07:00", "2023-12-17 11:00")
+        self.first_leg = self.sample_flight(
+            first_leg, "2023-12-17 08:00", "2023-12-17 09:00"
+        )
+        self.sample_flight(second_leg, "2023-12-17 09:20", "2023-12-17 12:00")
+        self.second_leg = self.sample_flight(
+            second_leg, "2023-12-17 10:30", "2023-12-17 13:00"
+        )
+
+    def sample_flight(self, route, departure_time, arrival_time):
+        return Flight.objects.create(
+            route=route,
+            airplane=self.airplane,
+            departure_time=timezone.make_aware(
+                datetime.strptime(departure_time, "%Y-%m-%d %H:%M")
+            ),
+            arrival_time=timezone.make_aware(
+                datetime.strptime(arrival_time, "%Y-%m-%d %H:%M")
+            ),
+        )
+
+    def search(self, **params):
+        defaults = {"origin": "GVA", "destination": "KBP", "date": "2023-12-17"}
+        defaults.update(params)
+        return self.client.get(ROUTE_SEARCH_URL, defaults)
+
+    def test_search_direct_and_connecting(self):
+        res = self.search()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [[leg["id"] for leg in itinerary["legs"]] for itinerary in res.data],
+            [[self.direct.id], [self.first_leg.id, self.second_leg.id]],
+        )
+        self.assertEqual(res.data[1]["distance"], 2100)
+        self.assertEqual(res.data[1]["connections"], 1)
+
+    def test_search_respects_max_legs(self):
+        res = self.search(max_legs=1)
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["legs"][0]["id"], self.direct.id)
+
+    def test_search_respects_min_connection(self):
+        res = self.search(min_connection=120)
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_search_other_date(self):
+        res = self.search(date="2023-12-18")
+
+        self.assertEqual(res.data, [])
+
+    def test_search_sees_new_route(self):
+        warsaw = Airport.objects.create(
+            name="Chopin", airport_code="WAW", closest_big_city="Warsaw"
+        )
+        self.search(destination="WAW")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            route = sample_route(self.geneva, warsaw, distance=1300)
+        flight = self.sample_flight(route, "2023-12-17 15:00", "2023-12-17 17:00")
+        res = self.search(destination="WAW")
+
+        self.assertEqual(res.data[0]["legs"][0]["id"], flight.id)
+
+    def test_search_sees_route_written_by_other_worker(self):
+        warsaw = Airport.objects.create(
+            name="Chopin", airport_code="WAW", closest_big_city="Warsaw"
+        )
+        self.search(destination="WAW")
+
+        # Another worker's write reaches this one only through the stamps
+        route = Route.objects.bulk_create(
+            [Route(source=self.geneva, destination=warsaw, distance=1300)]
+        )[0]
+        cache.set("airport:version:airport.route", time.time_ns(), None)
+        flight = self.sample_flight(route, "2023-12-17 15:00", "2023-12-17 17:00")
+        res = self.search(destination="WAW")
+
+        self.assertEqual(res.data[0]["legs"][0]["id"], flight.id)
+
+    def test_search_invalid_params(self):
+        res = self.search(date="tomorrow", max_legs=7)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("date", res.data)
+        self.assertIn("max_legs", res.data)
@@ -0,0 +1,222 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+import pytz
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Flight,
+    HeldSeat,
+    Order,
+    Route,
+    SeatHold,
+    Ticket,
+)
+
+HOLD_URL = reverse("airport:seathold-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+def detail_url(hold_id: int):
+    return reverse("airport:seathold-detail", args=[hold_id])
+
+
+def confirm_url(hold_id: int):
+    return reverse("airport:seathold-confirm", args=[hold_id])
+
+
+def seat_map_url(flight_id: int):
+    return reverse("airport:flight-seat-map", args=[flight_id])
+
+
+def sample_flight(**params):
+    route = Route.objects.create(
+        source=Airport.objects.create(
+            name="Aberdeen", airport_code="ABZ", closest_big_city="Aberdeen"
+        ),
+        destination=Airport.objects.create(
+            name="Valencia", airport_code="VLC", closest_big_city="Valencia"
+        ),
+        distance=500,
+    )
+    airplane = Airplane.objects.create(
+        name="Boeing 777X",
+        rows=10,
+        seats_in_row=2,
+        airplane_type=AirplaneType.objects.create(name="Large Jets"),
+    )
+    defaults = {
+        "route": route,
+        "airplane": airplane,
+        "departure_time": datetime(2030, 12, 15, 13, 0, tzinfo=pytz.UTC),
+        "arrival_time": datetime(2030, 12, 15, 16, 0, tzinfo=pytz.UTC),
+    }
+    defaults.update(params)
+    return Flight.objects.create(**defaults)
+
+
+def sample_hold(user, flight, seats=((1, 1),), expires_in=timedelta(minutes=10)):
+    hold = SeatHold.objects.create(user=user, expires_at=timezone.now() + expires_in)
+    HeldSeat.objects.bulk_create(
+        HeldSeat(hold=hold, flight=flight, row=row, seat=seat) for row, seat in seats
+    )
+    return hold
+
+
+class UnauthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(HOLD_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(SEAT_HOLD_SECONDS=300)
+class AuthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@myproject.com",
+            "password",
+        )
+        self.other_user = get_user_model().objects.create_user(
+            "other@myproject.com",
+            "password",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def seats(self, *seats):
+        return {
+            "seats": [
+                {"flight": self.flight.pk, "row": row, "seat": seat}
+                for row, seat in seats
+            ]
+        }
+
+    def test_hold_seats(self):
+        res = self.client.post(HOLD_URL, self.seats((1, 1), (1, 2)), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        hold = SeatHold.objects.get(pk=res.data["id"])
+        self.assertEqual(hold.user, self.user)
+        self.assertAlmostEqual(
+            hold.expires_at,
+            timezone.now() + timedelta(seconds=300),
+            delta=timedelta(seconds=10),
+        )
+        self.assertEqual(len(res.data["seats"]), 2)
+
+        res = self.client.get(seat_map_url(self.flight.pk))
+        self.assertEqual(res.data["taken"], 2)
+
+    def test_seat_held_by_other_user(self):
+        sample_hold(self.other_user, self.flight)
+
+        res = self.client.post(HOLD_URL, self.seats((1, 1)), format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("held by another customer", str(res.data["tickets"]))
+
+        res = self.client.post(
+            ORDER_URL, {"tickets": self.seats((1, 1))["seats"]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_expired_hold_frees_seat(self):
+        sample_hold(self.other_user, self.flight, expires_in=-timedelta(seconds=1))
+
+        res = self.client.post(HOLD_URL, self.seats((1, 1)), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(HeldSeat.objects.get().hold_id, res.data["id"])
+
+    def test_sold_seat_cannot_be_held(self):
+        order = Order.objects.create(user=self.other_user)
+        Ticket.objects.create(order=order, flight=self.flight, row=1, seat=1)
+
+        res = self.client.post(HOLD_URL, self.seats((1, 1)), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("already taken", str(res.data["tickets"]))
+
+    def test_confirm_hold(self):
+        hold = sample_hold(self.user, self.flight, seats=[(1, 1), (2, 1)])
+
+        res = self.client.post(confirm_url(hold.pk))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(pk=res.data["id"])
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(
+            list(order.tickets.order_by("row").values_list("row", "seat")),
+            [(1, 1), (2, 1)],
+        )
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertFalse(HeldSeat.objects.exists())
+
+    def test_confirm_expired_hold(self):
+        hold = sample_hold(self.user, self.flight, expires_in=-timedelta(seconds=1))
+
+        res = self.client.post(confirm_url(hold.pk))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Order.objects.exists())
+
+    def test_order_releases_own_held_seats(self):
+        sample_hold(self.user, self.flight, seats=[(1, 1), (1, 2)])
+
+        res = self.client.post(
+            ORDER_URL, {"tickets": self.seats((1, 1))["seats"]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(HeldSeat.objects.values_list("row", "seat")), [(1, 2)]
+        )
+
+    def test_release_hold(self):
+        hold = sample_hold(self.user, self.flight)
+        self.client.get(seat_map_url(self.flight.pk))
+
+        res = self.client.delete(detail_url(hold.pk))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(HeldSeat.objects.exists())
+        res = self.client.get(seat_map_url(self.flight.pk))
+        self.assertEqual(res.data["taken"], 0)
+
+    def test_holds_limited_to_user(self):
+        hold = sample_hold(self.user, self.flight)
+        other_hold = sample_hold(self.other_user, self.flight, seats=[(2, 2)])
+
+        res = self.client.get(HOLD_URL)
+
+        self.assertEqual([item["id"] for item in res.data["results"]], [hold.pk])
+        res = self.client.post(confirm_url(other_hold.pk))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SweepSeatHoldsTests(TestCase):
+    def test_sweep_command(self):
+        user = get_user_model().objects.create_user("test@myproject.com", "password")
+        flight = sample_flight()
+        sample_hold(user, flight, expires_in=-timedelta(seconds=1))
+        active = sample_hold(user, flight, seats=[(2, 2)])
+        out = StringIO()
+
+        call_command("sweep_seat_holds", stdout=out)
+
+        self.assertIn("Swept 1 expired seat holds", out.getvalue())
+        self.assertEqual(list(SeatHold.objects.all()), [active])
+        self.assertEqual(list(HeldSeat.objects.values_list("row", "seat")), [(2, 2)])
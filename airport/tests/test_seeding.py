@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase
+
+from airport.models import BoardEntry, Crew, CrewAssignment, Flight, Order, Ticket
+
+
+class SeedAirportDataCommandTests(TestCase):
+    def setUp(self):
+        call_command(
+            "seed_airport_data",
+            25,
+            airports=5,
+            airplanes=3,
+            routes=10,
+            users=4,
+            load_factor=0.3,
+            batch_size=10,
+            stdout=StringIO(),
+        )
+
+    def test_volumes(self):
+        self.assertEqual(Flight.objects.count(), 25)
+        self.assertTrue(Order.objects.exists())
+        self.assertFalse(
+            Order.objects.annotate(n=Count("tickets")).filter(n=0).exists()
+        )
+
+    def test_tickets_fit_airplane_geometry(self):
+        self.assertFalse(
+            Ticket.objects.filter(row__gt=F("flight__airplane__rows")).exists()
+        )
+        self.assertFalse(
+            Ticket.objects.filter(seat__gt=F("flight__airplane__seats_in_row")).exists()
+        )
+
+    def test_board_matches_bookings(self):
+        self.assertEqual(BoardEntry.objects.count(), 50)
+        flights = Flight.objects.with_tickets_available().in_bulk()
+        for entry in BoardEntry.objects.all():
+            self.assertEqual(
+                entry.tickets_available, flights[entry.flight_id].tickets_available
+            )
+
+    def test_every_flight_has_crew_of_two(self):
+        self.assertEqual(
+            set(Flight.objects.annotate(n=Count("crew")).values_list("n", flat=True)),
+            {2},
+        )
+
+    def test_crew_assignments_match_flights(self):
+        self.assertEqual(CrewAssignment.objects.count(), 50)
+        self.assertFalse(
+            CrewAssignment.objects.exclude(
+                departure_time=F("flight__departure_time"),
+                arrival_time=F("flight__arrival_time"),
+            ).exists()
+        )
+
+    def test_crew_never_double_booked(self):
+        for crew in Crew.objects.prefetch_related("flights"):
+            flights = sorted(crew.flights.all(), key=lambda f: f.departure_time)
+            for previous, following in zip(flights, flights[1:]):
+                self.assertLessEqual(previous.arrival_time, following.departure_time)
+
+    def test_rerun_reuses_reference_data(self):
+        crew_count = Crew.objects.count()
+
+        call_command(
+            "seed_airport_data",
+            5,
+            airports=5,
+            airplanes=3,
+            routes=10,
+            users=4,
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(Flight.objects.count(), 30)
+        self.assertEqual(Crew.objects.count(), crew_count)
+        self.test_crew_never_double_booked()
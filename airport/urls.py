@@ -1,26 +1,52 @@
 from django.urls import include, path
 from rest_framework import routers
 
+from airport.async_views import (
+    AsyncFlightDetailView,
+    AsyncFlightListView,
+    AsyncRouteSearchView,
+)
 from airport.views import (
     OrderViewSet,
     CrewViewSet,
+    DatabaseMetricsView,
     FlightViewSet,
+    FlightScheduleViewSet,
     AirplaneTypeViewSet,
     AirplaneViewSet,
     AirportViewSet,
     RouteViewSet,
+    SeatHoldViewSet,
 )
 
 router = routers.DefaultRouter()
 
 router.register("orders", OrderViewSet)
+router.register("seat_holds", SeatHoldViewSet)
 router.register("airports", AirportViewSet)
 router.register("airplanes", AirplaneViewSet)
 router.register("airplane_types", AirplaneTypeViewSet)
 router.register("flights", FlightViewSet)
+router.register("flight_schedules", FlightScheduleViewSet)
 router.register("crews", CrewViewSet)
 router.register("route", RouteViewSet)
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path(
+        "async/flights/", AsyncFlightListView.as_view(), name="async-flight-list"
+    ),
+    path(
+        "async/flights/<int:pk>/",
+        AsyncFlightDetailView.as_view(),
+        name="async-flight-detail",
+    ),
+    path(
+        "async/route/search/",
+        AsyncRouteSearchView.as_view(),
+        name="async-route-search",
+    ),
+    path("metrics/db/", DatabaseMetricsView.as_view(), name="db-metrics"),
+    path("", include(router.urls)),
+]
 
 app_name = "airport"
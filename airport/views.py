@@ -1,11 +1,30 @@
-from datetime import datetime
+import codecs
+from datetime import timedelta
+from django.db import connection
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, status, mixins
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-
+from rest_framework.views import APIView
+
+from airport.board import get_board
+from airport.cache import CachedResponseMixin
+from airport.conditional import ConditionalGetMixin
+from airport.crew_import import import_crew
+from airport.crew_schedule import available_crew
+from airport.db_metrics import database_activity, metrics
+from airport.db_router import ReplicaReadMixin
+from airport.export import EXPORT_FORMATS, export_rows
+from airport.fieldsets import nested_models, request_fieldset
+from airport.flight_import import IMPORT_ENCODING, IMPORT_FORMATS, FlightImporter
+from airport.holds import confirm_hold, release_hold
+from airport.idempotency import IDEMPOTENCY_HEADER, IdempotentCreateMixin
 from airport.models import (
     Airplane,
     Crew,
@@ -15,10 +34,16 @@ from airport.models import (
     Airport,
     Route,
     AirplaneType,
+    BoardEntry,
+    FlightSchedule,
+    SeatHold,
 )
+from airport.pagination import FlightPagination, OrderPagination
 from airport.permissions import IsAdminOrIfAuthenticatedReadOnly
 from airport.serializers import (
     AirplaneSerializer,
+    CrewAvailabilitySerializer,
+    CrewImportSerializer,
     CrewSerializer,
     AirplaneTypeSerializer,
     RouteSerializer,
@@ -26,6 +51,12 @@ from airport.serializers import (
     TicketSerializer,
     FlightSerializer,
     AirportSerializer,
+    BoardEntrySerializer,
+    FlightFilterSerializer,
+    FlightImportSerializer,
+    FlightScheduleSerializer,
+    ScheduledFlightSerializer,
+    BoardQuerySerializer,
     FlightListSerializer,
     FlightDetailSerializer,
     RouteListSerializer,
@@ -33,19 +64,43 @@ from airport.serializers import (
     OrderListSerializer,
     AirplaneImageSerializer,
     AirplaneCreateSerializer,
+    SeatMapSerializer,
+    SeatHoldSerializer,
+    RouteSearchSerializer,
+    ItinerarySerializer,
+)
+from airport.route_graph import find_itineraries
+from airport.schedules import (
+    materialise_horizon,
+    materialise_instance,
+    merge_flights,
+    reschedule,
+    virtual_flights,
+    virtual_window,
 )
+from airport.seat_map import get_seat_map
 
 
 class AirplaneViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     viewsets.GenericViewSet,
 ):
-    queryset = Airplane.objects.all().select_related("airplane_type")
+    queryset = Airplane.objects.all()
     serializer_class = AirplaneSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (Airplane, AirplaneType)
+
+    def get_queryset(self):
+        fieldset = request_fieldset(self.request, self.get_serializer_class())
+        if fieldset.includes("airplane_type"):
+            return self.queryset.select_related("airplane_type")
+        return self.queryset
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -77,6 +132,9 @@ class AirplaneViewSet(
 
 
 class AirportViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -86,62 +144,126 @@ class AirportViewSet(
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (Airport,)
+
+    def get_serializer_class(self):
+        if self.action == "board":
+            return BoardEntrySerializer
+
+        return AirportSerializer
+
+    @extend_schema(parameters=[BoardQuerySerializer])
+    @action(methods=["GET"], detail=True, url_path="board")
+    def board(self, request, pk=None):
+        """Endpoint for the departure or arrival board of specific airport"""
+        airport = self.get_object()
+        params = BoardQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        direction = (
+            BoardEntry.DEPARTURE
+            if params.validated_data["direction"] == "departures"
+            else BoardEntry.ARRIVAL
+        )
+        entries = get_board(
+            airport.pk,
+            direction,
+            params.validated_data.get("date", timezone.localdate()),
+        )
+        serializer = self.get_serializer(entries, many=True)
+        return Response(serializer.data)
 
 
 class FlightViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     viewsets.GenericViewSet,
 ):
-    queryset = (
-        Flight.objects.all()
-        .select_related("route", "airplane")
-        .prefetch_related("crew", "tickets")
-    )
+    queryset = Flight.objects.all()
     serializer_class = FlightSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
-
-    @staticmethod
-    def _params_to_ints(qs):
-        return [int(str_id) for str_id in qs.split(",")]
+    pagination_class = FlightPagination
+    cache_models = (
+        Flight,
+        Ticket,
+        Route,
+        Airport,
+        Airplane,
+        AirplaneType,
+        Crew,
+        FlightSchedule,
+    )
 
     def get_queryset(self):
-        departure = self.request.query_params.get("departure")
-        arrival = self.request.query_params.get("arrival")
-        queryset = self.queryset
-        if departure:
-            departure = datetime.strptime(departure, "%Y-%m-%d").date()
-            queryset = queryset.filter(departure_time__date=departure)
-
-        if arrival:
-            arrival = datetime.strptime(arrival, "%Y-%m-%d").date()
-            queryset = queryset.filter(arrival_time__date=arrival)
+        if self.action == "seat_map":
+            return Flight.objects.select_related("airplane")
 
+        fieldset = request_fieldset(self.request, self.get_serializer_class())
+        queryset = self.queryset
+        if fieldset.includes("route") and self.action == "retrieve":
+            # The detail shows airport ids unless they are expanded
+            queryset = queryset.select_related(
+                "route",
+                *(
+                    f"route__{end}"
+                    for end in ("source", "destination")
+                    if fieldset.expands(f"route.{end}")
+                ),
+            )
+        elif fieldset.includes("route"):
+            queryset = queryset.select_related("route__source", "route__destination")
         if self.action == "list":
-            queryset = (
-                queryset.select_related("route", "airplane").prefetch_related(
-                    "route__source", "route__destination", "crew"
-                ).order_by("id"))
+            queryset = self.filter_flights(queryset)
+            if fieldset.includes("tickets_available"):
+                queryset = queryset.with_tickets_available()
+            if fieldset.includes("airplane") or fieldset.includes(
+                "airplane_num_seats"
+            ):
+                queryset = queryset.select_related(
+                    "airplane__airplane_type"
+                    if fieldset.expands("airplane")
+                    else "airplane"
+                )
+        elif self.action == "retrieve":
+            if fieldset.includes("airplane"):
+                queryset = queryset.select_related("airplane__airplane_type")
+            if fieldset.includes("crew"):
+                queryset = queryset.prefetch_related("crew")
+            if fieldset.includes("taken_places"):
+                queryset = queryset.prefetch_related("tickets")
+        else:
+            queryset = queryset.prefetch_related("crew")
+
         return queryset.distinct()
 
-    @extend_schema(
-        parameters=[
-            OpenApiParameter(
-                name="departure",
-                type=OpenApiTypes.DATE,
-                location=OpenApiParameter.QUERY,
-                description="filtering by time of departure of the aircraft",
-            ),
-            OpenApiParameter(
-                name="arrival",
-                type=OpenApiTypes.DATE,
-                location=OpenApiParameter.QUERY,
-                description="Filtering by aircraft arrival time",
-            ),
+    def filter_flights(self, queryset):
+        params = FlightFilterSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        self.flight_filters = params.validated_data
+        return queryset.matching(**params.validated_data)
+
+    def paginate_queryset(self, queryset):
+        """Add the instances of schedules not stored as flights yet"""
+        page = super().paginate_queryset(queryset)
+        window = virtual_window(**self.flight_filters)
+        if page is None or window is None:
+            return page
+        virtual = [
+            flight
+            for flight in virtual_flights(
+                *window,
+                arrival=self.flight_filters.get("arrival"),
+                source=self.flight_filters.get("source"),
+                destination=self.flight_filters.get("destination"),
+            )
+            if self.paginator.page_covers(flight.departure_time)
         ]
-    )
+        return self.paginator.trim_page(merge_flights(page, virtual))
+
+    @extend_schema(parameters=[FlightFilterSerializer])
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -152,22 +274,123 @@ class FlightViewSet(
         if self.action == "retrieve":
             return FlightDetailSerializer
 
+        if self.action == "seat_map":
+            return SeatMapSerializer
+
+        if self.action == "bulk_import":
+            return FlightImportSerializer
+
         return FlightSerializer
 
+    @action(methods=["GET"], detail=True, url_path="seat-map")
+    def seat_map(self, request, pk=None):
+        """Endpoint for the compact map of taken seats of specific flight"""
+        flight = self.get_object()
+        serializer = self.get_serializer(get_seat_map(flight))
+        return Response(serializer.data)
+
+    @extend_schema(request={"multipart/form-data": FlightImportSerializer})
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="import",
+        permission_classes=[IsAdminUser],
+    )
+    def bulk_import(self, request):
+        """Endpoint for creating a schedule of flights from a CSV or JSONL file"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        read_rows = IMPORT_FORMATS[serializer.validated_data["format"]]
+        lines = codecs.iterdecode(serializer.validated_data["file"], IMPORT_ENCODING)
+        report = FlightImporter().run(read_rows(lines))
+        return Response(
+            report,
+            status=(
+                status.HTTP_201_CREATED
+                if report["created"]
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+
+class FlightScheduleViewSet(
+    ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
+    queryset = FlightSchedule.objects.all()
+    serializer_class = FlightScheduleSerializer
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = nested_models(FlightScheduleSerializer)
+
+    def get_queryset(self):
+        if self.action == "flight":
+            return self.queryset.select_related("route", "airplane")
+
+        fieldset = request_fieldset(self.request, self.get_serializer_class())
+        queryset = self.queryset
+        if fieldset.includes("route") and fieldset.expands("route"):
+            queryset = queryset.select_related("route__source", "route__destination")
+        if fieldset.includes("airplane") and fieldset.expands("airplane"):
+            queryset = queryset.select_related("airplane__airplane_type")
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "flight":
+            return ScheduledFlightSerializer
+        return FlightScheduleSerializer
 
-class TicketViewSet(viewsets.ModelViewSet):
+    def perform_create(self, serializer):
+        schedule = serializer.save()
+        materialise_horizon(FlightSchedule.objects.filter(pk=schedule.pk))
+
+    def perform_update(self, serializer):
+        reschedule(serializer.save())
+
+    @extend_schema(responses={200: FlightSerializer, 201: FlightSerializer})
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path="flight",
+        permission_classes=[IsAuthenticated],
+    )
+    def flight(self, request, pk=None):
+        """Endpoint for storing one instance of a schedule, before booking it"""
+        schedule = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        flight, created = materialise_instance(
+            schedule, serializer.validated_data["departure_time"]
+        )
+        if flight is None:
+            return Response(
+                {"departure_time": "The schedule has no flight at that time"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            FlightSerializer(flight).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+
+class TicketViewSet(
+    ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = Ticket.objects.all().select_related("flight", "order")
     serializer_class = TicketSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = nested_models(TicketSerializer)
 
 
-class OrderViewSet(viewsets.ModelViewSet):
-    queryset = Order.objects.all().prefetch_related(
-        "tickets__flight__route",
-        "tickets__flight__airplane"
-    )
+class OrderViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    IdempotentCreateMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = OrderPagination
+    cache_models = nested_models(OrderSerializer, OrderListSerializer)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -176,22 +399,131 @@ class OrderViewSet(viewsets.ModelViewSet):
         return OrderSerializer
 
     def get_queryset(self):
+        fieldset = request_fieldset(self.request, self.get_serializer_class())
         queryset = self.queryset.filter(user=self.request.user)
-
-        if self.action in ["list", "detail"]:
-            queryset = queryset.prefetch_related("tickets__flight__airplane")
+        if not fieldset.includes("tickets"):
+            return queryset
+
+        queryset = queryset.prefetch_related("tickets")
+        if (
+            self.action == "list" or fieldset.expands("tickets.flight")
+        ) and fieldset.includes("tickets.flight"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "tickets__flight",
+                    queryset=Flight.objects.select_related(
+                        "route__source", "route__destination", "airplane"
+                    ).with_tickets_available(),
+                ),
+            )
 
         return queryset
 
     def perform_creat(self, serializer):
         serializer.save(user=self.request.user)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name=IDEMPOTENCY_HEADER,
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                description="Unique key of the order, retries with the same key "
+                            "return the first response instead of ordering again",
+            ),
+        ]
+    )
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="output",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=sorted(EXPORT_FORMATS),
+                description="Export format, JSON Lines by default",
+            ),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request):
+        """Endpoint for streaming every ticket of every order"""
+        output = request.query_params.get("output", "jsonl")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"output": f"Choose one of: {', '.join(sorted(EXPORT_FORMATS))}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        content_type, render = EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(
+            render(export_rows()), content_type=content_type
+        )
+        filename = f"orders-{timezone.now():%Y%m%d%H%M%S}.{output}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class SeatHoldViewSet(
+    ReplicaReadMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        fieldset = request_fieldset(self.request, self.get_serializer_class())
+        queryset = self.queryset.filter(
+            user=self.request.user, expires_at__gt=timezone.now()
+        )
+        if fieldset.includes("seats"):
+            queryset = queryset.prefetch_related("seats")
+        if fieldset.includes("seats.flight") and fieldset.expands("seats.flight"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "seats__flight",
+                    queryset=Flight.objects.select_related(
+                        "route__source", "route__destination", "airplane"
+                    ),
+                )
+            )
+        return queryset
+
+    def perform_destroy(self, instance):
+        release_hold(instance)
 
-class RouteViewSet(viewsets.ModelViewSet):
+    @extend_schema(request=None, responses={201: OrderSerializer})
+    @action(methods=["POST"], detail=True)
+    def confirm(self, request, pk=None):
+        """Endpoint for turning the held seats into an order"""
+        order = confirm_hold(self.get_object(), ValidationError)
+        serializer = OrderSerializer(order, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class RouteViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    viewsets.ModelViewSet,
+):
 
-    queryset = Route.objects.all().select_related("source", "destination")
+    queryset = Route.objects.all()
     serializer_class = RouteSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (Route, Airport)
 
     @staticmethod
     def _params_to_ints(qs):
@@ -200,7 +532,11 @@ class RouteViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         source = self.request.query_params.get("source")
         destination = self.request.query_params.get("destination")
+        fieldset = request_fieldset(self.request, self.get_serializer_class())
         queryset = self.queryset
+        for field in ("source", "destination"):
+            if fieldset.includes(field):
+                queryset = queryset.select_related(field)
 
         if source:
             source_ids = self._params_to_ints(source)
@@ -240,10 +576,34 @@ class RouteViewSet(viewsets.ModelViewSet):
         if self.action == "retrieve":
             return RouteSerializer
 
+        if self.action == "search":
+            return ItinerarySerializer
+
         return RouteSerializer
 
+    @extend_schema(parameters=[RouteSearchSerializer])
+    @action(methods=["GET"], detail=False, url_path="search")
+    def search(self, request):
+        """Endpoint for itineraries of up to max_legs flights between two airports"""
+        params = RouteSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        itineraries = find_itineraries(
+            params.validated_data["origin"],
+            params.validated_data["destination"],
+            params.validated_data["date"],
+            max_legs=params.validated_data["max_legs"],
+            min_connection=timedelta(
+                minutes=params.validated_data["min_connection"]
+            ),
+        )
+        serializer = self.get_serializer(itineraries, many=True)
+        return Response(serializer.data)
+
 
 class AirplaneTypeViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -253,9 +613,71 @@ class AirplaneTypeViewSet(
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (AirplaneType,)
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(
+    ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
     permission_classes = (IsAdminUser,)
+    cache_models = (Crew,)
+
+    def get_serializer_class(self):
+        if self.action == "bulk_import":
+            return CrewImportSerializer
+        return CrewSerializer
+
+    @extend_schema(parameters=[CrewAvailabilitySerializer])
+    @action(methods=["GET"], detail=False, url_path="available")
+    def available(self, request):
+        """Endpoint for crew members without a flight in an interval"""
+        params = CrewAvailabilitySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = available_crew(
+            params.validated_data["start"], params.validated_data["end"]
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(request=CrewImportSerializer(many=True))
+    @action(methods=["POST"], detail=False, url_path="import")
+    def bulk_import(self, request):
+        """Endpoint for adding many crew members, skipping existing ones"""
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        result = import_crew(
+            (member["first_name"], member["last_name"])
+            for member in serializer.validated_data
+        )
+        return Response(
+            result,
+            status=(
+                status.HTTP_201_CREATED if result["created"] else status.HTTP_200_OK
+            ),
+        )
+
+
+class DatabaseMetricsView(APIView):
+    """Connection reuse and setup time of this worker, server connections"""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(
+            {
+                "connections": metrics.stats(),
+                "settings": {
+                    "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+                    "conn_health_checks": connection.settings_dict[
+                        "CONN_HEALTH_CHECKS"
+                    ],
+                    "server_side_cursors": not connection.settings_dict.get(
+                        "DISABLE_SERVER_SIDE_CURSORS", False
+                    ),
+                },
+                "server": database_activity(),
+            }
+        )
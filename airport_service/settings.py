@@ -51,6 +51,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "airport.db_metrics.DatabaseMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -81,16 +82,49 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "airport_service.wsgi.application"
 
+# Set DB_PGBOUNCER=1 when POSTGRES_HOST points at PgBouncer in transaction
+# pooling mode, server-side cursors do not survive between its transactions
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "0") == "1"
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
         "HOST": os.environ["POSTGRES_HOST"],
+        "PORT": os.getenv("POSTGRES_PORT", "5432"),
         "NAME": os.environ["POSTGRES_NAME"],
         "USER": os.environ["POSTGRES_USER"],
         "PASSWORD": os.environ["POSTGRES_PASSWORD"],
+        # Seconds a connection is kept open between requests, 0 closes it
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        # Ping a persistent connection before its first use in a request
+        "CONN_HEALTH_CHECKS": True,
+        "DISABLE_SERVER_SIDE_CURSORS": DB_PGBOUNCER,
     }
 }
 
+# Read replicas, comma-separated hosts sharing the primary's credentials.
+# Safe-method API requests read from them, see airport.db_router
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    filter(None, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")), start=1
+):
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{index}")
+
+DATABASE_ROUTERS = ["airport.db_router.ReplicaRouter"]
+
+# Upper bound of replication lag in seconds: a user stays on the primary for
+# this long after a write and fresher responses are not cached
+REPLICA_LAG_SECONDS = int(os.getenv("REPLICA_LAG_SECONDS", 5))
+
+# Alias from CACHES that remembers users pinned to the primary, with more
+# than one worker it must be a cache shared by all of them
+REPLICA_PIN_ALIAS = os.getenv("REPLICA_PIN_ALIAS", "default")
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -144,7 +178,12 @@ REST_FRAMEWORK = {
         "rest_framework.throttling.AnonRateThrottle",
         "rest_framework.throttling.UserRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "100/day", "user": "1000/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": os.getenv("API_THROTTLE_ANON", "100/day"),
+        "user": os.getenv("API_THROTTLE_USER", "1000/day"),
+    },
+    "DEFAULT_PAGINATION_CLASS": "airport.pagination.KeysetPagination",
+    "PAGE_SIZE": int(os.getenv("API_PAGE_SIZE", 20)),
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
 
@@ -168,6 +207,36 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
+AIRPORT_CACHE = {
+    # Seconds a cached reference data response lives, 0 disables the cache
+    "TIMEOUT": int(os.getenv("AIRPORT_CACHE_TIMEOUT", 300)),
+    # Responses kept in the in-process LRU cache of every worker
+    "MAX_ENTRIES": int(os.getenv("AIRPORT_CACHE_MAX_ENTRIES", 1024)),
+    # Alias from CACHES shared by all workers, unset keeps responses in-process
+    "SHARED_ALIAS": os.getenv("AIRPORT_CACHE_SHARED_ALIAS") or None,
+    # Alias from CACHES that stores model version stamps, with more than one
+    # worker it must be a cache shared by all of them
+    "VERSION_ALIAS": os.getenv("AIRPORT_CACHE_VERSION_ALIAS", "default"),
+}
+
+# Seconds a flight seat map stays cached, 0 disables the cache
+SEAT_MAP_CACHE_TIMEOUT = int(os.getenv("SEAT_MAP_CACHE_TIMEOUT", 60))
+
+# Seconds seats stay held for a customer before they are free again
+SEAT_HOLD_SECONDS = int(os.getenv("SEAT_HOLD_SECONDS", 600))
+
+# Seconds the response to a request with an Idempotency-Key is replayed
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", 86400))
+
+# Days ahead for which recurring schedules are stored as Flight rows
+FLIGHT_SCHEDULE_HORIZON_DAYS = int(os.getenv("FLIGHT_SCHEDULE_HORIZON_DAYS", 14))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=10),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -0,0 +1,43 @@
+"""
+Production settings for airport_service project.
+
+Select with DJANGO_SETTINGS_MODULE=airport_service.settings_production, the
+gunicorn configuration in gunicorn.conf.py does so by default.
+"""
+import os
+
+from airport_service.settings import *  # noqa: F401,F403
+from airport_service.settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.getenv("DJANGO_ALLOWED_HOSTS", "localhost").split(",")
+    if host.strip()
+]
+
+# The debug toolbar instruments every request, keep it out of the chain
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != "debug_toolbar"]
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE
+    if not middleware.startswith("debug_toolbar.")
+]
+
+# JSON only, the browsable API renders templates on every response
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
+}
+
+# Version stamps, replica pins, seat maps and throttle counters must be seen
+# by every gunicorn worker, so the default cache lives in Redis
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+    },
+}
+
+STATIC_ROOT = "/vol/web/static"
@@ -0,0 +1,46 @@
+"""
+Gunicorn configuration of the production server.
+
+WSGI, threaded workers:
+    gunicorn -c gunicorn.conf.py airport_service.wsgi
+
+ASGI, for the async read endpoints:
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker \
+        gunicorn -c gunicorn.conf.py airport_service.asgi
+"""
+import multiprocessing
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "airport_service.settings_production")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Worker processes, each one holds its own database connections and caches
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+# Lets the app refuse to start when its caches are not shared by the workers
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+# Threads per gthread worker, ignored by the uvicorn worker
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# Seconds an idle keep-alive connection is held open
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# Recycle workers to bound memory growth, jitter avoids restarting all at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+# Load Django in the master so workers share its memory pages copy-on-write
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Connections opened while preloading must not be shared between workers
+    from django.db import connections
+
+    connections.close_all()